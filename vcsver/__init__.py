@@ -1,15 +1,75 @@
-from .errors import (
-    VcsverError,
-    RevisionInfoNotFoundError,
-)
+# The public names are imported from the submodules when first used, so that importing
+# vcsver (e.g. by the setuptools hooks run in every build) does not import them all.
 
-from .git import GitRevisionInfoReader
+import importlib
+import typing
 
-from . import pep440
+if typing.TYPE_CHECKING:
+    from .errors import (
+        VcsverError,
+        RevisionInfoNotFoundError,
+    )
 
-from .vcsver import get_version
+    from .git import GitRevisionInfoReader
 
-from .types import (
-    RevisionInfo,
-    VersionInfo,
-)
+    from .gitcoprocess import GitCoprocess
+
+    from . import pep440
+
+    from .bulk import iter_versions
+
+    from .monorepo import (
+        Package,
+        get_version_infos,
+    )
+
+    from .multirepo import iter_repository_versions
+
+    from .vcsver import (
+        get_version,
+        get_version_async,
+    )
+
+    from .types import (
+        RevisionInfo,
+        VersionInfo,
+    )
+
+
+# Module of each public name; submodules are mapped to None
+_EXPORTS: typing.Dict[str, typing.Optional[str]] = {
+    'VcsverError': 'errors',
+    'RevisionInfoNotFoundError': 'errors',
+    'GitRevisionInfoReader': 'git',
+    'GitCoprocess': 'gitcoprocess',
+    'pep440': None,
+    'iter_versions': 'bulk',
+    'Package': 'monorepo',
+    'get_version_infos': 'monorepo',
+    'iter_repository_versions': 'multirepo',
+    'get_version': 'vcsver',
+    'get_version_async': 'vcsver',
+    'RevisionInfo': 'types',
+    'VersionInfo': 'types',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    module_name = _EXPORTS[name]
+    if module_name is None:
+        return importlib.import_module(f'.{name}', __name__)
+
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    # Later lookups do not call __getattr__
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> typing.List[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,6 @@
+import sys
+
+from . import cli
+
+
+sys.exit(cli.main())
@@ -0,0 +1,136 @@
+# This module contains creating versions for many commits at once.
+#
+# The history is walked once in topological order (parents before children) and the
+# latest tag and distance of a commit with one parent are derived from those of the
+# parent: its distance is one more than the parent's distance, unless the commit is
+# tagged. Only merge commits and commits whose parents are not part of the walk are
+# described by walking their history.
+
+import typing
+
+from . import errors
+from . import git
+from . import gitcoprocess
+from . import gitrepository
+from . import history
+from . import pep440
+from . import tagindex
+from . import tagmatch
+from . import types
+from . import vcsver
+
+
+class CommitVersion(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    commit: str
+    version: str
+
+
+def iter_versions(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    revisions: typing.Sequence[str] = ('HEAD',),
+    path: typing.Optional[str] = None,
+    root_version: str = '0',
+    parse_tag: types.TagParser = lambda tag: tag,
+    create_version: types.VersionStringFactory = pep440.post,
+    first_parent: bool = False,
+    tag_pattern: tagmatch.Patterns = (),
+    tag_exclude: tagmatch.Patterns = (),
+) -> typing.Iterator[CommitVersion]:
+    '''
+    Iterate versions of the commits selected by revisions (git rev-list arguments such as
+    v1.0..main), parents before children.
+
+    The versions are the same get_version would create when the commit is checked out
+    and the working tree is clean.
+
+    Only the tags matching tag_pattern and not tag_exclude (globs as in git describe
+    --match and --exclude) are used.
+    '''
+
+    tag_matcher = tagmatch.TagMatcher(tag_pattern, tag_exclude)
+
+    with gitcoprocess.GitCoprocess(path) as coprocess:
+        for commit, revision_info in _iter_revision_infos(coprocess, revisions, path, first_parent, tag_matcher):
+            yield CommitVersion(
+                commit=commit,
+                version=vcsver.create_version_from_revision_info(
+                    revision_info,
+                    root_version=root_version,
+                    parse_tag=parse_tag,
+                    create_version=create_version,
+                ),
+            )
+
+
+def _iter_revision_infos(  # pylint: disable=too-many-locals
+    coprocess: gitcoprocess.GitCoprocess,
+    revisions: typing.Sequence[str],
+    path: typing.Optional[str],
+    first_parent: bool,
+    tag_matcher: tagmatch.TagMatcher,
+) -> typing.Iterator[typing.Tuple[str, types.RevisionInfo]]:
+    try:
+        repository = gitrepository.Repository.discover(path, object_fallback=coprocess.read)
+
+    except errors.UnsupportedRepositoryError as exception:
+        raise errors.RevisionInfoNotFoundError(f'Repository can not be read: {exception}') from exception
+
+    tag_entries = tagindex.read_tags(repository, tag_matcher)
+    tags = git.get_describable_tags(repository, tag_entries=tag_entries)
+    tag_generations = tagindex.get_generations(tag_entries)
+    tag_names: typing.Dict[str, str] = {}
+
+    # Latest tag and distance of the walked commits
+    descriptions: typing.Dict[str, typing.Tuple[typing.Optional[str], int]] = {}
+
+    for line in coprocess.iter_rev_list('--topo-order', '--reverse', '--parents', *revisions):
+        commit, *parents = line.split()
+
+        if commit in tags:
+            description: typing.Tuple[typing.Optional[str], int] = (
+                _get_tag_name(repository, tags, tag_names, commit),
+                0,
+            )
+
+        elif len(parents) == 1 and parents[0] in descriptions:
+            latest_tag, distance = descriptions[parents[0]]
+            description = (latest_tag, distance + 1)
+
+        else:
+            description = _describe(repository, commit, tags, tag_generations, tag_names, first_parent)
+
+        descriptions[commit] = description
+
+        yield commit, types.RevisionInfo(
+            latest_tag=description[0],
+            distance=description[1],
+            commit=repository.abbreviate(commit, 10),
+            dirty=False,
+        )
+
+
+def _describe(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    repository: gitrepository.Repository,
+    commit: str,
+    tags: typing.Dict[str, gitrepository.Ref],
+    tag_generations: typing.Dict[str, typing.Optional[int]],
+    tag_names: typing.Dict[str, str],
+    first_parent: bool,
+) -> typing.Tuple[typing.Optional[str], int]:
+    description = history.describe(repository, commit, tags, tag_generations=tag_generations)
+    if description is None:
+        return None, history.count_commits(repository, commit, first_parent=first_parent)
+
+    tagged_commit, distance = description
+    return _get_tag_name(repository, tags, tag_names, tagged_commit), distance
+
+
+def _get_tag_name(
+    repository: gitrepository.Repository,
+    tags: typing.Dict[str, gitrepository.Ref],
+    tag_names: typing.Dict[str, str],
+    tagged_commit: str,
+) -> str:
+    if tagged_commit not in tag_names:
+        tag_names[tagged_commit] = git.get_tag_name(repository, tags[tagged_commit])
+
+    return tag_names[tagged_commit]
@@ -0,0 +1,89 @@
+# This module contains persistent caches stored in the Git directory.
+#
+# The caches are only optimizations: failing to read or write a cache file never
+# makes version generation fail.
+
+import contextlib
+import json
+import os
+import tempfile
+import typing
+
+
+class CacheFile:
+    '''
+    Size bounded key-value store backed by a JSON file.
+
+    The file is replaced atomically on every write so concurrent readers always see
+    either the old or the new content. When the cache is full, the least recently
+    stored entries are dropped.
+    '''
+
+    # Incremented when entries written before may be wrong: 2 drops the distances counted
+    # in generation order instead of the commit date order of git describe
+    _FORMAT_VERSION = 2
+
+    def __init__(self, path: str, max_entries: int = 128) -> None:
+        super().__init__()
+
+        self.path: str = path
+        self._max_entries: int = max_entries
+        self._entries: typing.Optional[typing.Dict[str, typing.Any]] = None
+
+    def get(self, key: str) -> typing.Any:
+        return self._get_entries().get(key)
+
+    def keys(self) -> typing.List[str]:
+        return list(self._get_entries())
+
+    def put(self, key: str, value: typing.Any) -> None:
+        entries = self._get_entries()
+        entries.pop(key, None)
+        entries[key] = value
+
+        for old_key in list(entries)[:-self._max_entries]:
+            del entries[old_key]
+
+        self._write(entries)
+
+    def _get_entries(self) -> typing.Dict[str, typing.Any]:
+        if self._entries is None:
+            self._entries = self._read()
+
+        return self._entries
+
+    def _read(self) -> typing.Dict[str, typing.Any]:
+        try:
+            with open(self.path, 'rt', encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(data, dict) or data.get('version') != self._FORMAT_VERSION:
+            return {}
+
+        entries = data.get('entries')
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: typing.Dict[str, typing.Any]) -> None:
+        directory, filename = os.path.split(self.path)
+        try:
+            file_descriptor, temporary_path = tempfile.mkstemp(
+                dir=directory,
+                prefix=f'{filename}.',
+                suffix='.tmp',
+            )
+
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(file_descriptor, 'wt', encoding='utf-8') as temporary_file:
+                json.dump({'version': self._FORMAT_VERSION, 'entries': entries}, temporary_file)
+
+            os.replace(temporary_path, self.path)
+
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(temporary_path)
@@ -0,0 +1,221 @@
+# This module contains the vcsver command line interface.
+
+import argparse
+import functools
+import json
+import os
+import sys
+import typing
+
+from . import bulk
+from . import errors
+from . import git
+from . import monorepo
+from . import multirepo
+from . import setuptools_legacy
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = _create_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        return args.command(args)
+
+    except errors.VcsverError as exception:
+        print(f'vcsver: {exception}', file=sys.stderr)
+        return 1
+
+
+def _versions(args: argparse.Namespace) -> int:
+    for commit, version in bulk.iter_versions(
+        args.revisions,
+        path=args.path,
+        root_version=args.root_version,
+        parse_tag=setuptools_legacy.TAG_PARSERS[args.parse_tag],
+        create_version=setuptools_legacy.VERSION_SCHEMAS[args.create_version],
+        first_parent=args.first_parent,
+        tag_pattern=args.match or (),
+        tag_exclude=args.exclude or (),
+    ):
+        print(commit, version)
+
+    return 0
+
+
+def _packages(args: argparse.Namespace) -> int:
+    version_infos = monorepo.get_version_infos(
+        args.packages,
+        path=args.path,
+        revision=args.revision,
+        root_version=args.root_version,
+        parse_tag=setuptools_legacy.TAG_PARSERS[args.parse_tag],
+        first_parent=args.first_parent,
+        tag_pattern=args.match or (),
+        tag_exclude=args.exclude or (),
+    )
+
+    create_version = setuptools_legacy.VERSION_SCHEMAS[args.create_version]
+    for package, version_info in zip(args.packages, version_infos):
+        print(package.path, create_version(version_info))
+
+    return 0
+
+
+def _repositories(args: argparse.Namespace) -> int:
+    exit_code = 0
+    for repository_version in multirepo.iter_repository_versions(
+        args.paths,
+        max_workers=args.workers,
+        root_version=args.root_version,
+        parse_tag=setuptools_legacy.TAG_PARSERS[args.parse_tag],
+        create_version=setuptools_legacy.VERSION_SCHEMAS[args.create_version],
+        create_reader=functools.partial(
+            git.GitRevisionInfoReader,
+            first_parent=args.first_parent,
+            tag_pattern=args.match or (),
+            tag_exclude=args.exclude or (),
+        ),
+    ):
+        error = str(repository_version.error) if repository_version.error is not None else None
+        if error is not None:
+            exit_code = 1
+
+        if args.json:
+            print(json.dumps({
+                'path': repository_version.path,
+                'version': repository_version.version,
+                'error': error,
+            }), flush=True)
+
+        elif error is not None:
+            print(f'vcsver: {repository_version.path}: {error}', file=sys.stderr, flush=True)
+
+        else:
+            print(repository_version.path, repository_version.version, flush=True)
+
+    return exit_code
+
+
+def _parse_package(value: str) -> monorepo.Package:
+    # PATH=TAG_PREFIX; the tag prefix defaults to the directory name followed by /
+    path, separator, tag_prefix = value.partition('=')
+    if not separator:
+        tag_prefix = os.path.basename(os.path.normpath(path)) + '/'
+
+    return monorepo.Package(path=path, tag_prefix=tag_prefix)
+
+
+def _create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='vcsver')
+    subparsers = parser.add_subparsers(title='commands', required=True)
+
+    versions_parser = subparsers.add_parser(
+        'versions',
+        help='print version of every commit in a revision range',
+        description='Print "<commit> <version>" for every commit selected by the revisions, parents first.',
+    )
+    versions_parser.set_defaults(command=_versions)
+    versions_parser.add_argument(
+        'revisions',
+        nargs='*',
+        default=['HEAD'],
+        help='git rev-list arguments selecting the commits (e.g. v1.0..main); default: HEAD',
+    )
+    _add_version_arguments(versions_parser)
+
+    packages_parser = subparsers.add_parser(
+        'packages',
+        help='print version of every package of a repository at a revision',
+        description=(
+            'Print "<package path> <version>" for every package, walking the history once for all of them. '
+            'Only the tags named with the tag prefix of a package and the commits changing the files under '
+            'the package path are used for its version.'
+        ),
+    )
+    packages_parser.set_defaults(command=_packages)
+    packages_parser.add_argument(
+        'packages',
+        nargs='+',
+        type=_parse_package,
+        metavar='PATH[=TAG_PREFIX]',
+        help='package directory relative to --path and the prefix of its tag names (default: <directory name>/)',
+    )
+    packages_parser.add_argument(
+        '--revision',
+        default='HEAD',
+        help='commit or ref name whose versions are printed (default: %(default)s)',
+    )
+    _add_version_arguments(packages_parser)
+
+    repositories_parser = subparsers.add_parser(
+        'repositories',
+        help='print version of every repository',
+        description=(
+            'Print "<path> <version>" for every repository as soon as it is read, reading many '
+            'repositories concurrently. Errors are printed to stderr and make the exit code 1.'
+        ),
+    )
+    repositories_parser.set_defaults(command=_repositories)
+    repositories_parser.add_argument(
+        'paths',
+        nargs='+',
+        metavar='PATH',
+        help='path to a repository',
+    )
+    repositories_parser.add_argument(
+        '--workers',
+        type=int,
+        help='number of repositories read at a time (default: chosen by the thread pool)',
+    )
+    repositories_parser.add_argument(
+        '--json',
+        action='store_true',
+        help='print a JSON object {"path": ..., "version": ..., "error": ...} per line instead',
+    )
+    _add_version_arguments(repositories_parser, path=False)
+
+    return parser
+
+
+def _add_version_arguments(parser: argparse.ArgumentParser, path: bool = True) -> None:
+    if path:
+        parser.add_argument(
+            '--path',
+            help='path to the repository (default: current working directory)',
+        )
+
+    parser.add_argument(
+        '--root-version',
+        default=setuptools_legacy.DEFAULT_ROOT_VERSION,
+        help='version used when there are no tags (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--parse-tag',
+        choices=sorted(setuptools_legacy.TAG_PARSERS),
+        default='plain',
+        help='tag parser (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--create-version',
+        choices=sorted(setuptools_legacy.VERSION_SCHEMAS),
+        default='pep440.post',
+        help='version schema (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--first-parent',
+        action='store_true',
+        help='count only first-parent commits when there are no tags',
+    )
+    parser.add_argument(
+        '--match',
+        action='append',
+        metavar='PATTERN',
+        help='use only tags matching the glob pattern like git describe --match (can be repeated)',
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        metavar='PATTERN',
+        help='do not use tags matching the glob pattern like git describe --exclude (can be repeated)',
+    )
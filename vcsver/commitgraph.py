@@ -0,0 +1,338 @@
+# This module contains reader for Git commit-graph files (including split commit-graph chains).
+#
+# Besides the commits, commit-graphs written with --changed-paths contain a Bloom filter of
+# the paths each commit changes; they tell without reading any trees that a commit does not
+# change a path.
+
+import functools
+import mmap
+import os
+import struct
+import typing
+
+from . import errors
+from . import util
+
+
+_SHA1_LENGTH = 20
+
+_SIGNATURE = b'CGPH'
+_CHUNK_OID_FANOUT = b'OIDF'
+_CHUNK_OID_LOOKUP = b'OIDL'
+_CHUNK_COMMIT_DATA = b'CDAT'
+_CHUNK_EXTRA_EDGES = b'EDGE'
+_CHUNK_BLOOM_INDEXES = b'BIDX'
+_CHUNK_BLOOM_DATA = b'BDAT'
+
+_COMMIT_DATA_SIZE = _SHA1_LENGTH + 16
+
+_PARENT_NONE = 0x70000000
+_PARENT_EXTRA_EDGES = 0x80000000
+_LAST_EDGE = 0x80000000
+
+# Hash version, number of hashes and bits per entry
+_BLOOM_HEADER = struct.Struct('>III')
+_BLOOM_SEEDS = (0x293ae76f, 0x7e646e2c)
+_BLOOM_HASH_VERSIONS = (1, 2)
+
+_UINT32_MASK = 0xffffffff
+
+
+class CommitGraphEntry(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    tree: str
+    parents: typing.Tuple[str, ...]
+    timestamp: int
+    generation: typing.Optional[int]
+
+
+class ChangedPathFilter(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    '''
+    Bloom filter of the paths (and their leading directories) a commit changes compared
+    with its first parent.
+    '''
+
+    data: bytes
+    hash_version: int
+    hash_count: int
+
+    def may_contain(self, path: bytes) -> bool:
+        '''
+        Return False if the commit certainly does not change path.
+        '''
+
+        bit_count = len(self.data) * 8
+        if not bit_count:
+            # The filter of the commit has not been computed
+            return True
+
+        for hash_value in _get_bloom_hashes(path, self.hash_version, self.hash_count):
+            position = hash_value % bit_count
+            if not self.data[position // 8] & (1 << (position % 8)):
+                return False
+
+        return True
+
+
+class CommitGraphLayer:
+    def __init__(self, path: str, base_count: int) -> None:
+        super().__init__()
+
+        self.path: str = path
+        self.base_count: int = base_count
+
+        with open(path, 'rb') as graph_file:
+            self._data: mmap.mmap = mmap.mmap(graph_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature, version, hash_version, chunk_count = struct.unpack_from('>4sBBB', self._data, 0)
+        if signature != _SIGNATURE or version != 1 or hash_version != 1:
+            raise errors.UnsupportedRepositoryError(f'Unsupported commit-graph: {path}')
+
+        self._chunks: typing.Dict[bytes, int] = {}
+        for index in range(0, chunk_count):
+            chunk_id, offset = struct.unpack_from('>4sQ', self._data, 8 + index * 12)
+            self._chunks[chunk_id] = offset
+
+        for chunk_id in (_CHUNK_OID_FANOUT, _CHUNK_OID_LOOKUP, _CHUNK_COMMIT_DATA):
+            if chunk_id not in self._chunks:
+                raise errors.UnsupportedRepositoryError(f'Commit-graph {path} is missing chunk {chunk_id!r}')
+
+        self._fanout: typing.Tuple[int, ...] = struct.unpack_from('>256I', self._data, self._chunks[_CHUNK_OID_FANOUT])
+        self.count: int = self._fanout[255]
+
+        # Hash version and number of hashes of the changed-path filters if the layer has them
+        self._bloom_settings: typing.Optional[typing.Tuple[int, int]] = None
+        if _CHUNK_BLOOM_INDEXES in self._chunks and _CHUNK_BLOOM_DATA in self._chunks:
+            hash_version, hash_count, _ = _BLOOM_HEADER.unpack_from(self._data, self._chunks[_CHUNK_BLOOM_DATA])
+            if hash_version in _BLOOM_HASH_VERSIONS:
+                self._bloom_settings = hash_version, hash_count
+
+    def find(self, oid: bytes) -> typing.Optional[int]:
+        '''
+        Return the local position of the commit in this layer.
+        '''
+
+        position = util.search_sorted_object_ids(self._fanout, oid, self.oid)
+        if position < self.count and self.oid(position) == oid:
+            return position
+
+        return None
+
+    def oid(self, position: int) -> bytes:
+        offset = self._chunks[_CHUNK_OID_LOOKUP] + position * _SHA1_LENGTH
+        return self._data[offset:offset + _SHA1_LENGTH]
+
+    def commit_data(self, position: int) -> typing.Tuple[bytes, typing.List[int], int, int]:
+        '''
+        Return tree id, global parent positions, generation and commit time of the commit.
+        '''
+
+        offset = self._chunks[_CHUNK_COMMIT_DATA] + position * _COMMIT_DATA_SIZE
+        tree = self._data[offset:offset + _SHA1_LENGTH]
+        first_parent, second_parent, generation_and_time, time_low = struct.unpack_from(
+            '>IIII',
+            self._data,
+            offset + _SHA1_LENGTH,
+        )
+
+        parents = []
+        if first_parent != _PARENT_NONE:
+            parents.append(first_parent)
+
+        if second_parent & _PARENT_EXTRA_EDGES:
+            parents.extend(self._extra_edges(second_parent & ~_PARENT_EXTRA_EDGES))
+
+        elif second_parent != _PARENT_NONE:
+            parents.append(second_parent)
+
+        generation = generation_and_time >> 2
+        timestamp = ((generation_and_time & 0x3) << 32) | time_low
+
+        return tree, parents, generation, timestamp
+
+    def changed_path_filter(self, position: int) -> typing.Optional[ChangedPathFilter]:
+        '''
+        Return the changed-path filter of the commit or None if the layer has no filters.
+        '''
+
+        if self._bloom_settings is None:
+            return None
+
+        # The index contains the end offset of each filter in the data after the header
+        indexes_offset = self._chunks[_CHUNK_BLOOM_INDEXES]
+        end = struct.unpack_from('>I', self._data, indexes_offset + position * 4)[0]
+        start = struct.unpack_from('>I', self._data, indexes_offset + (position - 1) * 4)[0] if position else 0
+        data_offset = self._chunks[_CHUNK_BLOOM_DATA] + _BLOOM_HEADER.size
+
+        hash_version, hash_count = self._bloom_settings
+        return ChangedPathFilter(
+            data=self._data[data_offset + start:data_offset + end],
+            hash_version=hash_version,
+            hash_count=hash_count,
+        )
+
+    def _extra_edges(self, index: int) -> typing.Iterator[int]:
+        offset = self._chunks.get(_CHUNK_EXTRA_EDGES)
+        if offset is None:
+            raise errors.UnsupportedRepositoryError(f'Commit-graph {self.path} is missing extra edges')
+
+        while True:
+            edge = struct.unpack_from('>I', self._data, offset + index * 4)[0]
+            yield edge & ~_LAST_EDGE
+            if edge & _LAST_EDGE:
+                return
+
+            index += 1
+
+
+class CommitGraph:
+    '''
+    Commit-graph made of one or more layers; the first layer is the base of the chain.
+    '''
+
+    def __init__(self, layers: typing.Sequence[CommitGraphLayer]) -> None:
+        super().__init__()
+
+        self._layers: typing.Sequence[CommitGraphLayer] = layers
+        self.has_generations: bool = self._check_generations()
+
+    @classmethod
+    def open(cls, objects_path: str) -> typing.Optional['CommitGraph']:
+        '''
+        Open commit-graph of the object database or return None if there is no commit-graph.
+        '''
+
+        info_path = os.path.join(objects_path, 'info')
+
+        try:
+            with open(os.path.join(info_path, 'commit-graphs', 'commit-graph-chain'), 'rt', encoding='ascii') as chain:
+                graph_paths = [
+                    os.path.join(info_path, 'commit-graphs', f'graph-{line.strip()}.graph')
+                    for line in chain
+                    if line.strip()
+                ]
+
+        except FileNotFoundError:
+            graph_paths = [os.path.join(info_path, 'commit-graph')]
+
+        layers: typing.List[CommitGraphLayer] = []
+        base_count = 0
+        for graph_path in graph_paths:
+            try:
+                layer = CommitGraphLayer(graph_path, base_count)
+
+            except FileNotFoundError:
+                if layers:
+                    raise errors.UnsupportedRepositoryError(  # pylint: disable=raise-missing-from
+                        f'Commit-graph chain is broken: {graph_path}',
+                    )
+
+                return None
+
+            layers.append(layer)
+            base_count += layer.count
+
+        return cls(layers) if layers else None
+
+    def commit(self, oid: str) -> typing.Optional[CommitGraphEntry]:
+        oid_bytes = bytes.fromhex(oid)
+        for layer in reversed(self._layers):
+            position = layer.find(oid_bytes)
+            if position is not None:
+                return self._commit(layer, position)
+
+        return None
+
+    def changed_path_filter(self, oid: str) -> typing.Optional[ChangedPathFilter]:
+        '''
+        Return the changed-path filter of the commit or None if it is not available.
+        '''
+
+        oid_bytes = bytes.fromhex(oid)
+        for layer in reversed(self._layers):
+            position = layer.find(oid_bytes)
+            if position is not None:
+                return layer.changed_path_filter(position)
+
+        return None
+
+    def _commit(self, layer: CommitGraphLayer, position: int) -> CommitGraphEntry:
+        tree, parent_positions, generation, timestamp = layer.commit_data(position)
+
+        return CommitGraphEntry(
+            tree=tree.hex(),
+            parents=tuple(self._oid(parent_position).hex() for parent_position in parent_positions),
+            timestamp=timestamp,
+            generation=generation if self.has_generations else None,
+        )
+
+    def _oid(self, global_position: int) -> bytes:
+        for layer in self._layers:
+            if global_position < layer.base_count + layer.count:
+                return layer.oid(global_position - layer.base_count)
+
+        raise errors.UnsupportedRepositoryError(f'Invalid commit-graph position: {global_position}')
+
+    def _check_generations(self) -> bool:
+        # Commit-graphs written by old Git versions have zero generation numbers
+        for layer in self._layers:
+            if layer.count and layer.commit_data(0)[2] == 0:
+                return False
+
+        return True
+
+
+# The paths looked up are usually the same few (e.g. one for each package) for every commit
+@functools.lru_cache(maxsize=1024)
+def _get_bloom_hashes(path: bytes, hash_version: int, hash_count: int) -> typing.Tuple[int, ...]:
+    # Filters of hash version 1 are computed from the bytes of the path as signed chars
+    first_hash, second_hash = (murmur3(seed, path, signed_bytes=hash_version == 1) for seed in _BLOOM_SEEDS)
+
+    return tuple((first_hash + index * second_hash) & _UINT32_MASK for index in range(hash_count))
+
+
+def murmur3(seed: int, data: bytes, signed_bytes: bool = False) -> int:
+    '''
+    Return 32-bit MurmurHash3 of data. If signed_bytes is True, bytes above 0x7f are sign
+    extended like Git versions before 2.46 do.
+    '''
+
+    values = [value - 0x100 & _UINT32_MASK if signed_bytes and value > 0x7f else value for value in data]
+    block_end = len(values) - len(values) % 4
+
+    hash_value = seed
+    for offset in range(0, block_end, 4):
+        block = (
+            values[offset]
+            | values[offset + 1] << 8
+            | values[offset + 2] << 16
+            | values[offset + 3] << 24
+        ) & _UINT32_MASK
+        hash_value ^= _murmur3_scramble(block)
+        hash_value = _rotate_left(hash_value, 13)
+        hash_value = (hash_value * 5 + 0xe6546b64) & _UINT32_MASK
+
+    if block_end < len(values):
+        tail = 0
+        for index, value in enumerate(values[block_end:]):
+            tail ^= (value << (8 * index)) & _UINT32_MASK
+
+        hash_value ^= _murmur3_scramble(tail)
+
+    hash_value ^= len(values)
+    hash_value ^= hash_value >> 16
+    hash_value = (hash_value * 0x85ebca6b) & _UINT32_MASK
+    hash_value ^= hash_value >> 13
+    hash_value = (hash_value * 0xc2b2ae35) & _UINT32_MASK
+    hash_value ^= hash_value >> 16
+
+    return hash_value
+
+
+def _murmur3_scramble(value: int) -> int:
+    value = (value * 0xcc9e2d51) & _UINT32_MASK
+    value = _rotate_left(value, 15)
+    return (value * 0x1b873593) & _UINT32_MASK
+
+
+def _rotate_left(value: int, count: int) -> int:
+    return ((value << count) | (value >> (32 - count))) & _UINT32_MASK
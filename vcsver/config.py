@@ -1,6 +1,10 @@
-import typing
+# This module contains reading the configuration from pyproject.toml.
+#
+# The configuration is read in every setuptools build, also of projects not using vcsver,
+# so the TOML parser and the rest of vcsver are imported only if pyproject.toml may
+# contain vcsver configuration.
 
-import tomli
+import typing
 
 from . import errors
 
@@ -17,20 +21,84 @@ def read() -> Config:
 
     config = pyproject_data.get('tool', {}).get('vcsver', {})
 
-    _validate_config(config)
+    if config:
+        _validate_config(config)
 
     return config
 
 
 def _read_pyproject_toml() -> Config:
     with open('pyproject.toml', 'rb') as pyproject_toml_file:
-        return tomli.load(pyproject_toml_file)
+        pyproject_toml = pyproject_toml_file.read()
+
+    # Any vcsver configuration contains the name in its key
+    if b'vcsver' not in pyproject_toml:
+        return {}
+
+    import tomli  # pylint: disable=import-outside-toplevel
+
+    return tomli.loads(pyproject_toml.decode('utf-8'))
 
 
 def _validate_config(config: Config):
+    from . import git  # pylint: disable=import-outside-toplevel
+
     source = config.get('source')
     if source is not None:
         if source != 'git':
             raise errors.InvalidConfigurationError(
                 f'Unknown source: {source}',
             )
+
+    dirty = config.get('dirty')
+    if dirty is not None and dirty not in git.DIRTY_MODES:
+        raise errors.InvalidConfigurationError(
+            f'Unknown dirty check mode: {dirty}',
+        )
+
+    dirty_digest = config.get('dirty_digest')
+    if dirty_digest is not None and not isinstance(dirty_digest, bool):
+        raise errors.InvalidConfigurationError(
+            f'Invalid dirty_digest: {dirty_digest}',
+        )
+
+    tag_selection = config.get('tag_selection')
+    if tag_selection is not None and tag_selection not in git.TAG_SELECTIONS:
+        raise errors.InvalidConfigurationError(
+            f'Unknown tag selection: {tag_selection}',
+        )
+
+    timeout = config.get('timeout')
+    if timeout is not None and (
+        isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0
+    ):
+        raise errors.InvalidConfigurationError(
+            f'Invalid timeout: {timeout}',
+        )
+
+    timeout_fallback = config.get('timeout_fallback')
+    if timeout_fallback is not None and timeout_fallback not in git.TIMEOUT_FALLBACKS:
+        raise errors.InvalidConfigurationError(
+            f'Unknown timeout fallback: {timeout_fallback}',
+        )
+
+    for option in ('tag_prefix', 'path_scope'):
+        value = config.get(option)
+        if value is not None and not isinstance(value, str):
+            raise errors.InvalidConfigurationError(
+                f'Invalid {option}: {value}',
+            )
+
+    for option in ('tag_pattern', 'tag_exclude'):
+        patterns = config.get(option)
+        if patterns is not None and not _is_patterns(patterns):
+            raise errors.InvalidConfigurationError(
+                f'Invalid {option}: {patterns}',
+            )
+
+
+def _is_patterns(value: typing.Any) -> bool:
+    # A glob pattern or a list of them
+    return isinstance(value, str) or (
+        isinstance(value, list) and all(isinstance(pattern, str) for pattern in value)
+    )
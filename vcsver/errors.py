@@ -16,3 +16,21 @@ class RevisionInfoNotFoundError(VcsverError):
     No version source data available; vcsver can not
     create version number.
     '''
+
+
+class UnsupportedRepositoryError(Exception):
+    '''
+    The repository uses a layout or feature the native Git reader does
+    not support; the reader falls back to running git.
+
+    This exception is internal and never escapes vcsver.
+    '''
+
+
+class RepositoryNotFoundError(UnsupportedRepositoryError):
+    '''
+    The path is not inside a Git repository; running git would not find
+    a repository either.
+
+    This exception is internal and never escapes vcsver.
+    '''
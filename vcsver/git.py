@@ -1,34 +1,675 @@
+import hashlib
+import logging
+import os
+import queue
 import re
 import subprocess
+import threading
+import time
 import typing
 
+from . import cache
+from . import errors
+from . import gitcommands
+from . import gitcoprocess
+from . import gitrepository
+from . import history
+from . import pathscope
+from . import pep440
+from . import singleflight
+from . import tagindex
+from . import tagmatch
 from . import types
+from . import worktree
 
 
-class GitRevisionInfoReader:
-    def __init__(
+# Maximum number of commits walked when extending cached distance of an ancestor of HEAD
+_INCREMENTAL_WALK_LIMIT = 1000
+
+# Modes of checking whether the working tree is dirty
+DIRTY_FULL = 'full'
+DIRTY_TRACKED_ONLY = 'tracked-only'
+DIRTY_IGNORE_SUBMODULES = 'ignore-submodules'
+DIRTY_SKIP = 'skip'
+
+DIRTY_MODES = (DIRTY_FULL, DIRTY_TRACKED_ONLY, DIRTY_IGNORE_SUBMODULES, DIRTY_SKIP)
+
+_DIRTY_DIFF_ARGS: typing.Dict[str, typing.Tuple[str, ...]] = {
+    DIRTY_FULL: (),
+    DIRTY_TRACKED_ONLY: ('--ignore-submodules=dirty',),
+    DIRTY_IGNORE_SUBMODULES: ('--ignore-submodules=all',),
+}
+
+# How the tag versions are created from is selected among the tags reachable from HEAD
+TAG_SELECTION_NEAREST = 'nearest'
+TAG_SELECTION_HIGHEST_VERSION = 'highest-version'
+
+TAG_SELECTIONS = (TAG_SELECTION_NEAREST, TAG_SELECTION_HIGHEST_VERSION)
+
+# What is done when reading revision info takes longer than the timeout and the revision
+# info of the same commit has not been read before
+TIMEOUT_FALLBACK_ERROR = 'error'
+TIMEOUT_FALLBACK_SKIP_DIRTY = 'skip-dirty'
+
+TIMEOUT_FALLBACKS = (TIMEOUT_FALLBACK_ERROR, TIMEOUT_FALLBACK_SKIP_DIRTY)
+
+_MODE_REGULAR = 0o100644
+_MODE_EXECUTABLE = 0o100755
+_MODE_SYMLINK = 0o120000
+
+_TOP_LEVEL_PATH_COMMAND = gitcommands.Command(('rev-parse', '--show-toplevel'))
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = typing.TypeVar('_T')
+
+
+class GitRevisionInfoReader:  # pylint: disable=too-many-instance-attributes
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
         self,
         path: typing.Optional[str] = None,
+        native: bool = True,
+        first_parent: bool = False,
+        use_cache: bool = True,
+        single_flight: bool = True,
+        coprocess: typing.Optional[gitcoprocess.GitCoprocess] = None,
+        revision: typing.Optional[str] = None,
+        dirty_workers: typing.Optional[int] = None,
+        dirty: str = DIRTY_FULL,
+        dirty_digest: bool = False,
+        tag_pattern: tagmatch.Patterns = (),
+        tag_exclude: tagmatch.Patterns = (),
+        tag_selection: str = TAG_SELECTION_NEAREST,
+        tag_prefix: str = '',
+        path_scope: typing.Optional[str] = None,
+        timeout: typing.Optional[float] = None,
+        timeout_fallback: str = TIMEOUT_FALLBACK_ERROR,
     ) -> None:
         super().__init__()
 
+        if dirty not in DIRTY_MODES:
+            raise errors.InvalidConfigurationError(f'Unknown dirty check mode: {dirty}')
+
+        if tag_selection not in TAG_SELECTIONS:
+            raise errors.InvalidConfigurationError(f'Unknown tag selection: {tag_selection}')
+
+        if timeout is not None and timeout <= 0:
+            raise errors.InvalidConfigurationError(f'Invalid timeout: {timeout}')
+
+        if timeout_fallback not in TIMEOUT_FALLBACKS:
+            raise errors.InvalidConfigurationError(f'Unknown timeout fallback: {timeout_fallback}')
+
         self._path: typing.Optional[str] = path
+        self._native: bool = native
+        self._first_parent: bool = first_parent
+        self._use_cache: bool = use_cache
+        self._single_flight: bool = single_flight
+        self._coprocess: typing.Optional[gitcoprocess.GitCoprocess] = coprocess
+        self._revision: typing.Optional[str] = revision
+        self._dirty_workers: typing.Optional[int] = dirty_workers
+        self._dirty: str = dirty
+        self._dirty_digest: bool = dirty_digest
+        # Tags not matching are ignored like git describe --match and --exclude do
+        self._tag_matcher: tagmatch.TagMatcher = tagmatch.TagMatcher(tag_pattern, tag_exclude, prefix=tag_prefix)
+        self._tag_selection: str = tag_selection
+        # Only the commits changing the files under this path are counted in the distance
+        self._path_scope: typing.Optional[str] = path_scope
+        # Seconds reading revision info may take; then the git processes are killed
+        self._timeout: typing.Optional[float] = timeout
+        self._timeout_fallback: str = timeout_fallback
         self._abbrev: int = 10
 
     def __call__(self) -> typing.Optional[types.RevisionInfo]:
-        top_level_path = self._get_top_level_path()
-        if top_level_path is None:
+        if self._timeout is None:
+            return self._read_before(None)
+
+        progress = self._create_progress()
+        try:
+            revision_info = self._read_before(time.monotonic() + self._timeout, progress)
+
+        except subprocess.TimeoutExpired:
+            revision_info = self._read_last_known()
+            if revision_info is None:
+                revision_info = self._get_revision_info_after_timeout(progress)
+
+            return revision_info
+
+        self._store_last_known(revision_info)
+
+        return revision_info
+
+    async def read_async(self) -> typing.Optional[types.RevisionInfo]:
+        '''
+        Read revision info like calling the reader does without blocking the event loop.
+
+        The repository files are read natively in a thread of the default executor of the
+        loop. The git commands are run as asyncio subprocesses, and the commands that do
+        not depend on each other (such as git describe and the dirty check) are run
+        concurrently.
+        '''
+
+        # Importing asyncio is slow, but it has been imported when a coroutine is run
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self._timeout if self._timeout is not None else None
+        progress = self._create_progress() if deadline is not None else None
+
+        try:
+            revision_info = await self._read_before_async(deadline, progress)
+
+        except subprocess.TimeoutExpired:
+            if deadline is None:
+                raise
+
+            revision_info = await loop.run_in_executor(None, self._read_last_known)
+            if revision_info is None:
+                revision_info = self._get_revision_info_after_timeout(progress)
+
+            return revision_info
+
+        if deadline is not None:
+            await loop.run_in_executor(None, self._store_last_known, revision_info)
+
+        return revision_info
+
+    def _read_before(
+        self,
+        deadline: typing.Optional[float],
+        progress: typing.Optional['_ReadProgress'] = None,
+    ) -> typing.Optional[types.RevisionInfo]:
+        if self._native:
+            try:
+                return _call_before(deadline, lambda: self._read_with_repository(deadline, progress))
+
+            except errors.UnsupportedRepositoryError:
+                pass
+
+        return self._read_with_git(deadline, progress)
+
+    async def _read_before_async(
+        self,
+        deadline: typing.Optional[float],
+        progress: typing.Optional['_ReadProgress'] = None,
+    ) -> typing.Optional[types.RevisionInfo]:
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        if self._native:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    _call_before,
+                    deadline,
+                    lambda: self._read_with_repository(deadline, progress),
+                )
+
+            except errors.UnsupportedRepositoryError:
+                pass
+
+        return await gitcommands.run_steps_async(self._read_with_git_steps(progress), self._path, deadline)
+
+    def _create_progress(self) -> typing.Optional['_ReadProgress']:
+        # Only skipping the dirty check after a timeout needs the revision info read before it
+        if self._timeout_fallback != TIMEOUT_FALLBACK_SKIP_DIRTY or not self._checks_dirty():
             return None
 
-        git_describe = self._run_git(
-            'describe',
-            '--dirty',
-            '--always',
-            '--long',
-            f'--abbrev={self._abbrev}',
+        return _ReadProgress()
+
+    def _read_last_known(self) -> typing.Optional[types.RevisionInfo]:
+        # Revision info last read of the same commit with the same configuration, if any
+        last_known = self._get_last_known()
+        if last_known is None:
+            return None
+
+        last_known_cache, key = last_known
+        revision_info = last_known_cache.get(key)
+        if revision_info is None:
+            return None
+
+        _LOGGER.warning(
+            'Reading revision info of %s took longer than %s seconds; using the revision info last read of the '
+            'same commit',
+            os.path.abspath(self._path or os.curdir),
+            self._timeout,
         )
 
+        return types.RevisionInfo(*revision_info)
+
+    def _store_last_known(self, revision_info: typing.Optional[types.RevisionInfo]) -> None:
+        last_known = self._get_last_known()
+        if last_known is not None and revision_info is not None:
+            last_known_cache, key = last_known
+            last_known_cache.put(key, list(revision_info))
+
+    def _get_last_known(self) -> typing.Optional[typing.Tuple[cache.CacheFile, str]]:
+        try:
+            repository = gitrepository.Repository.discover(self._path)
+            head = repository.resolve(self._revision) if self._revision is not None else repository.head()
+
+        except errors.UnsupportedRepositoryError:
+            return None
+
+        if head is None:
+            return None
+
+        return cache.CacheFile(os.path.join(repository.git_dir, 'vcsver-last')), ' '.join((
+            head,
+            self._get_configuration_signature(repository),
+            f'dirty={self._dirty}',
+            f'dirty_digest={self._dirty_digest}',
+        ))
+
+    def _get_revision_info_after_timeout(self, progress: typing.Optional['_ReadProgress']) -> types.RevisionInfo:
+        # The dirty check still running is dropped; the read is not started again
+        if progress is None or progress.revision_info is None:
+            raise errors.RevisionInfoNotFoundError(f'Reading revision info took longer than {self._timeout} seconds')
+
+        _LOGGER.warning(
+            'Reading revision info of %s took longer than %s seconds; using it without checking whether the '
+            'working tree is dirty',
+            os.path.abspath(self._path or os.curdir),
+            self._timeout,
+        )
+
+        return progress.revision_info
+
+    def _read_with_repository(
+        self,
+        deadline: typing.Optional[float] = None,
+        progress: typing.Optional['_ReadProgress'] = None,
+    ) -> typing.Optional[types.RevisionInfo]:
+        # Raises UnsupportedRepositoryError if the revision info must be read by running git
+        try:
+            repository = gitrepository.Repository.discover(
+                self._path,
+                object_fallback=self._coprocess.read if self._coprocess is not None else None,
+            )
+
+        except errors.RepositoryNotFoundError:
+            # Outside of repositories git would not find revision info either
+            return None
+
+        if not self._single_flight or self._revision is not None:
+            return self._read_native(repository, deadline, progress)
+
+        # Parallel builds in the same checkout share the revision info computed by one of them
+        single_flight = singleflight.SingleFlight(
+            os.path.join(repository.git_dir, 'vcsver.lock'),
+            os.path.join(repository.git_dir, 'vcsver-result'),
+        )
+        revision_info = single_flight.run(
+            ' '.join((
+                str(repository.head()),
+                self._get_configuration_signature(repository),
+                f'dirty={self._dirty}',
+                f'dirty_digest={self._dirty_digest}',
+                repository.tags_signature(),
+                repository.index_signature(),
+            )),
+            lambda: self._read(repository, deadline, progress),
+        )
+
+        return types.RevisionInfo(*revision_info) if revision_info is not None else None
+
+    def _read(
+        self,
+        repository: gitrepository.Repository,
+        deadline: typing.Optional[float] = None,
+        progress: typing.Optional['_ReadProgress'] = None,
+    ) -> typing.Optional[types.RevisionInfo]:
+        try:
+            return self._read_native(repository, deadline, progress)
+
+        except errors.UnsupportedRepositoryError:
+            return self._read_with_git(deadline, progress)
+
+    def _read_native(
+        self,
+        repository: gitrepository.Repository,
+        deadline: typing.Optional[float] = None,
+        progress: typing.Optional['_ReadProgress'] = None,
+    ) -> types.RevisionInfo:
+        if self._revision is not None:
+            head: typing.Optional[str] = repository.resolve(self._revision)
+
+        else:
+            head = repository.head()
+
+        if head is None:
+            return types.RevisionInfo(
+                latest_tag=None,
+                distance=0,
+                commit=None,
+                dirty=True,
+            )
+
+        latest_tag, distance = self._get_latest_tag_and_distance(repository, head)
+        revision_info = types.RevisionInfo(
+            latest_tag=latest_tag,
+            distance=distance,
+            commit=repository.abbreviate(head, self._abbrev),
+            dirty=False,
+        )
+        if progress is not None:
+            progress.revision_info = revision_info
+
+        # The dirty flag is never cached as modifying tracked files does not change the Git directory
+        if not self._checks_dirty() or not self._is_dirty(repository, head, deadline):
+            return revision_info
+
+        return revision_info._replace(
+            dirty=True,
+            dirty_digest=self._get_changes_digest(repository, head, deadline) if self._dirty_digest else None,
+        )
+
+    def _get_latest_tag_and_distance(
+        self,
+        repository: gitrepository.Repository,
+        head: str,
+    ) -> typing.Tuple[typing.Optional[str], int]:
+        path_scope = self._create_path_scope(repository)
+
+        if not self._use_cache:
+            return self._describe(
+                repository,
+                head,
+                tagindex.read_tags(repository, self._tag_matcher, use_index=False),
+                path_scope=path_scope,
+            )
+
+        revision_cache = cache.CacheFile(os.path.join(repository.git_dir, 'vcsver-cache'))
+        # The dirty check does not change the tag and distance of commits
+        signature = f'{self._get_configuration_signature(repository)} {repository.tags_signature()}'
+
+        def get_cache_key(commit: str) -> str:
+            return f'{commit} {signature}'
+
+        cached_value = revision_cache.get(get_cache_key(head))
+        if cached_value is not None:
+            latest_tag, distance = cached_value
+            return latest_tag, distance
+
+        tag_entries = tagindex.read_tags(repository, self._tag_matcher)
+        tags = get_describable_tags(repository, tag_entries=tag_entries)
+
+        # Usually HEAD is just a few commits ahead of a commit whose version has already
+        # been created; if so, extend the distance instead of walking the whole history.
+        cached_ancestor = None
+        if not self._first_parent:
+            cached_ancestor = history.find_cached_ancestor(
+                repository,
+                head,
+                lambda commit: revision_cache.get(get_cache_key(commit)) is not None,
+                tags,
+                limit=_INCREMENTAL_WALK_LIMIT,
+                is_counted=path_scope.changes if path_scope is not None else None,
+            )
+
+        if cached_ancestor is not None:
+            ancestor, new_commit_count = cached_ancestor
+            latest_tag, distance = revision_cache.get(get_cache_key(ancestor))
+            distance += new_commit_count
+
+        else:
+            latest_tag, distance = self._describe(repository, head, tag_entries, tags, path_scope)
+
+        revision_cache.put(get_cache_key(head), [latest_tag, distance])
+
+        return latest_tag, distance
+
+    def _describe(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        repository: gitrepository.Repository,
+        head: str,
+        tag_entries: typing.Dict[str, tagindex.TagEntry],
+        tags: typing.Optional[typing.Dict[str, gitrepository.Ref]] = None,
+        path_scope: typing.Optional[pathscope.PathScope] = None,
+    ) -> typing.Tuple[typing.Optional[str], int]:
+        if self._tag_selection == TAG_SELECTION_HIGHEST_VERSION:
+            return self._describe_with_highest_version(repository, head, tag_entries, path_scope)
+
+        if tags is None:
+            tags = get_describable_tags(repository, tag_entries=tag_entries)
+
+        description = history.describe(
+            repository,
+            head,
+            tags,
+            tag_generations=tagindex.get_generations(tag_entries),
+        )
+        if description is None:
+            return None, self._count_commits_native(repository, head, path_scope)
+
+        tagged_commit, distance = description
+        if path_scope is not None:
+            # The nearest tag is the same, but only the commits changing the path are counted
+            distance = history.count_commits_between(repository, head, tagged_commit, path_scope.changes)
+
+        return self._tag_matcher.strip_prefix(get_tag_name(repository, tags[tagged_commit])), distance
+
+    def _describe_with_highest_version(
+        self,
+        repository: gitrepository.Repository,
+        head: str,
+        tag_entries: typing.Dict[str, tagindex.TagEntry],
+        path_scope: typing.Optional[pathscope.PathScope],
+    ) -> typing.Tuple[typing.Optional[str], int]:
+        # Only the tags with the highest versions are checked for reachability
+        refs = [
+            gitrepository.Ref(name=name, oid=entry.oid, peeled=entry.peeled)
+            for name, entry in sort_tags_by_version(tag_entries, prefix=self._tag_matcher.prefix)
+        ]
+        description = history.find_first_reachable(
+            repository,
+            head,
+            (ref.peeled for ref in refs if ref.peeled),
+            is_counted=path_scope.changes if path_scope is not None else None,
+        )
+        if description is None:
+            return None, self._count_commits_native(repository, head, path_scope)
+
+        tagged_commit, distance = description
+        ref = next(ref for ref in refs if ref.peeled == tagged_commit)
+
+        return self._tag_matcher.strip_prefix(get_tag_name(repository, ref)), distance
+
+    def _count_commits_native(
+        self,
+        repository: gitrepository.Repository,
+        head: str,
+        path_scope: typing.Optional[pathscope.PathScope],
+    ) -> int:
+        is_counted = None
+        if path_scope is not None:
+            is_counted = path_scope.changes_from_first_parent if self._first_parent else path_scope.changes
+
+        return history.count_commits(repository, head, first_parent=self._first_parent, is_counted=is_counted)
+
+    def _get_configuration_signature(self, repository: gitrepository.Repository) -> str:
+        # Arguments that change the latest tag and distance of a commit
+        return ' '.join((
+            f'first_parent={self._first_parent}',
+            self._tag_matcher.get_signature(),
+            f'tag_selection={self._tag_selection}',
+            f'path_scope={self._get_repository_scope_path(repository)}',
+        ))
+
+    def _create_path_scope(self, repository: gitrepository.Repository) -> typing.Optional[pathscope.PathScope]:
+        path = self._get_repository_scope_path(repository)
+
+        return pathscope.PathScope(repository, path) if path is not None else None
+
+    def _get_repository_scope_path(self, repository: gitrepository.Repository) -> typing.Optional[str]:
+        if self._path_scope is None:
+            return None
+
+        if repository.work_tree is None:
+            raise errors.InvalidConfigurationError('Path scope requires a working tree')
+
+        return pathscope.get_repository_path(
+            os.path.join(self._path or os.curdir, self._path_scope),
+            repository.work_tree,
+        )
+
+    def _checks_dirty(self) -> bool:
+        return self._revision is None and self._dirty != DIRTY_SKIP
+
+    def _is_dirty(self, repository: gitrepository.Repository, head: str, deadline: typing.Optional[float]) -> bool:
+        try:
+            return worktree.is_dirty(
+                repository,
+                head,
+                workers=self._dirty_workers,
+                ignore_submodules=self._dirty == DIRTY_IGNORE_SUBMODULES,
+            )
+
+        except errors.UnsupportedRepositoryError:
+            return self._is_dirty_with_git(deadline)
+
+    def _get_changes_digest(
+        self,
+        repository: gitrepository.Repository,
+        head: str,
+        deadline: typing.Optional[float],
+    ) -> typing.Optional[str]:
+        try:
+            return worktree.get_changes_digest(
+                repository,
+                head,
+                workers=self._dirty_workers,
+                ignore_submodules=self._dirty == DIRTY_IGNORE_SUBMODULES,
+            )
+
+        except errors.UnsupportedRepositoryError:
+            return self._get_changes_digest_with_git(deadline)
+
+    def _get_changes_digest_with_git(self, deadline: typing.Optional[float] = None) -> typing.Optional[str]:
+        return gitcommands.run_steps(self._get_changes_digest_steps(), self._path, deadline)
+
+    def _get_changes_digest_steps(self) -> gitcommands.Steps[typing.Optional[str]]:
+        git_diff, git_rev_parse = yield [
+            gitcommands.Command((
+                'diff',
+                '--raw',
+                '-z',
+                '--no-abbrev',
+                '--no-renames',
+                '--no-relative',
+                *_DIRTY_DIFF_ARGS[self._dirty],
+                'HEAD',
+                '--',
+            )),
+            _TOP_LEVEL_PATH_COMMAND,
+        ]
+        top_level_path = _parse_top_level_path(git_rev_parse)
+        if git_diff.returncode != 0 or top_level_path is None:
+            return None
+
+        # The output contains ":<old mode> <new mode> <old id> <new id> <status>" and path for
+        # each change; the new object id is zeros if the file in the working tree is not hashed
+        fields = git_diff.stdout.split(b'\0')
+        changes: typing.List[typing.Tuple[bytes, int, typing.Optional[str]]] = []
+        for metadata, path in zip(fields[0:-1:2], fields[1::2]):
+            _, mode_string, _, oid, _ = metadata.decode().split(' ')
+            mode = int(mode_string, 8)
+            if oid != '0' * len(oid) or mode not in (_MODE_REGULAR, _MODE_EXECUTABLE, _MODE_SYMLINK):
+                changes.append((path, mode, oid))
+
+            elif mode == _MODE_SYMLINK:
+                # git hash-object would hash the file the link points to
+                target = os.readlink(os.path.join(os.fsencode(top_level_path), path))
+                changes.append((path, mode, hashlib.sha1(b'blob %d\0' % len(target) + target).hexdigest()))
+
+            else:
+                changes.append((path, mode, None))
+
+        unhashed_paths = [path for path, _, oid in changes if oid is None]
+        hashed_oids = dict(zip(unhashed_paths, (yield from self._hash_objects_steps([
+            os.path.join(os.fsencode(top_level_path), path)
+            for path in unhashed_paths
+        ]))))
+
+        return worktree.changes_digest(
+            (path, mode, oid if oid is not None else hashed_oids[path])
+            for path, mode, oid in changes
+        )
+
+    def _hash_objects_steps(self, paths: typing.List[bytes]) -> gitcommands.Steps[typing.List[str]]:
+        if not paths:
+            return []
+
+        # Like git add, git hash-object applies the conversions configured with attributes
+        git_hash_object, = yield [gitcommands.Command(
+            ('hash-object', '--stdin-paths'),
+            input=b''.join(path + b'\n' for path in paths),
+        )]
+        git_hash_object.check_returncode()
+
+        return git_hash_object.stdout.decode().split()
+
+    def _is_dirty_with_git(self, deadline: typing.Optional[float] = None) -> bool:
+        return _parse_dirty(gitcommands.run(self._get_dirty_command(), self._path, gitcommands.get_timeout(deadline)))
+
+    def _is_dirty_steps(self) -> gitcommands.Steps[bool]:
+        if self._dirty == DIRTY_FULL:
+            # Like git describe --dirty, compare with the index refreshed (if it can be locked)
+            yield [gitcommands.Command(('update-index', '-q', '--refresh'))]
+            git_diff_index, = yield [gitcommands.Command(('diff-index', '--quiet', 'HEAD', '--'))]
+            return _parse_dirty(git_diff_index)
+
+        git_diff, = yield [self._get_dirty_command()]
+        return _parse_dirty(git_diff)
+
+    def _get_dirty_command(self) -> gitcommands.Command:
+        return gitcommands.Command(('diff', '--quiet', *_DIRTY_DIFF_ARGS[self._dirty], 'HEAD', '--'))
+
+    def _read_with_git(
+        self,
+        deadline: typing.Optional[float] = None,
+        progress: typing.Optional['_ReadProgress'] = None,
+    ) -> typing.Optional[types.RevisionInfo]:
+        return gitcommands.run_steps(self._read_with_git_steps(progress), self._path, deadline)
+
+    def _read_with_git_steps(
+        self,
+        progress: typing.Optional['_ReadProgress'] = None,
+    ) -> gitcommands.Steps[typing.Optional[types.RevisionInfo]]:
+        # Describe fails outside of repositories too, so the repository is detected by
+        # running git rev-parse only when describe fails
+        # With progress, the working tree is checked only after the rest is read
+        check_dirty_last = progress is not None and self._checks_dirty()
+        # Only git describe --dirty checks the working tree the same way as the full mode does
+        describe_dirty = self._checks_dirty() and self._dirty == DIRTY_FULL and not check_dirty_last
+        check_dirty = self._checks_dirty() and not describe_dirty and not check_dirty_last
+        describe_tag_args = yield from self._get_describe_tag_args_steps()
+
+        # The other checks do not depend on describing, so they may be run at the same time
+        git_describe, *other_results = yield [
+            gitcommands.Command((
+                'describe',
+                *(('--dirty',) if describe_dirty else ()),
+                '--always',
+                '--long',
+                f'--abbrev={self._abbrev}',
+                *describe_tag_args,
+                *((self._revision,) if self._revision is not None else ()),
+            )),
+            *((self._get_dirty_command(),) if check_dirty else ()),
+            *((_TOP_LEVEL_PATH_COMMAND,) if self._path_scope is not None else ()),
+        ]
+        git_diff = other_results.pop(0) if check_dirty else None
+        git_rev_parse = other_results.pop(0) if self._path_scope is not None else None
+
         if git_describe.returncode != 0:
+            if git_rev_parse is None:
+                git_rev_parse, = yield [_TOP_LEVEL_PATH_COMMAND]
+
+            if _parse_top_level_path(git_rev_parse) is None:
+                return None
+
+            if self._revision is not None:
+                raise errors.RevisionInfoNotFoundError(f'Unknown revision: {self._revision}')
+
             return types.RevisionInfo(
                 latest_tag=None,
                 distance=0,
@@ -40,24 +681,76 @@ class GitRevisionInfoReader:
 
         revision_data = self._parse_describe_output(describe_output)
 
-        if revision_data.latest_tag is None and revision_data.distance is None:
-            git_log = self._run_git(
-                'log',
-                '--oneline',
-                check=True,
+        if git_rev_parse is not None:
+            revision_data = revision_data._replace(
+                distance=(yield from self._count_changing_commits_steps(revision_data.latest_tag, git_rev_parse)),
             )
 
-            distance = len(git_log.stdout.decode().split('\n')) - 1
+        elif revision_data.latest_tag is None and revision_data.distance is None:
+            revision_data = revision_data._replace(
+                distance=(yield from self._count_commits_steps()),
+            )
+
+        elif revision_data.latest_tag is not None and self._tag_selection == TAG_SELECTION_HIGHEST_VERSION:
+            # The depth of git describe may include commits reachable from the tag with
+            # clock-skewed history, so the commits after the tag are counted like natively
+            revision_data = revision_data._replace(
+                distance=(yield from self._count_commits_steps(revision_data.latest_tag)),
+            )
+
+        if revision_data.latest_tag is not None:
+            revision_data = revision_data._replace(
+                latest_tag=self._tag_matcher.strip_prefix(revision_data.latest_tag),
+            )
+
+        if git_diff is not None:
+            revision_data = revision_data._replace(
+                dirty=_parse_dirty(git_diff),
+            )
 
-            revision_data = types.RevisionInfo(
-                latest_tag=revision_data.latest_tag,
-                distance=distance,
-                commit=revision_data.commit,
-                dirty=revision_data.dirty,
+        if check_dirty_last:
+            assert progress is not None
+            progress.revision_info = revision_data
+            revision_data = revision_data._replace(
+                dirty=(yield from self._is_dirty_steps()),
+            )
+
+        if revision_data.dirty and self._dirty_digest:
+            revision_data = revision_data._replace(
+                dirty_digest=(yield from self._get_changes_digest_steps()),
             )
 
         return revision_data
 
+    def _get_describe_tag_args_steps(self) -> gitcommands.Steps[typing.Tuple[str, ...]]:
+        if self._tag_selection != TAG_SELECTION_HIGHEST_VERSION:
+            return self._tag_matcher.get_git_args()
+
+        # With only one tag to match, git describe finds it; the distance is counted separately
+        git_for_each_ref, = yield [gitcommands.Command((
+            'for-each-ref',
+            f'--merged={self._revision if self._revision is not None else "HEAD"}',
+            '--format=%(objecttype) %(refname)',
+            'refs/tags/',
+        ))]
+        if git_for_each_ref.returncode != 0:
+            return self._tag_matcher.get_git_args()
+
+        tag_names = [
+            line.split(' ', 1)[1][len('refs/tags/'):]
+            for line in git_for_each_ref.stdout.decode().splitlines()
+            if line.startswith('tag ')
+        ]
+        tag_versions = sorted_by_version(
+            self._tag_matcher.strip_prefix(name)
+            for name in tag_names
+            if self._tag_matcher(name)
+        )
+        if not tag_versions:
+            return ('--exclude', '*')
+
+        return ('--match', tagmatch.escape(self._tag_matcher.prefix + tag_versions[0]))
+
     def _parse_describe_output(self, describe_output: str) -> types.RevisionInfo:
         match = re.match(
             r'^'
@@ -86,27 +779,219 @@ class GitRevisionInfoReader:
             dirty=dirty,
         )
 
-    def _get_top_level_path(self) -> typing.Optional[str]:
-        result = self._run_git(
-            'rev-parse',
-            '--show-toplevel',
-        )
-
-        if result.returncode != 0:
-            return None
+    def _count_commits_steps(self, latest_tag: typing.Optional[str] = None) -> gitcommands.Steps[int]:
+        # git counts the commits so the history is never transferred to (or stored in) this process
+        first_parent_args = ('--first-parent',) if self._first_parent and latest_tag is None else ()
+        git_rev_list, = yield [gitcommands.Command((
+            'rev-list',
+            '--count',
+            *first_parent_args,
+            self._revision if self._revision is not None else 'HEAD',
+            *((f'^refs/tags/{latest_tag}',) if latest_tag is not None else ()),
+        ))]
+        git_rev_list.check_returncode()
 
-        return result.stdout.decode().strip()
+        return int(git_rev_list.stdout)
 
-    def _run_git(
+    def _count_changing_commits_steps(
         self,
-        *args: typing.Any,
-        **run_args: typing.Any,
-    ) -> subprocess.CompletedProcess:
-        run_args.setdefault('stdout', subprocess.PIPE)
-        run_args.setdefault('stderr', subprocess.PIPE)
-
-        return subprocess.run(  # pylint: disable=subprocess-run-check
-            ('git',) + args,
-            cwd=self._path,
-            **run_args
-        )
+        latest_tag: typing.Optional[str],
+        git_rev_parse: subprocess.CompletedProcess,
+    ) -> gitcommands.Steps[int]:
+        assert self._path_scope is not None
+        top_level_path = _parse_top_level_path(git_rev_parse)
+        if top_level_path is None:
+            raise errors.InvalidConfigurationError('Path scope requires a working tree')
+
+        path = pathscope.get_repository_path(os.path.join(self._path or os.curdir, self._path_scope), top_level_path)
+        revision = self._revision if self._revision is not None else 'HEAD'
+        first_parent = self._first_parent and latest_tag is None
+
+        # Without history simplification git lists the commits differing from any parent
+        git_rev_list, = yield [gitcommands.Command((
+            'rev-list',
+            '--full-history',
+            *(('--first-parent',) if first_parent else ()),
+            revision,
+            *((f'^refs/tags/{latest_tag}',) if latest_tag is not None else ()),
+            '--',
+            f':(top){path}',
+        ))]
+        git_rev_list.check_returncode()
+
+        commits = git_rev_list.stdout.decode().split()
+        if first_parent or not commits:
+            return len(commits)
+
+        return len(commits) - (yield from self._count_unchanged_merges_steps(commits, path))
+
+    def _count_unchanged_merges_steps(self, commits: typing.List[str], path: str) -> gitcommands.Steps[int]:
+        # Merge commits are counted only if they differ from all of the parents
+        git_merges, = yield [gitcommands.Command(
+            ('rev-list', '--stdin', '--no-walk=unsorted', '--parents', '--min-parents=2'),
+            input=''.join(f'{commit}\n' for commit in commits).encode(),
+        )]
+        git_merges.check_returncode()
+        merges = [line.split() for line in git_merges.stdout.decode().splitlines()]
+        if not merges:
+            return 0
+
+        objects = [f'{commit}:{path}' for merge in merges for commit in merge]
+        git_cat_file, = yield [gitcommands.Command(
+            ('cat-file', '--batch-check=%(objecttype) %(objectname)'),
+            input=''.join(f'{name}\n' for name in objects).encode(),
+        )]
+        git_cat_file.check_returncode()
+        entries = [
+            None if line.endswith(' missing') else line
+            for line in git_cat_file.stdout.decode().splitlines()
+        ]
+
+        unchanged_merge_count = 0
+        position = 0
+        for merge in merges:
+            entry, *parent_entries = entries[position:position + len(merge)]
+            position += len(merge)
+            if entry in parent_entries:
+                unchanged_merge_count += 1
+
+        return unchanged_merge_count
+
+
+class _ReadProgress:
+    '''
+    Revision info read before checking whether the working tree is dirty.
+    '''
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        # Set (with dirty False) when only the dirty check is left
+        self.revision_info: typing.Optional[types.RevisionInfo] = None
+
+
+def _call_before(deadline: typing.Optional[float], function: typing.Callable[[], _T]) -> _T:
+    # Reading files can not be interrupted, so with a deadline the function is called in a
+    # daemon thread that is left running if the deadline passes
+    if deadline is None:
+        return function()
+
+    results: 'queue.Queue[typing.Tuple[typing.Optional[_T], typing.Optional[BaseException]]]' = queue.Queue()
+
+    def call() -> None:
+        try:
+            results.put((function(), None))
+
+        except BaseException as exception:  # pylint: disable=broad-except
+            results.put((None, exception))
+
+    threading.Thread(target=call, daemon=True).start()
+    timeout = max(deadline - time.monotonic(), 0)
+
+    try:
+        result, exception = results.get(timeout=timeout)
+
+    except queue.Empty:
+        raise subprocess.TimeoutExpired('vcsver', timeout) from None
+
+    if exception is not None:
+        raise exception
+
+    return typing.cast(_T, result)
+
+
+def _parse_top_level_path(git_rev_parse: subprocess.CompletedProcess) -> typing.Optional[str]:
+    if git_rev_parse.returncode != 0:
+        return None
+
+    return git_rev_parse.stdout.decode().strip()
+
+
+def _parse_dirty(git_diff: subprocess.CompletedProcess) -> bool:
+    if git_diff.returncode not in (0, 1):
+        raise errors.UnsupportedRepositoryError('Could not check whether working tree is dirty')
+
+    return git_diff.returncode == 1
+
+
+def get_describable_tags(
+    repository: gitrepository.Repository,
+    tag_matcher: typing.Optional[tagmatch.TagMatcher] = None,
+    tag_entries: typing.Optional[typing.Mapping[str, tagindex.TagEntry]] = None,
+) -> typing.Dict[str, gitrepository.Ref]:
+    '''
+    Return annotated tags (matching tag_matcher if given) by the commit they point to.
+
+    The tags are read from tag_entries (see tagindex.read_tags) if given.
+
+    If there are several annotated tags pointing to the same commit, the one with the
+    latest tagger date is used like git describe does.
+    '''
+
+    if tag_entries is None:
+        tag_entries = tagindex.read_tags(repository, tag_matcher, use_index=False)
+
+    tags: typing.Dict[str, gitrepository.Ref] = {}
+    tag_timestamps: typing.Dict[str, int] = {}
+
+    for name, entry in tag_entries.items():
+        if entry.peeled is None:
+            continue
+
+        ref = gitrepository.Ref(name=name, oid=entry.oid, peeled=entry.peeled)
+        existing = tags.get(entry.peeled)
+        if existing is not None:
+            if existing.oid not in tag_timestamps:
+                tag_timestamps[existing.oid] = repository.tag(existing.oid).timestamp
+
+            if repository.tag(ref.oid).timestamp <= tag_timestamps[existing.oid]:
+                continue
+
+        tags[entry.peeled] = ref
+
+    return tags
+
+
+def sort_tags_by_version(
+    tag_entries: typing.Mapping[str, tagindex.TagEntry],
+    prefix: str = '',
+) -> typing.List[typing.Tuple[str, tagindex.TagEntry]]:
+    '''
+    Return (ref name, entry) of the annotated tags of commits whose names (without prefix)
+    are PEP 440 versions, the highest version first.
+    '''
+
+    tag_prefix = f'refs/tags/{prefix}'
+    names = sorted_by_version(
+        name[len(tag_prefix):]
+        for name, entry in tag_entries.items()
+        if entry.peeled is not None and name.startswith(tag_prefix)
+    )
+
+    return [(f'{tag_prefix}{name}', tag_entries[f'{tag_prefix}{name}']) for name in names]
+
+
+def sorted_by_version(tag_names: typing.Iterable[str]) -> typing.List[str]:
+    '''
+    Return the tag names that are PEP 440 versions, the highest version first (and tags of
+    the same version in name order).
+    '''
+
+    keyed_names = []
+    for name in sorted(tag_names):
+        key = pep440.get_version_key(name)
+        if key is not None:
+            keyed_names.append((key, name))
+
+    # The sort is stable also in reverse order
+    keyed_names.sort(key=lambda keyed_name: keyed_name[0], reverse=True)
+
+    return [name for _, name in keyed_names]
+
+
+def get_tag_name(repository: gitrepository.Repository, ref: gitrepository.Ref) -> str:
+    '''
+    Return the name git describe shows for the annotated tag.
+    '''
+
+    return repository.tag(ref.oid).name or ref.name[len('refs/tags/'):]
@@ -0,0 +1,127 @@
+# This module contains running the git commands of the Git reader, either one after another
+# or concurrently with asyncio.
+#
+# The reading logic is written once as generators (steps) that yield lists of git commands
+# not depending on each other and are sent back the results of the commands in the same
+# order. run_steps runs the commands one at a time; run_steps_async runs each list as
+# concurrent asyncio subprocesses without blocking the event loop.
+#
+# With a deadline (a time.monotonic() value), git processes still running at the deadline
+# are killed and subprocess.TimeoutExpired raised.
+
+import subprocess
+import time
+import typing
+
+
+_T = typing.TypeVar('_T')
+
+
+class Command(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    # Arguments of git
+    args: typing.Tuple[str, ...]
+    # Written to standard input of git
+    input: typing.Optional[bytes] = None
+
+
+Steps = typing.Generator[typing.List[Command], typing.List[subprocess.CompletedProcess], _T]
+
+
+def run_steps(steps: Steps[_T], path: typing.Optional[str] = None, deadline: typing.Optional[float] = None) -> _T:
+    '''
+    Run the commands of the steps in path one after another and return the result of the steps.
+    '''
+
+    try:
+        commands = next(steps)
+        while True:
+            commands = steps.send([run(command, path, get_timeout(deadline)) for command in commands])
+
+    except StopIteration as stop:
+        return typing.cast(_T, stop.value)
+
+
+async def run_steps_async(
+    steps: Steps[_T],
+    path: typing.Optional[str] = None,
+    deadline: typing.Optional[float] = None,
+) -> _T:
+    '''
+    Run the commands of the steps in path, each list of commands concurrently, and return
+    the result of the steps.
+    '''
+
+    # Importing asyncio is slow, but it has been imported when a coroutine is run
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    try:
+        commands = next(steps)
+        while True:
+            timeout = get_timeout(deadline)
+            commands = steps.send(list(await asyncio.gather(*(
+                run_async(command, path, timeout)
+                for command in commands
+            ))))
+
+    except StopIteration as stop:
+        return typing.cast(_T, stop.value)
+
+
+def run(
+    command: Command,
+    path: typing.Optional[str] = None,
+    timeout: typing.Optional[float] = None,
+) -> subprocess.CompletedProcess:
+    # The process is killed if it does not exit within timeout seconds
+    return subprocess.run(  # pylint: disable=subprocess-run-check
+        ('git',) + command.args,
+        cwd=path,
+        input=command.input,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=timeout,
+    )
+
+
+async def run_async(
+    command: Command,
+    path: typing.Optional[str] = None,
+    timeout: typing.Optional[float] = None,
+) -> subprocess.CompletedProcess:
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    process = await asyncio.create_subprocess_exec(
+        'git',
+        *command.args,
+        cwd=path,
+        stdin=subprocess.PIPE if command.input is not None else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(command.input), timeout)
+
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise subprocess.TimeoutExpired(('git',) + command.args, typing.cast(float, timeout)) from None
+
+    return subprocess.CompletedProcess(('git',) + command.args, typing.cast(int, process.returncode), stdout, stderr)
+
+
+def get_timeout(deadline: typing.Optional[float]) -> typing.Optional[float]:
+    '''
+    Return seconds left until deadline (None if there is no deadline).
+
+    Raises subprocess.TimeoutExpired if the deadline has passed.
+    '''
+
+    if deadline is None:
+        return None
+
+    timeout = deadline - time.monotonic()
+    if timeout <= 0:
+        raise subprocess.TimeoutExpired('git', 0)
+
+    return timeout
@@ -0,0 +1,64 @@
+# This module contains reader for the subset of git-config syntax used in Git configuration files.
+
+import typing
+
+from . import errors
+
+
+def read_config(path: str) -> typing.Dict[str, str]:
+    '''
+    Read the subset of git-config syntax used in repository configuration files.
+
+    Keys are returned as lowercase section.name (or section.subsection.name) strings.
+    '''
+
+    config: typing.Dict[str, str] = {}
+
+    try:
+        with open(path, 'rt', encoding='utf-8') as config_file:
+            lines = config_file.read().splitlines()
+
+    except FileNotFoundError:
+        return config
+
+    section = ''
+    for line in lines:
+        line = _strip_config_comment(line).strip()
+        if not line:
+            continue
+
+        if line.startswith('['):
+            header, _, line = line[1:].partition(']')
+            name, _, subsection = header.partition(' ')
+            section = name.lower()
+            if subsection:
+                section = f'{section}.{subsection.strip().strip(chr(34))}'
+
+            line = line.strip()
+            if not line:
+                continue
+
+        key, separator, value = line.partition('=')
+        key = f'{section}.{key.strip().lower()}'
+        if key.startswith(('include.', 'includeif.')):
+            raise errors.UnsupportedRepositoryError('Config includes are not supported')
+
+        config[key] = value.strip().strip('"') if separator else 'true'
+
+    return config
+
+
+def is_true(value: str) -> bool:
+    return value.lower() in ('true', 'yes', 'on', '1')
+
+
+def _strip_config_comment(line: str) -> str:
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+
+        elif char in '#;' and not in_quotes:
+            return line[:index]
+
+    return line
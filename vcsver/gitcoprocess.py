@@ -0,0 +1,277 @@
+# This module contains long-lived git processes used for reading objects the native Git
+# reader can not read (e.g. from promisor remotes) and for listing commits.
+
+import collections
+import queue
+import subprocess
+import tempfile
+import threading
+import typing
+
+
+class GitCoprocess:
+    '''
+    Long-lived git processes for reading many objects and commit lists.
+
+    Objects are read with git cat-file --batch (contents) and --batch-check (types), started
+    when first needed. Requests are written to the process by a separate thread while the
+    replies are read, so many objects are read without waiting for each reply in turn. All
+    the replies to a request are read before the first one is returned, so more objects may
+    be read while iterating them. A process that has exited is restarted once per request,
+    and a process that does not reply within timeout seconds is killed and
+    subprocess.TimeoutExpired raised. Unexpected replies raise OSError.
+
+    Use as a context manager or call close() to stop the processes.
+    '''
+
+    def __init__(self, path: typing.Optional[str] = None, timeout: float = 30.0) -> None:
+        super().__init__()
+
+        self._path: typing.Optional[str] = path
+        self._timeout: float = timeout
+        self._batch: _CatFileProcess = _CatFileProcess(('git', 'cat-file', '--batch'), path, timeout)
+        self._batch_check: _CatFileProcess = _CatFileProcess(('git', 'cat-file', '--batch-check'), path, timeout)
+
+    def __enter__(self) -> 'GitCoprocess':
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
+
+    def read(self, oid: str) -> typing.Optional[typing.Tuple[str, bytes]]:
+        '''
+        Return type and content of the object or None if it does not exist.
+        '''
+
+        ((_, git_object),) = self.read_many((oid,))
+        return git_object
+
+    def read_many(
+        self,
+        oids: typing.Iterable[str],
+    ) -> typing.Iterator[typing.Tuple[str, typing.Optional[typing.Tuple[str, bytes]]]]:
+        '''
+        Iterate (requested name, (type, content) or None) of the objects in the requested order.
+        '''
+
+        for name, object_type, content in self._batch.request(oids):
+            if object_type is None or content is None:
+                yield name, None
+
+            else:
+                yield name, (object_type, content)
+
+    def read_type(self, oid: str) -> typing.Optional[str]:
+        ((_, object_type),) = self.read_types((oid,))
+        return object_type
+
+    def read_types(self, oids: typing.Iterable[str]) -> typing.Iterator[typing.Tuple[str, typing.Optional[str]]]:
+        for name, object_type, _ in self._batch_check.request(oids):
+            yield name, object_type
+
+    def iter_rev_list(self, *args: str) -> typing.Iterator[str]:
+        '''
+        Iterate output lines of git rev-list as soon as git writes them.
+
+        Closing the iterator before the end stops git.
+        '''
+
+        # Standard error is not read while streaming, so a pipe could fill up and block git
+        with tempfile.TemporaryFile() as stderr_file, subprocess.Popen(
+            ('git', 'rev-list') + args,
+            cwd=self._path,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+        ) as process:
+            assert process.stdout is not None
+            try:
+                for line in process.stdout:
+                    yield line.decode().rstrip('\n')
+
+            finally:
+                if process.poll() is None:
+                    process.kill()
+
+            process.wait(timeout=self._timeout)
+
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                raise subprocess.CalledProcessError(process.returncode, process.args, stderr=stderr_file.read())
+
+    def close(self) -> None:
+        self._batch.close()
+        self._batch_check.close()
+
+
+# Reply of git cat-file: (requested name, type, content); type is None for missing objects
+_CatFileReply = typing.Tuple[str, typing.Optional[str], typing.Optional[bytes]]
+
+# Parsed reply read from the process: (type, content), OSError for an unexpected reply, or
+# None when the process has exited
+_ProcessReply = typing.Union[typing.Tuple[typing.Optional[str], typing.Optional[bytes]], OSError, None]
+
+# Last field of the replies to names that are not (unambiguously) objects; names may contain spaces
+_MISSING_REPLIES = (b'missing', b'ambiguous')
+
+
+class _CatFileProcess:  # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        args: typing.Sequence[str],
+        path: typing.Optional[str],
+        timeout: float,
+    ) -> None:
+        super().__init__()
+
+        self._args: typing.Sequence[str] = args
+        self._with_content: bool = '--batch' in args
+        self._path: typing.Optional[str] = path
+        self._timeout: float = timeout
+        self._lock: threading.Lock = threading.Lock()
+        self._process: typing.Optional[subprocess.Popen] = None
+        self._reader: typing.Optional[threading.Thread] = None
+        self._replies: 'queue.Queue[_ProcessReply]' = queue.Queue()
+
+    def request(self, names: typing.Iterable[str]) -> typing.List[_CatFileReply]:
+        # The lock is not held while the caller handles the replies, so it may request more
+        pending = collections.deque(names)
+        replies: typing.List[_CatFileReply] = []
+        if not pending:
+            return replies
+
+        with self._lock:
+            restarted = False
+            completed = False
+            try:
+                while pending:
+                    if self._process is None:
+                        self._start()
+
+                    writer = threading.Thread(target=self._write, args=(list(pending),), daemon=True)
+                    writer.start()
+
+                    while pending:
+                        reply = self._get_reply()
+                        if reply is None:
+                            # The process has exited; restart it for the requests not yet replied
+                            self._stop()
+                            if restarted:
+                                raise OSError(f'{" ".join(self._args)} exited unexpectedly')
+
+                            restarted = True
+                            break
+
+                        if isinstance(reply, OSError):
+                            raise reply
+
+                        object_type, content = reply
+                        replies.append((pending.popleft(), object_type, content))
+
+                completed = True
+
+            finally:
+                if not completed:
+                    # Replies to the abandoned requests would be read by the next request
+                    self._stop()
+
+        return replies
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+    def _start(self) -> None:
+        self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+            self._args,
+            cwd=self._path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._replies = queue.Queue()
+        self._reader = threading.Thread(target=self._read, args=(self._process, self._replies), daemon=True)
+        self._reader.start()
+
+    def _stop(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+
+        assert process.stdin is not None
+        try:
+            # cat-file exits when its input is closed
+            process.stdin.close()
+            process.wait(timeout=self._timeout)
+
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+        # The reader closes the output of the process when it has read it to the end
+        reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.join(self._timeout)
+
+    def _get_reply(self) -> _ProcessReply:
+        try:
+            return self._replies.get(timeout=self._timeout)
+
+        except queue.Empty:
+            assert self._process is not None
+            self._process.kill()
+            self._stop()
+            raise subprocess.TimeoutExpired(self._args, self._timeout)  # pylint: disable=raise-missing-from
+
+    def _write(self, names: typing.List[str]) -> None:
+        process = self._process
+        assert process is not None and process.stdin is not None
+        try:
+            for name in names:
+                process.stdin.write(f'{name}\n'.encode())
+
+            process.stdin.flush()
+
+        except (OSError, ValueError):
+            # The reader notices that the process has exited
+            pass
+
+    def _read(self, process: subprocess.Popen, replies: 'queue.Queue[_ProcessReply]') -> None:
+        stdout = process.stdout
+        assert stdout is not None
+        try:
+            while True:
+                header = stdout.readline()
+                if not header.endswith(b'\n'):
+                    break
+
+                header = header[:-1]
+                if header.rsplit(b' ', 1)[-1] in _MISSING_REPLIES:
+                    # <name> missing or <name> ambiguous
+                    replies.put((None, None))
+                    continue
+
+                # <oid> <type> <size>
+                fields = header.split(b' ')
+                if len(fields) != 3 or not fields[2].isdigit():
+                    replies.put(OSError(f'{" ".join(self._args)} replied unexpectedly: {header!r}'))
+                    break
+
+                content = None
+                if self._with_content:
+                    size = int(fields[2])
+                    content = stdout.read(size + 1)
+                    if len(content) != size + 1:
+                        break
+
+                    content = content[:-1]
+
+                replies.put((fields[1].decode(), content))
+
+        except (OSError, ValueError):
+            pass
+
+        finally:
+            stdout.close()
+
+        replies.put(None)
@@ -0,0 +1,203 @@
+# This module contains native (subprocess free) discovery of Git repositories.
+#
+# The repository is found the same way as git finds it: GIT_DIR and GIT_WORK_TREE are
+# used if set, otherwise the parent directories are searched for .git directories and
+# .git files (used by linked worktrees and submodules) up to GIT_CEILING_DIRECTORIES
+# and the file system boundary.
+
+import os
+import stat
+import typing
+
+from . import errors
+from . import gitconfig
+
+
+# Environment variables affecting where the repository is found
+_ENVIRONMENT_VARIABLES = (
+    'GIT_DIR',
+    'GIT_WORK_TREE',
+    'GIT_CEILING_DIRECTORIES',
+    'GIT_DISCOVERY_ACROSS_FILESYSTEM',
+)
+
+_GIT_FILE_PREFIX = 'gitdir: '
+
+_CacheKey = typing.Tuple[typing.Optional[str], ...]
+
+
+class Location(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    git_dir: str
+    # Directory of the objects, refs and configuration shared by linked worktrees
+    common_dir: str
+    # None if the repository is bare
+    work_tree: typing.Optional[str]
+
+
+# Locations found by find_repository keyed on the path and the environment
+_locations: typing.Dict[_CacheKey, typing.Optional[Location]] = {}
+
+
+def find_repository(path: typing.Optional[str] = None) -> typing.Optional[Location]:
+    '''
+    Return location of the repository containing path (or the current working directory)
+    or None if path is not inside a repository.
+
+    The results are cached per path and environment; call clear_cache if
+    repositories are created or removed.
+
+    Raises UnsupportedRepositoryError if git would refuse to use the repository found.
+    '''
+
+    path = os.path.realpath(path or os.getcwd())
+    cache_key = (path, *(os.environ.get(variable) for variable in _ENVIRONMENT_VARIABLES))
+    if cache_key not in _locations:
+        _locations[cache_key] = _find_repository(path)
+
+    return _locations[cache_key]
+
+
+def clear_cache() -> None:
+    _locations.clear()
+
+
+def _find_repository(path: str) -> typing.Optional[Location]:
+    if 'GIT_DIR' in os.environ:
+        return _find_repository_from_environment(path)
+
+    ceiling_directories = _read_ceiling_directories()
+    across_filesystems = gitconfig.is_true(os.environ.get('GIT_DISCOVERY_ACROSS_FILESYSTEM', 'false'))
+    device = _get_device(path)
+
+    directory = path
+    while True:
+        dot_git = os.path.join(directory, '.git')
+        dot_git_mode = _stat_mode(dot_git)
+        if stat.S_ISREG(dot_git_mode):
+            return _get_location(_read_git_file(dot_git), path, default_work_tree=directory)
+
+        if stat.S_ISDIR(dot_git_mode) and _is_git_directory(dot_git):
+            return _get_location(dot_git, path, default_work_tree=directory)
+
+        if _is_git_directory(directory):
+            # Bare repository or inside a Git directory
+            return _get_location(directory, path, default_work_tree=None)
+
+        parent = os.path.dirname(directory)
+        if parent == directory or parent in ceiling_directories:
+            return None
+
+        if not across_filesystems and device is not None and _get_device(parent) not in (device, None):
+            return None
+
+        directory = parent
+
+
+def _find_repository_from_environment(path: str) -> typing.Optional[Location]:
+    # Relative paths in the environment are relative to path as git is run there
+    git_dir = os.path.join(path, os.environ['GIT_DIR'])
+    if os.path.isfile(git_dir):
+        git_dir = _read_git_file(git_dir)
+
+    if not _is_git_directory(git_dir):
+        return None
+
+    return _get_location(os.path.realpath(git_dir), path, default_work_tree=path)
+
+
+def _get_location(git_dir: str, path: str, default_work_tree: typing.Optional[str]) -> Location:
+    common_dir = _get_common_dir(git_dir)
+    config = gitconfig.read_config(os.path.join(common_dir, 'config'))
+
+    if 'GIT_WORK_TREE' in os.environ:
+        work_tree: typing.Optional[str] = os.path.join(path, os.environ['GIT_WORK_TREE'])
+
+    elif 'core.worktree' in config:
+        # Submodules in older layouts point to their working tree from the Git directory
+        work_tree = os.path.join(git_dir, config['core.worktree'])
+
+    elif gitconfig.is_true(config.get('core.bare', 'false')):
+        work_tree = None
+
+    else:
+        work_tree = default_work_tree
+
+    return Location(
+        git_dir=git_dir,
+        common_dir=common_dir,
+        work_tree=os.path.realpath(work_tree) if work_tree is not None else None,
+    )
+
+
+def _read_git_file(path: str) -> str:
+    try:
+        with open(path, 'rt', encoding='utf-8') as git_file:
+            content = git_file.read().strip()
+
+    except (OSError, UnicodeDecodeError) as exception:
+        raise errors.UnsupportedRepositoryError(f'Could not read {path}: {exception}') from exception
+
+    if not content.startswith(_GIT_FILE_PREFIX):
+        raise errors.UnsupportedRepositoryError(f'Invalid gitfile format: {path}')
+
+    # Relative paths are relative to the directory of the .git file
+    git_dir = os.path.join(os.path.dirname(path), content[len(_GIT_FILE_PREFIX):])
+    if not _is_git_directory(git_dir):
+        raise errors.UnsupportedRepositoryError(f'Not a git repository: {git_dir}')
+
+    return os.path.realpath(git_dir)
+
+
+def _get_common_dir(git_dir: str) -> str:
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'rt', encoding='utf-8') as common_dir_file:
+            return os.path.realpath(os.path.join(git_dir, common_dir_file.read().strip()))
+
+    except FileNotFoundError:
+        return git_dir
+
+
+def _is_git_directory(path: str) -> bool:
+    # Like git, require HEAD, objects and refs
+    if not os.path.isfile(os.path.join(path, 'HEAD')):
+        return False
+
+    common_dir = _get_common_dir(path)
+
+    return all(
+        os.path.isdir(os.path.join(common_dir, directory))
+        for directory in ('objects', 'refs')
+    )
+
+
+def _read_ceiling_directories() -> typing.Set[str]:
+    ceiling_directories = set()
+
+    # Directories after an empty entry are used as they are, without resolving symlinks
+    resolve_symlinks = True
+    for directory in os.environ.get('GIT_CEILING_DIRECTORIES', '').split(os.pathsep):
+        if not directory:
+            resolve_symlinks = False
+
+        elif os.path.isabs(directory):
+            ceiling_directories.add(os.path.realpath(directory) if resolve_symlinks else os.path.normpath(directory))
+
+    return ceiling_directories
+
+
+def _get_device(path: str) -> typing.Optional[int]:
+    try:
+        stat_result = os.stat(path)
+
+    except OSError:
+        return None
+
+    return stat_result.st_dev if stat.S_ISDIR(stat_result.st_mode) else None
+
+
+def _stat_mode(path: str) -> int:
+    try:
+        return os.stat(path).st_mode
+
+    except OSError:
+        return 0
@@ -0,0 +1,314 @@
+# This module contains read-only parser for the Git index file (.git/index).
+#
+# Index versions 2, 3 and 4 are supported, as well as split index (the index is stored
+# in two files) and the cache tree extension. The index is never written or locked.
+
+import mmap
+import os
+import struct
+import typing
+
+from . import errors
+
+
+_SIGNATURE = b'DIRC'
+
+_ENTRY_STAT = struct.Struct('>10I20sH')
+_EXTENDED_FLAGS = struct.Struct('>H')
+
+_FLAG_ASSUME_VALID = 0x8000
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE_MASK = 0x3000
+_FLAG_NAME_MASK = 0x0fff
+
+_EXTENDED_FLAG_INTENT_TO_ADD = 0x2000
+_EXTENDED_FLAG_SKIP_WORKTREE = 0x4000
+
+_EXTENSION_CACHE_TREE = b'TREE'
+_EXTENSION_LINK = b'link'
+_EXTENSION_SPARSE_DIRECTORIES = b'sdir'
+
+_CHECKSUM_LENGTH = 20
+
+
+class IndexEntry(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    path: bytes
+    mode: int
+    oid: str
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    ino: int
+    uid: int
+    gid: int
+    stage: int
+    assume_valid: bool
+    skip_worktree: bool
+    intent_to_add: bool
+
+
+class Index:
+    '''
+    Content of an index file.
+
+    The entries are in path order. cache_tree contains tree ids of the directories (with
+    b'' being the root directory) whose cache tree is valid.
+    '''
+
+    def __init__(
+        self,
+        entries: typing.List[IndexEntry],
+        cache_tree: typing.Dict[bytes, str],
+        mtime_ns: int,
+    ) -> None:
+        super().__init__()
+
+        self.entries: typing.List[IndexEntry] = entries
+        self.cache_tree: typing.Dict[bytes, str] = cache_tree
+        # Modification time of the index file; entries modified at the same time or later are racy
+        self.mtime_ns: int = mtime_ns
+
+
+def read_index(path: str) -> typing.Optional[Index]:
+    '''
+    Read the index file or return None if there is no index file.
+    '''
+
+    try:
+        with open(path, 'rb') as index_file:
+            mtime_ns = os.fstat(index_file.fileno()).st_mtime_ns
+            with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                entries, cache_tree, shared_index = _parse_index(data, path)
+
+    except FileNotFoundError:
+        return None
+
+    except (ValueError, IndexError, struct.error) as exception:
+        raise errors.UnsupportedRepositoryError(f'Invalid index file {path}: {exception}') from exception
+
+    if shared_index is not None:
+        shared_oid, deleted, replaced = shared_index
+        shared_path = os.path.join(os.path.dirname(path), f'sharedindex.{shared_oid}')
+        base = read_index(shared_path)
+        if base is None:
+            raise errors.UnsupportedRepositoryError(f'Shared index file not found: {shared_path}')
+
+        entries = _merge_split_index(base.entries, entries, deleted, replaced)
+
+    return Index(entries, cache_tree, mtime_ns)
+
+
+def _parse_index(
+    data: mmap.mmap,
+    path: str,
+) -> typing.Tuple[
+    typing.List[IndexEntry],
+    typing.Dict[bytes, str],
+    typing.Optional[typing.Tuple[str, typing.List[int], typing.List[int]]],
+]:
+    signature, version, entry_count = struct.unpack_from('>4sII', data, 0)
+    if signature != _SIGNATURE or version not in (2, 3, 4):
+        raise errors.UnsupportedRepositoryError(f'Unsupported index file {path}')
+
+    entries = []
+    offset = 12
+    previous_path = b''
+    for _ in range(entry_count):
+        entry, offset = _parse_entry(data, offset, version, previous_path)
+        entries.append(entry)
+        previous_path = entry.path
+
+    cache_tree: typing.Dict[bytes, str] = {}
+    shared_index = None
+
+    extensions_end = len(data) - _CHECKSUM_LENGTH
+    while offset < extensions_end:
+        extension, size = struct.unpack_from('>4sI', data, offset)
+        offset += 8
+        extension_data = data[offset:offset + size]
+        offset += size
+
+        if extension == _EXTENSION_CACHE_TREE:
+            cache_tree = _parse_cache_tree(extension_data)
+
+        elif extension == _EXTENSION_LINK:
+            shared_index = _parse_link(extension_data)
+
+        elif extension == _EXTENSION_SPARSE_DIRECTORIES or not b'A' <= extension[:1] <= b'Z':
+            # Extensions whose name does not start with an uppercase letter must be understood
+            raise errors.UnsupportedRepositoryError(f'Unsupported index extension {extension!r}')
+
+        # Other extensions (e.g. untracked cache, resolve undo and fsmonitor) are optional
+        # and do not affect the content of the index
+
+    return entries, cache_tree, shared_index
+
+
+def _parse_entry(  # pylint: disable=too-many-locals
+    data: mmap.mmap,
+    offset: int,
+    version: int,
+    previous_path: bytes,
+) -> typing.Tuple[IndexEntry, int]:
+    (
+        ctime_s, ctime_ns, mtime_s, mtime_ns, _, ino, mode, uid, gid, size, oid, flags,
+    ) = _ENTRY_STAT.unpack_from(data, offset)
+
+    entry_start = offset
+    offset += _ENTRY_STAT.size
+
+    extended_flags = 0
+    if flags & _FLAG_EXTENDED:
+        if version < 3:
+            raise errors.UnsupportedRepositoryError('Extended flags in index version 2')
+
+        extended_flags = _EXTENDED_FLAGS.unpack_from(data, offset)[0]
+        offset += _EXTENDED_FLAGS.size
+
+    if version == 4:
+        strip_length, offset = read_offset_varint(data, offset)
+        name_end = data.find(b'\0', offset)
+        path = previous_path[:len(previous_path) - strip_length] + data[offset:name_end]
+        offset = name_end + 1
+
+    else:
+        name_length = flags & _FLAG_NAME_MASK
+        if name_length == _FLAG_NAME_MASK:
+            name_length = data.find(b'\0', offset) - offset
+
+        path = data[offset:offset + name_length]
+        # Entries are padded with 1-8 NUL bytes to a multiple of 8 bytes
+        offset = entry_start + ((offset + name_length - entry_start + 8) & ~7)
+
+    entry = IndexEntry(
+        path=path,
+        mode=mode,
+        oid=oid.hex(),
+        size=size,
+        mtime_ns=mtime_s * 1000000000 + mtime_ns,
+        ctime_ns=ctime_s * 1000000000 + ctime_ns,
+        ino=ino,
+        uid=uid,
+        gid=gid,
+        stage=(flags & _FLAG_STAGE_MASK) >> 12,
+        assume_valid=bool(flags & _FLAG_ASSUME_VALID),
+        skip_worktree=bool(extended_flags & _EXTENDED_FLAG_SKIP_WORKTREE),
+        intent_to_add=bool(extended_flags & _EXTENDED_FLAG_INTENT_TO_ADD),
+    )
+
+    return entry, offset
+
+
+def read_offset_varint(data: mmap.mmap, offset: int) -> typing.Tuple[int, int]:
+    # The variable length integer used in index version 4 (and OFS_DELTA of packs)
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+
+    return value, offset
+
+
+def _parse_cache_tree(data: bytes) -> typing.Dict[bytes, str]:
+    cache_tree: typing.Dict[bytes, str] = {}
+
+    # The entries are in depth-first order; the stack contains (path, number of subtrees left)
+    stack: typing.List[typing.List[typing.Any]] = []
+    offset = 0
+    while offset < len(data):
+        name_end = data.index(b'\0', offset)
+        name = data[offset:name_end]
+        counts_end = data.index(b'\n', name_end)
+        entry_count, subtree_count = (int(count) for count in data[name_end + 1:counts_end].split(b' '))
+        offset = counts_end + 1
+
+        while stack and stack[-1][1] == 0:
+            stack.pop()
+
+        if stack:
+            stack[-1][1] -= 1
+            path = stack[-1][0] + name + b'/'
+
+        else:
+            path = b''
+
+        if entry_count >= 0:
+            cache_tree[path.rstrip(b'/')] = data[offset:offset + _CHECKSUM_LENGTH].hex()
+            offset += _CHECKSUM_LENGTH
+
+        stack.append([path, subtree_count])
+
+    return cache_tree
+
+
+def _parse_link(data: bytes) -> typing.Optional[typing.Tuple[str, typing.List[int], typing.List[int]]]:
+    shared_oid = data[:_CHECKSUM_LENGTH].hex()
+    if shared_oid == '0' * len(shared_oid):
+        return None
+
+    deleted, offset = _read_ewah_bitmap(data, _CHECKSUM_LENGTH)
+    replaced, _ = _read_ewah_bitmap(data, offset)
+
+    return shared_oid, deleted, replaced
+
+
+def _read_ewah_bitmap(data: bytes, offset: int) -> typing.Tuple[typing.List[int], int]:
+    '''
+    Return positions of the set bits in an EWAH compressed bitmap (as written by Git).
+    '''
+
+    bit_count, word_count = struct.unpack_from('>II', data, offset)
+    words = struct.unpack_from(f'>{word_count}Q', data, offset + 8)
+    offset += 8 + word_count * 8 + 4
+
+    positions: typing.List[int] = []
+    position = 0
+    index = 0
+    while index < word_count:
+        # Marker word: run of words with every bit set (or cleared) followed by literal words
+        marker = words[index]
+        index += 1
+        run_length = (marker >> 1) & 0xffffffff
+        literal_count = marker >> 33
+
+        if marker & 1:
+            positions.extend(range(position, position + run_length * 64))
+
+        position += run_length * 64
+
+        for word in words[index:index + literal_count]:
+            while word:
+                lowest_bit = word & -word
+                positions.append(position + lowest_bit.bit_length() - 1)
+                word ^= lowest_bit
+
+            position += 64
+
+        index += literal_count
+
+    return [position for position in positions if position < bit_count], offset
+
+
+def _merge_split_index(
+    base_entries: typing.List[IndexEntry],
+    entries: typing.List[IndexEntry],
+    deleted: typing.List[int],
+    replaced: typing.List[int],
+) -> typing.List[IndexEntry]:
+    # The first entries of the split index replace the base entries in the replaced
+    # positions; their paths are not stored as they are the same as in the base entries
+    merged: typing.List[typing.Optional[IndexEntry]] = list(base_entries)
+    for replacement, position in zip(entries, replaced):
+        merged[position] = replacement._replace(path=base_entries[position].path)
+
+    for position in deleted:
+        merged[position] = None
+
+    result = [entry for entry in merged if entry is not None]
+    result.extend(entries[len(replaced):])
+    result.sort(key=lambda entry: (entry.path, entry.stage))
+
+    return result
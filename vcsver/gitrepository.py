@@ -0,0 +1,942 @@
+# This module contains native (subprocess free) read-only access to Git repositories.
+#
+# Only the subset of Git needed for creating versions is implemented. Whenever a
+# repository uses something that is not supported, UnsupportedRepositoryError is
+# raised and the caller is expected to fall back to running git.
+
+import mmap
+import os
+import re
+import struct
+import typing
+import zlib
+
+from . import commitgraph
+from . import errors
+from . import gitconfig
+from . import gitdiscovery
+from . import reftable
+from . import util
+
+
+SHA1_HEX_LENGTH = 40
+SHA1_LENGTH = 20
+
+_SUPPORTED_EXTENSIONS = frozenset((
+    'noop',
+    'partialclone',
+    'preciousobjects',
+    'worktreeconfig',
+))
+
+# Environment variables changing how git finds or interprets the repository
+_UNSUPPORTED_ENVIRONMENT_VARIABLES = (
+    'GIT_COMMON_DIR',
+    'GIT_OBJECT_DIRECTORY',
+    'GIT_ALTERNATE_OBJECT_DIRECTORIES',
+    'GIT_GRAFT_FILE',
+    'GIT_REPLACE_REF_BASE',
+    'GIT_SHALLOW_FILE',
+)
+
+_PACK_OBJECT_TYPES = {
+    1: 'commit',
+    2: 'tree',
+    3: 'blob',
+    4: 'tag',
+}
+_PACK_OFS_DELTA = 6
+_PACK_REF_DELTA = 7
+
+_MAX_SYMREF_DEPTH = 5
+
+# Characters that are never part of ref names but are part of other revision syntaxes
+_INVALID_REF_NAME = re.compile(r'(^|/)\.|\.\.|[\x00-\x20~^:?*\[\\]|@\{|\.lock$|/$|^$')
+
+# Returns type and content of an object or None if the object does not exist
+ObjectSource = typing.Callable[[str], typing.Optional[typing.Tuple[str, bytes]]]
+
+
+class Commit(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    tree: str
+    parents: typing.Tuple[str, ...]
+    timestamp: int
+    # Topological level from commit-graph; None if the commit is not in the commit-graph
+    generation: typing.Optional[int] = None
+
+
+class Tag(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    target: str
+    target_type: str
+    name: typing.Optional[str]
+    timestamp: int
+
+
+class TreeEntry(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    mode: int
+    name: bytes
+    oid: str
+
+
+class Ref(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    name: str
+    oid: str
+    peeled: typing.Optional[str]
+
+
+class Repository:  # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        git_dir: str,
+        work_tree: typing.Optional[str],
+        object_fallback: typing.Optional[ObjectSource] = None,
+        common_dir: typing.Optional[str] = None,
+    ) -> None:
+        super().__init__()
+
+        self.git_dir: str = git_dir
+        self.common_dir: str = common_dir or git_dir
+        self.work_tree: typing.Optional[str] = work_tree
+
+        self._packed_refs: typing.Optional[typing.Dict[str, Ref]] = None
+        self._reftables: typing.Dict[str, reftable.Stack] = {}
+        self._commit_graph: typing.Optional[commitgraph.CommitGraph] = None
+        self._commit_graph_loaded: bool = False
+        self._commits: typing.Dict[str, Commit] = {}
+
+        self.config: typing.Dict[str, str] = gitconfig.read_config(os.path.join(self.common_dir, 'config'))
+        self._check_repository_format()
+
+        self.objects: ObjectDatabase = ObjectDatabase(
+            os.path.join(self.common_dir, 'objects'),
+            fallback=object_fallback,
+        )
+        self._shallow_commits: typing.FrozenSet[str] = self._read_shallow_commits()
+
+    @classmethod
+    def discover(
+        cls,
+        path: typing.Optional[str] = None,
+        object_fallback: typing.Optional[ObjectSource] = None,
+    ) -> 'Repository':
+        '''
+        Find the repository containing path (or the current working directory) like git
+        does (see gitdiscovery.find_repository).
+
+        Objects that can not be found natively (e.g. objects of a promisor remote) are
+        read from object_fallback if given.
+        '''
+
+        for variable in _UNSUPPORTED_ENVIRONMENT_VARIABLES:
+            if variable in os.environ:
+                raise errors.UnsupportedRepositoryError(f'{variable} is set')
+
+        location = gitdiscovery.find_repository(path)
+        if location is None:
+            raise errors.RepositoryNotFoundError(f'Not a git repository: {path or os.getcwd()}')
+
+        if location.work_tree is None:
+            raise errors.UnsupportedRepositoryError('Bare repositories are not supported')
+
+        return cls(location.git_dir, location.work_tree, object_fallback, common_dir=location.common_dir)
+
+    def head(self) -> typing.Optional[str]:
+        '''
+        Return commit id of HEAD or None if HEAD is unborn.
+        '''
+
+        return self.read_ref('HEAD')
+
+    def resolve(self, revision: str) -> str:
+        '''
+        Return id of the commit revision (a full commit id or a ref name) refers to.
+
+        The ref names are looked up like git does (e.g. main is refs/heads/main unless there
+        is refs/tags/main). Other revision syntaxes, such as abbreviated object ids or HEAD~1,
+        are not supported.
+        '''
+
+        if re.fullmatch(r'[0-9a-fA-F]{40}', revision):
+            oid: typing.Optional[str] = revision.lower()
+
+        elif _INVALID_REF_NAME.search(revision):
+            raise errors.UnsupportedRepositoryError(f'Unsupported revision: {revision}')
+
+        else:
+            oid = self._resolve_ref_name(revision)
+
+        if oid is None:
+            raise errors.UnsupportedRepositoryError(f'Unknown revision: {revision}')
+
+        object_type, commit = self.peel(oid)
+        if object_type != 'commit':
+            raise errors.UnsupportedRepositoryError(f'{revision} is not a commit')
+
+        return commit
+
+    def read_ref(self, name: str) -> typing.Optional[str]:
+        for _ in range(_MAX_SYMREF_DEPTH):
+            oid, target = self._read_ref_value(name)
+            if target is None:
+                return oid
+
+            name = target
+
+        raise errors.UnsupportedRepositoryError(f'Too deep symbolic ref chain: {name}')
+
+    def iter_refs(
+        self,
+        prefix: str,
+        name_filter: typing.Optional[typing.Callable[[str], bool]] = None,
+    ) -> typing.Iterator[Ref]:
+        '''
+        Iterate references whose name starts with prefix (e.g. refs/tags/) in name order.
+
+        References whose name name_filter rejects are skipped without reading them.
+        '''
+
+        if self._uses_reftable():
+            for record in self._get_reftable(prefix).iter_refs(prefix):
+                if name_filter is not None and not name_filter(record.name):
+                    continue
+
+                oid = record.oid if record.target is None else self.read_ref(record.name)
+                if oid is not None:
+                    yield Ref(name=record.name, oid=oid, peeled=record.peeled)
+
+            return
+
+        refs = {
+            name: ref
+            for name, ref in self._get_packed_refs().items()
+            if name.startswith(prefix) and (name_filter is None or name_filter(name))
+        }
+
+        for name in self._iter_loose_ref_names(prefix):
+            if name_filter is not None and not name_filter(name):
+                continue
+
+            oid = self.read_ref(name)
+            if oid is not None:
+                refs[name] = Ref(name=name, oid=oid, peeled=None)
+
+        for name in sorted(refs):
+            yield refs[name]
+
+    def commit(self, oid: str) -> Commit:
+        commit = self._commits.get(oid)
+        if commit is None:
+            commit = self._read_commit(oid)
+            self._commits[oid] = commit
+
+        return commit
+
+    def generation(self, oid: str) -> typing.Optional[int]:
+        '''
+        Return generation number (topological level) of the commit or None if it is not in
+        the commit-graph. The commit object is never read.
+        '''
+
+        commit = self._commits.get(oid)
+        if commit is not None:
+            return commit.generation
+
+        commit_graph = self._get_commit_graph()
+        entry = commit_graph.commit(oid) if commit_graph is not None else None
+
+        return entry.generation if entry is not None else None
+
+    def changed_path_filter(self, oid: str) -> typing.Optional[commitgraph.ChangedPathFilter]:
+        '''
+        Return the changed-path Bloom filter of the commit from the commit-graph or None if
+        there is no filter for the commit.
+        '''
+
+        if not gitconfig.is_true(self.config.get('commitgraph.readchangedpaths', 'true')):
+            return None
+
+        commit_graph = self._get_commit_graph()
+
+        return commit_graph.changed_path_filter(oid) if commit_graph is not None else None
+
+    def tag(self, oid: str) -> Tag:
+        object_type, data = self.objects.read(oid)
+        if object_type != 'tag':
+            raise errors.UnsupportedRepositoryError(f'{oid} is not a tag')
+
+        return parse_tag(data)
+
+    def tree(self, oid: str) -> typing.List[TreeEntry]:
+        object_type, data = self.objects.read(oid)
+        if object_type != 'tree':
+            raise errors.UnsupportedRepositoryError(f'{oid} is not a tree')
+
+        return parse_tree(data)
+
+    def peel(self, oid: str) -> typing.Tuple[str, str]:
+        '''
+        Return the type and id of the object oid refers to after following tags.
+        '''
+
+        object_type = self.objects.read_type(oid)
+        while object_type == 'tag':
+            tag = self.tag(oid)
+            oid, object_type = tag.target, tag.target_type
+
+        return object_type, oid
+
+    def tags_signature(self) -> str:
+        '''
+        Return a string that changes whenever a tag is added, moved or removed.
+
+        Only file system metadata is read: creating, replacing or removing a loose ref
+        always changes the modification time of the directory containing it, and reftable
+        stacks are always updated by replacing tables.list.
+        '''
+
+        if self._uses_reftable():
+            return ';'.join((
+                _stat_signature(os.path.join(self.common_dir, 'reftable', 'tables.list')),
+                _stat_signature(os.path.join(self.common_dir, 'shallow')),
+            ))
+
+        signature = [
+            _stat_signature(os.path.join(self.common_dir, 'packed-refs')),
+            _stat_signature(os.path.join(self.common_dir, 'shallow')),
+        ]
+
+        for root, dirs, _ in os.walk(os.path.join(self.common_dir, 'refs', 'tags')):
+            dirs.sort()
+            signature.append(f'{os.path.relpath(root, self.common_dir)}={_stat_signature(root)}')
+
+        return ';'.join(signature)
+
+    def index_signature(self) -> str:
+        '''
+        Return a string that changes whenever the index file is written.
+        '''
+
+        return _stat_signature(os.path.join(self.git_dir, 'index'))
+
+    def abbreviate(self, oid: str, length: int) -> str:
+        return oid[:max(length, self.objects.unique_prefix_length(oid))]
+
+    def _resolve_ref_name(self, name: str) -> typing.Optional[str]:
+        # Names outside refs/ are looked up only for special refs such as HEAD and ORIG_HEAD
+        names = [name] if name.startswith('refs/') or re.fullmatch(r'[A-Z_]+', name) else []
+        names.extend((
+            f'refs/{name}',
+            f'refs/tags/{name}',
+            f'refs/heads/{name}',
+            f'refs/remotes/{name}',
+            f'refs/remotes/{name}/HEAD',
+        ))
+
+        for candidate in names:
+            oid = self.read_ref(candidate)
+            if oid is not None:
+                return oid
+
+        return None
+
+    def _check_repository_format(self) -> None:
+        version = int(self.config.get('core.repositoryformatversion', '0'))
+        if version not in (0, 1):
+            raise errors.UnsupportedRepositoryError(f'Unknown repository format version {version}')
+
+        if gitconfig.is_true(self.config.get('core.bare', 'false')):
+            raise errors.UnsupportedRepositoryError('Bare repositories are not supported')
+
+        if version == 1:
+            for key, value in self.config.items():
+                if not key.startswith('extensions.'):
+                    continue
+
+                extension = key[len('extensions.'):]
+                if extension == 'objectformat' and value.lower() == 'sha1':
+                    continue
+
+                if extension == 'refstorage' and value.lower() in ('files', 'reftable'):
+                    continue
+
+                if extension not in _SUPPORTED_EXTENSIONS:
+                    raise errors.UnsupportedRepositoryError(f'Unsupported extension: {extension}')
+
+        if os.path.exists(os.path.join(self.common_dir, 'info', 'grafts')):
+            raise errors.UnsupportedRepositoryError('Grafts are not supported')
+
+        if 'GIT_NO_REPLACE_OBJECTS' not in os.environ and self._has_replace_refs():
+            raise errors.UnsupportedRepositoryError('Replace refs are not supported')
+
+    def _read_commit(self, oid: str) -> Commit:
+        commit_graph = self._get_commit_graph()
+        if commit_graph is not None:
+            entry = commit_graph.commit(oid)
+            if entry is not None:
+                return Commit(*entry)
+
+        object_type, data = self.objects.read(oid)
+        if object_type != 'commit':
+            raise errors.UnsupportedRepositoryError(f'{oid} is not a commit')
+
+        commit = parse_commit(data)
+        if oid in self._shallow_commits:
+            commit = commit._replace(parents=())
+
+        return commit
+
+    def _get_commit_graph(self) -> typing.Optional[commitgraph.CommitGraph]:
+        if not self._commit_graph_loaded:
+            # Git ignores commit-graph in shallow repositories as the parents stored in it may be wrong
+            if gitconfig.is_true(self.config.get('core.commitgraph', 'true')) and not self._shallow_commits:
+                self._commit_graph = commitgraph.CommitGraph.open(self.objects.path)
+
+            self._commit_graph_loaded = True
+
+        return self._commit_graph
+
+    def _has_replace_refs(self) -> bool:
+        if self._uses_reftable():
+            return any(self._get_reftable('refs/replace/').iter_refs('refs/replace/'))
+
+        if any(self._iter_loose_ref_names('refs/replace/')):
+            return True
+
+        return any(name.startswith('refs/replace/') for name in self._get_packed_refs())
+
+    def _read_shallow_commits(self) -> typing.FrozenSet[str]:
+        try:
+            with open(os.path.join(self.common_dir, 'shallow'), 'rt', encoding='ascii') as shallow_file:
+                return frozenset(line.strip() for line in shallow_file if line.strip())
+
+        except FileNotFoundError:
+            return frozenset()
+
+    def _read_ref_value(self, name: str) -> typing.Tuple[typing.Optional[str], typing.Optional[str]]:
+        # Return object id or the target of symbolic ref (or neither if there is no such ref)
+        if self._uses_reftable():
+            record = self._get_reftable(name).read(name)
+            return (record.oid, record.target) if record is not None else (None, None)
+
+        content = self._read_loose_ref(name)
+        if content is None:
+            packed_ref = self._get_packed_refs().get(name)
+            return packed_ref.oid if packed_ref is not None else None, None
+
+        if content.startswith('ref:'):
+            return None, content[4:].strip()
+
+        return _validate_oid(content), None
+
+    def _read_loose_ref(self, name: str) -> typing.Optional[str]:
+        base_dir = self.git_dir if '/' not in name else self.common_dir
+        try:
+            with open(os.path.join(base_dir, name), 'rt', encoding='utf-8') as ref_file:
+                return ref_file.read().strip()
+
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+
+    def _iter_loose_ref_names(self, prefix: str) -> typing.Iterator[str]:
+        directory, _, name_prefix = prefix.rpartition('/')
+        for root, dirs, files in os.walk(os.path.join(self.common_dir, directory)):
+            dirs.sort()
+            relative_root = os.path.relpath(root, self.common_dir).replace(os.sep, '/')
+            for filename in sorted(files):
+                if filename.endswith('.lock'):
+                    continue
+
+                name = f'{relative_root}/{filename}'
+                if name.startswith(f'{directory}/{name_prefix}'):
+                    yield name
+
+    def _get_packed_refs(self) -> typing.Dict[str, Ref]:
+        if self._packed_refs is None:
+            self._packed_refs = read_packed_refs(os.path.join(self.common_dir, 'packed-refs'))
+
+        return self._packed_refs
+
+    def _uses_reftable(self) -> bool:
+        return self.config.get('extensions.refstorage', 'files').lower() == 'reftable'
+
+    def _get_reftable(self, name: str) -> reftable.Stack:
+        # Like loose refs, refs outside refs/ (such as HEAD) are stored per worktree
+        base_dir = self.git_dir if '/' not in name else self.common_dir
+        if base_dir not in self._reftables:
+            self._reftables[base_dir] = reftable.Stack(os.path.join(base_dir, 'reftable'))
+
+        return self._reftables[base_dir]
+
+
+class ObjectDatabase:
+    def __init__(self, path: str, fallback: typing.Optional[ObjectSource] = None) -> None:
+        super().__init__()
+
+        self.path: str = path
+        self._fallback: typing.Optional[ObjectSource] = fallback
+        self._paths: typing.List[str] = [path] + _read_alternates(path)
+        self._packs: typing.Optional[typing.List[Pack]] = None
+
+    def read(self, oid: str) -> typing.Tuple[str, bytes]:
+        '''
+        Return type and content of the object.
+        '''
+
+        for path in self._paths:
+            loose_object = _read_loose_object(path, oid)
+            if loose_object is not None:
+                return loose_object
+
+        oid_bytes = bytes.fromhex(oid)
+        for pack in self._get_packs():
+            offset = pack.find(oid_bytes)
+            if offset is not None:
+                return pack.read(offset, self)
+
+        return self._read_fallback(oid)
+
+    def read_type(self, oid: str) -> str:
+        for path in self._paths:
+            object_type = _read_loose_object_type(path, oid)
+            if object_type is not None:
+                return object_type
+
+        oid_bytes = bytes.fromhex(oid)
+        for pack in self._get_packs():
+            offset = pack.find(oid_bytes)
+            if offset is not None:
+                return pack.read_type(offset, self)
+
+        return self._read_fallback(oid)[0]
+
+    def unique_prefix_length(self, oid: str) -> int:
+        '''
+        Return the length of the shortest prefix of oid not shared with any other object.
+        '''
+
+        common_length = 0
+
+        for path in self._paths:
+            try:
+                names = os.listdir(os.path.join(path, oid[:2]))
+
+            except FileNotFoundError:
+                continue
+
+            for name in names:
+                if name != oid[2:]:
+                    common_length = max(common_length, 2 + _common_prefix_length(name, oid[2:]))
+
+        oid_bytes = bytes.fromhex(oid)
+        for pack in self._get_packs():
+            for neighbour in pack.neighbours(oid_bytes):
+                common_length = max(common_length, _common_prefix_length(neighbour.hex(), oid))
+
+        return common_length + 1
+
+    def _read_fallback(self, oid: str) -> typing.Tuple[str, bytes]:
+        fallback_object = self._fallback(oid) if self._fallback is not None else None
+        if fallback_object is None:
+            raise errors.UnsupportedRepositoryError(f'Object not found: {oid}')
+
+        return fallback_object
+
+    def _get_packs(self) -> typing.List['Pack']:
+        if self._packs is None:
+            self._packs = []
+            for path in self._paths:
+                pack_dir = os.path.join(path, 'pack')
+                try:
+                    filenames = sorted(os.listdir(pack_dir))
+
+                except FileNotFoundError:
+                    continue
+
+                for filename in filenames:
+                    if filename.endswith('.idx'):
+                        self._packs.append(Pack(os.path.join(pack_dir, filename[:-len('.idx')])))
+
+        return self._packs
+
+
+class Pack:
+    _IDX_V2_MAGIC = b'\377tOc'
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+
+        self._path: str = path
+        self._index: mmap.mmap = _map_file(f'{path}.idx')
+        self._data: typing.Optional[mmap.mmap] = None
+
+        if self._index[:4] != self._IDX_V2_MAGIC or struct.unpack_from('>I', self._index, 4)[0] != 2:
+            raise errors.UnsupportedRepositoryError(f'Unsupported pack index: {path}.idx')
+
+        self._fanout: typing.Tuple[int, ...] = struct.unpack_from('>256I', self._index, 8)
+        self._count: int = self._fanout[255]
+        self._names_offset: int = 8 + 256 * 4
+        self._offsets_offset: int = self._names_offset + self._count * (SHA1_LENGTH + 4)
+
+    def find(self, oid: bytes) -> typing.Optional[int]:
+        position = self._search(oid)
+        if position >= self._count or self._name(position) != oid:
+            return None
+
+        offset = struct.unpack_from('>I', self._index, self._offsets_offset + position * 4)[0]
+        if offset & 0x80000000:
+            large_offset_index = offset & 0x7fffffff
+            large_offsets_offset = self._offsets_offset + self._count * 4
+            offset = struct.unpack_from('>Q', self._index, large_offsets_offset + large_offset_index * 8)[0]
+
+        return offset
+
+    def neighbours(self, oid: bytes) -> typing.Iterator[bytes]:
+        position = self._search(oid)
+        if position > 0:
+            yield self._name(position - 1)
+
+        if position < self._count and self._name(position) == oid:
+            position += 1
+
+        if position < self._count:
+            yield self._name(position)
+
+    def read(self, offset: int, objects: ObjectDatabase) -> typing.Tuple[str, bytes]:
+        deltas: typing.List[bytes] = []
+
+        while True:
+            type_number, size, data_offset = self._read_entry_header(offset)
+
+            if type_number == _PACK_OFS_DELTA:
+                base_offset, data_offset = self._read_base_offset(offset, data_offset)
+                deltas.append(self._inflate(data_offset, size))
+                offset = base_offset
+                continue
+
+            if type_number == _PACK_REF_DELTA:
+                base_oid = self._get_data()[data_offset:data_offset + SHA1_LENGTH].hex()
+                deltas.append(self._inflate(data_offset + SHA1_LENGTH, size))
+                object_type, data = objects.read(base_oid)
+                break
+
+            object_type = self._object_type(type_number)
+            data = self._inflate(data_offset, size)
+            break
+
+        for delta in reversed(deltas):
+            data = _apply_delta(data, delta)
+
+        return object_type, data
+
+    def read_type(self, offset: int, objects: ObjectDatabase) -> str:
+        while True:
+            type_number, _, data_offset = self._read_entry_header(offset)
+
+            if type_number == _PACK_OFS_DELTA:
+                offset, _ = self._read_base_offset(offset, data_offset)
+
+            elif type_number == _PACK_REF_DELTA:
+                return objects.read_type(self._get_data()[data_offset:data_offset + SHA1_LENGTH].hex())
+
+            else:
+                return self._object_type(type_number)
+
+    def _search(self, oid: bytes) -> int:
+        return util.search_sorted_object_ids(self._fanout, oid, self._name)
+
+    def _name(self, position: int) -> bytes:
+        offset = self._names_offset + position * SHA1_LENGTH
+        return self._index[offset:offset + SHA1_LENGTH]
+
+    def _get_data(self) -> mmap.mmap:
+        if self._data is None:
+            self._data = _map_file(f'{self._path}.pack')
+
+        return self._data
+
+    def _read_entry_header(self, offset: int) -> typing.Tuple[int, int, int]:
+        data = self._get_data()
+
+        byte = data[offset]
+        type_number = (byte >> 4) & 0x7
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            offset += 1
+            byte = data[offset]
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        return type_number, size, offset + 1
+
+    def _read_base_offset(self, entry_offset: int, offset: int) -> typing.Tuple[int, int]:
+        data = self._get_data()
+
+        byte = data[offset]
+        relative_offset = byte & 0x7f
+        while byte & 0x80:
+            offset += 1
+            byte = data[offset]
+            relative_offset = ((relative_offset + 1) << 7) | (byte & 0x7f)
+
+        return entry_offset - relative_offset, offset + 1
+
+    def _inflate(self, offset: int, size: int) -> bytes:
+        data = self._get_data()
+        decompressor = zlib.decompressobj()
+        chunk_size = max(size + 64, 4096)
+        chunks = []
+        while not decompressor.eof:
+            chunk = data[offset:offset + chunk_size]
+            if not chunk:
+                raise errors.UnsupportedRepositoryError(f'Truncated pack: {self._path}.pack')
+
+            chunks.append(decompressor.decompress(chunk))
+            offset += chunk_size
+
+        return b''.join(chunks)
+
+    def _object_type(self, type_number: int) -> str:
+        try:
+            return _PACK_OBJECT_TYPES[type_number]
+
+        except KeyError:
+            raise errors.UnsupportedRepositoryError(  # pylint: disable=raise-missing-from
+                f'Unknown object type {type_number} in {self._path}.pack',
+            )
+
+
+def read_packed_refs(path: str) -> typing.Dict[str, Ref]:
+    refs: typing.Dict[str, Ref] = {}
+
+    try:
+        with open(path, 'rt', encoding='utf-8') as packed_refs_file:
+            previous_name = None
+            for line in packed_refs_file:
+                line = line.rstrip('\n')
+                if not line or line.startswith('#'):
+                    continue
+
+                if line.startswith('^'):
+                    if previous_name is not None:
+                        refs[previous_name] = refs[previous_name]._replace(peeled=_validate_oid(line[1:]))
+
+                    continue
+
+                oid, _, name = line.partition(' ')
+                refs[name] = Ref(name=name, oid=_validate_oid(oid), peeled=None)
+                previous_name = name
+
+    except FileNotFoundError:
+        pass
+
+    return refs
+
+
+def parse_commit(data: bytes) -> Commit:
+    tree = ''
+    parents = []
+    timestamp = 0
+
+    for key, value in _iter_headers(data):
+        if key == b'tree':
+            tree = value.decode('ascii')
+
+        elif key == b'parent':
+            parents.append(value.decode('ascii'))
+
+        elif key == b'committer':
+            timestamp = _parse_signature_timestamp(value)
+
+    return Commit(
+        tree=tree,
+        parents=tuple(parents),
+        timestamp=timestamp,
+    )
+
+
+def parse_tag(data: bytes) -> Tag:
+    target = ''
+    target_type = ''
+    name = None
+    timestamp = 0
+
+    for key, value in _iter_headers(data):
+        if key == b'object':
+            target = value.decode('ascii')
+
+        elif key == b'type':
+            target_type = value.decode('ascii')
+
+        elif key == b'tag':
+            name = value.decode('utf-8', errors='replace')
+
+        elif key == b'tagger':
+            timestamp = _parse_signature_timestamp(value)
+
+    return Tag(
+        target=target,
+        target_type=target_type,
+        name=name,
+        timestamp=timestamp,
+    )
+
+
+def parse_tree(data: bytes) -> typing.List[TreeEntry]:
+    entries = []
+    offset = 0
+    while offset < len(data):
+        name_end = data.index(b'\0', offset)
+        mode, name = data[offset:name_end].split(b' ', 1)
+        offset = name_end + 1 + SHA1_LENGTH
+        entries.append(TreeEntry(
+            mode=int(mode, 8),
+            name=name,
+            oid=data[name_end + 1:offset].hex(),
+        ))
+
+    return entries
+
+
+def _iter_headers(data: bytes) -> typing.Iterator[typing.Tuple[bytes, bytes]]:
+    end = data.find(b'\n\n')
+    if end < 0:
+        end = len(data)
+
+    for line in data[:end].split(b'\n'):
+        if not line or line.startswith(b' '):
+            continue
+
+        key, _, value = line.partition(b' ')
+        yield key, value
+
+
+def _parse_signature_timestamp(signature: bytes) -> int:
+    try:
+        return int(signature[signature.rindex(b'>') + 1:].split()[0])
+
+    except (ValueError, IndexError):
+        return 0
+
+
+def _read_loose_object(objects_path: str, oid: str) -> typing.Optional[typing.Tuple[str, bytes]]:
+    try:
+        with open(os.path.join(objects_path, oid[:2], oid[2:]), 'rb') as object_file:
+            raw_data = zlib.decompress(object_file.read())
+
+    except FileNotFoundError:
+        return None
+
+    header, _, data = raw_data.partition(b'\0')
+    return header.split(b' ', 1)[0].decode('ascii'), data
+
+
+def _read_loose_object_type(objects_path: str, oid: str) -> typing.Optional[str]:
+    try:
+        with open(os.path.join(objects_path, oid[:2], oid[2:]), 'rb') as object_file:
+            header = zlib.decompressobj().decompress(object_file.read(64), 32)
+
+    except FileNotFoundError:
+        return None
+
+    return header.split(b' ', 1)[0].decode('ascii')
+
+
+def _read_alternates(objects_path: str) -> typing.List[str]:
+    try:
+        with open(os.path.join(objects_path, 'info', 'alternates'), 'rt', encoding='utf-8') as alternates_file:
+            return [
+                os.path.join(objects_path, line.strip())
+                for line in alternates_file
+                if line.strip() and not line.startswith('#')
+            ]
+
+    except FileNotFoundError:
+        return []
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    position = 0
+
+    def read_size() -> int:
+        nonlocal position
+        size = 0
+        shift = 0
+        while True:
+            byte = delta[position]
+            position += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return size
+
+    if read_size() != len(base):
+        raise errors.UnsupportedRepositoryError('Delta base size mismatch')
+
+    result_size = read_size()
+    result = bytearray()
+
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+
+        if opcode & 0x80:
+            copy_offset = 0
+            for shift in range(4):
+                if opcode & (1 << shift):
+                    copy_offset |= delta[position] << (8 * shift)
+                    position += 1
+
+            copy_size = 0
+            for shift in range(3):
+                if opcode & (0x10 << shift):
+                    copy_size |= delta[position] << (8 * shift)
+                    position += 1
+
+            result += base[copy_offset:copy_offset + (copy_size or 0x10000)]
+
+        elif opcode:
+            result += delta[position:position + opcode]
+            position += opcode
+
+        else:
+            raise errors.UnsupportedRepositoryError('Invalid delta opcode')
+
+    if len(result) != result_size:
+        raise errors.UnsupportedRepositoryError('Delta result size mismatch')
+
+    return bytes(result)
+
+
+def _map_file(path: str) -> mmap.mmap:
+    with open(path, 'rb') as mapped_file:
+        return mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _validate_oid(oid: str) -> str:
+    oid = oid.strip()
+    if len(oid) != SHA1_HEX_LENGTH:
+        raise errors.UnsupportedRepositoryError(f'Invalid object id: {oid}')
+
+    return oid
+
+
+def _common_prefix_length(first: str, second: str) -> int:
+    length = 0
+    for first_char, second_char in zip(first, second):
+        if first_char != second_char:
+            break
+
+        length += 1
+
+    return length
+
+
+def _stat_signature(path: str) -> str:
+    try:
+        stat_result = os.stat(path)
+
+    except FileNotFoundError:
+        return '-'
+
+    return f'{stat_result.st_ino}:{stat_result.st_size}:{stat_result.st_mtime_ns}'
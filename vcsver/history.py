@@ -0,0 +1,569 @@
+# This module contains commit history walks used by the native Git reader.
+
+import heapq
+import typing
+
+from . import gitrepository
+
+
+DEFAULT_MAX_CANDIDATES = 10
+
+# Generation of commits not in commit-graph; such commits are never ancestors of commits in commit-graph
+GENERATION_INFINITY = 0xffffffff
+
+# Tells whether a commit is counted (e.g. whether it changes the files of a package)
+CommitFilter = typing.Callable[[str], bool]
+
+# Flags of commits reachable from head and from base when counting commits between them
+_FLAG_HEAD = 1
+_FLAG_BASE = 2
+
+
+# Tells which of the sets of tagged commits (by index, of the given indexes of the sets still
+# walked) count a commit in their distance
+TargetFilter = typing.Callable[[str, typing.Set[int]], typing.Container[int]]
+
+
+class _Candidate:
+    def __init__(self, commit: str, flag: int, depth: int, counted_depth: int) -> None:
+        super().__init__()
+
+        self.commit: str = commit
+        self.flag: int = flag
+        self.depth: int = depth
+        # Number of the counted commits among the commits of depth
+        self.counted_depth: int = counted_depth
+
+
+class _Target:
+    '''
+    State of finding the nearest of one set of tagged commits.
+    '''
+
+    def __init__(
+        self,
+        tagged_commits: typing.Container[str],
+        pending_tags: typing.Optional['_PendingTags'] = None,
+    ) -> None:
+        super().__init__()
+
+        self.tagged_commits: typing.Container[str] = tagged_commits
+        # If None, the walk continues to the end unless a candidate is found
+        self.pending_tags: typing.Optional[_PendingTags] = pending_tags
+        self.candidates: typing.List[_Candidate] = []
+        # Number of the counted commits visited
+        self.counted_count: int = 0
+        self.finished: bool = False
+
+    def get_best(self) -> typing.Optional[_Candidate]:
+        if not self.candidates:
+            return None
+
+        return min(self.candidates, key=lambda candidate: candidate.depth)
+
+
+def describe(
+    repository: gitrepository.Repository,
+    head: str,
+    tagged_commits: typing.Container[str],
+    max_candidates: int = DEFAULT_MAX_CANDIDATES,
+    tag_generations: typing.Optional[typing.Mapping[str, typing.Optional[int]]] = None,
+) -> typing.Optional[typing.Tuple[str, int]]:
+    '''
+    Find the tagged commit nearest to head the same way as git describe does.
+
+    Returns tuple (tagged commit, distance) or None if no tagged commit is reachable from head.
+    The distance is the number of commits reachable from head but not from the tagged commit.
+
+    Commits are visited in commit date order like git describe does, also when commit-graph
+    is available, so that the result does not depend on whether commit-graph has been written:
+    with clock-skewed history git describe may visit a commit before all of its children and
+    then also counts it in the distance. The walk stops as soon as the distance of the best
+    candidate is final and no other candidate, found or not yet found, can beat it.
+
+    If tag_generations (generation numbers of the tagged commits) is given, the tagged commits
+    that can not be ancestors of the commits left to walk are ruled out by their generation
+    numbers; when none is left before finding any, the walk stops without walking the rest
+    of the history.
+    '''
+
+    if head in tagged_commits:
+        return head, 0
+
+    target = _Target(tagged_commits, _PendingTags(repository.commit(head).generation, tag_generations))
+    _walk_targets(repository, head, [target], max_candidates)
+
+    best = target.get_best()
+    return (best.commit, best.depth) if best is not None else None
+
+
+def describe_many(
+    repository: gitrepository.Repository,
+    head: str,
+    tagged_commits: typing.Sequence[typing.Container[str]],
+    get_counting_targets: typing.Optional[TargetFilter] = None,
+    max_candidates: int = DEFAULT_MAX_CANDIDATES,
+) -> typing.List[typing.Tuple[typing.Optional[str], int]]:
+    '''
+    Find the nearest tagged commit of each set of tagged commits like describe does, walking
+    the history once for all of them.
+
+    Returns tuple (tagged commit, distance) for each set. If no commit of the set is
+    reachable from head, the tagged commit is None and the distance is the number of
+    commits reachable from head. If get_counting_targets is given, only the commits for
+    which it returns the index of the set are counted in the distance of the set; the
+    nearest tagged commit is still the one with the fewest commits after it. It is called
+    with each visited commit and the indexes of the sets whose nearest commit is not yet
+    final.
+    '''
+
+    targets = [_Target(commits) for commits in tagged_commits]
+    _walk_targets(repository, head, targets, max_candidates, get_counting_targets)
+
+    descriptions: typing.List[typing.Tuple[typing.Optional[str], int]] = []
+    for target in targets:
+        best = target.get_best()
+        descriptions.append((best.commit, best.counted_depth) if best is not None else (None, target.counted_count))
+
+    return descriptions
+
+
+def _walk_targets(  # pylint: disable=too-many-locals,too-many-branches
+    repository: gitrepository.Repository,
+    head: str,
+    targets: typing.Sequence[_Target],
+    max_candidates: int,
+    get_counting_targets: typing.Optional[TargetFilter] = None,
+) -> None:
+    # Each candidate of every target has its own flag set on the commits reachable from it
+    flag_count = 0
+    flags = {head: 0}
+    queue = [_date_queue_item(repository, head, 0)]
+    order = 1
+    active_indexes = set(range(len(targets)))
+
+    while queue and active_indexes:
+        _, _, _, commit = heapq.heappop(queue)
+        commit_flags = flags[commit]
+        visited_count = order - len(queue)
+        counting_targets = None
+        if get_counting_targets is not None:
+            counting_targets = get_counting_targets(commit, active_indexes)
+
+        for index in active_indexes:
+            target = targets[index]
+
+            counted = counting_targets is None or index in counting_targets
+            if commit in target.tagged_commits and len(target.candidates) < max_candidates:
+                flag = 1 << flag_count
+                flag_count += 1
+                # None of the commits visited before this one are reachable from this commit
+                target.candidates.append(_Candidate(commit, flag, visited_count - 1, target.counted_count))
+                commit_flags |= flag
+                flags[commit] = commit_flags
+
+            for candidate in target.candidates:
+                if not commit_flags & candidate.flag:
+                    candidate.depth += 1
+                    if counted:
+                        candidate.counted_depth += 1
+
+            if counted:
+                target.counted_count += 1
+
+        for parent in repository.commit(commit).parents:
+            if parent in flags:
+                flags[parent] |= commit_flags
+                continue
+
+            flags[parent] = commit_flags
+            heapq.heappush(queue, _date_queue_item(repository, parent, order))
+            order += 1
+
+        # Flags set on every queued commit belong to candidates whose depth does not increase anymore
+        final_flags: typing.Optional[int] = None
+        max_generation: typing.Optional[int] = None
+        for index in active_indexes:
+            target = targets[index]
+            if target.candidates:
+                if final_flags is None:
+                    final_flags = _get_final_flags(flags, queue)
+
+                target.finished = _is_best_candidate_final(
+                    target.candidates,
+                    final_flags,
+                    visited_count,
+                    max_candidates,
+                )
+
+            elif target.pending_tags is not None:
+                if max_generation is None:
+                    max_generation = max((generation for _, _, generation, _ in queue), default=-1)
+
+                target.finished = not target.pending_tags.may_be_reached(max_generation)
+
+        active_indexes = {index for index in active_indexes if not targets[index].finished}
+
+
+def count_commits(
+    repository: gitrepository.Repository,
+    head: str,
+    first_parent: bool = False,
+    is_counted: typing.Optional[CommitFilter] = None,
+) -> int:
+    '''
+    Return the number of commits reachable from head (including head), or only of those
+    for which is_counted returns True if given.
+
+    If first_parent is True, only the first parent of merge commits is followed; then
+    the commits are counted without keeping track of the visited ones.
+    '''
+
+    if first_parent:
+        count = 0
+        commit: typing.Optional[str] = head
+        while commit is not None:
+            if is_counted is None or is_counted(commit):
+                count += 1
+
+            parents = repository.commit(commit).parents
+            commit = parents[0] if parents else None
+
+        return count
+
+    seen = {head}
+    stack = [head]
+    while stack:
+        for parent in repository.commit(stack.pop()).parents:
+            if parent not in seen:
+                seen.add(parent)
+                stack.append(parent)
+
+    if is_counted is not None:
+        return sum(1 for commit in seen if is_counted(commit))
+
+    return len(seen)
+
+
+def find_first_reachable(
+    repository: gitrepository.Repository,
+    head: str,
+    commits: typing.Iterable[str],
+    is_counted: typing.Optional[CommitFilter] = None,
+) -> typing.Optional[typing.Tuple[str, int]]:
+    '''
+    Find the first of commits that is reachable from head.
+
+    Returns tuple (commit, distance) or None if none of the commits is reachable from head.
+    The distance is the number of commits reachable from head but not from the commit (for
+    which is_counted returns True if given).
+
+    The history is walked from head only as far as needed to decide whether each commit in
+    turn is reachable, and never walked twice.
+    '''
+
+    reachable_commits = _ReachableCommits(repository, head)
+    for commit in commits:
+        if reachable_commits.contains(commit):
+            return commit, count_commits_between(repository, head, commit, is_counted)
+
+    return None
+
+
+def count_commits_between(
+    repository: gitrepository.Repository,
+    head: str,
+    base: str,
+    is_counted: typing.Optional[CommitFilter] = None,
+) -> int:
+    '''
+    Return the number of commits reachable from head but not from base (like git rev-list
+    --count base..head), or only of those for which is_counted returns True if given.
+    '''
+
+    return sum(
+        1
+        for commit in _iter_commits_between(repository, head, base)
+        if is_counted is None or is_counted(commit)
+    )
+
+
+def count_commits_between_many(
+    repository: gitrepository.Repository,
+    head: str,
+    bases: typing.Sequence[typing.Optional[str]],
+    get_counting_targets: TargetFilter,
+) -> typing.List[int]:
+    '''
+    Return the number of commits reachable from head but not from each base like
+    count_commits_between does, counting only the commits for which get_counting_targets
+    returns the index of the base (0 for bases that are None). The commits between head
+    and a base shared by many indexes are walked once for all of them.
+    '''
+
+    indexes_by_base: typing.Dict[str, typing.Set[int]] = {}
+    for index, base in enumerate(bases):
+        if base is not None:
+            indexes_by_base.setdefault(base, set()).add(index)
+
+    counts = [0] * len(bases)
+    for base, indexes in indexes_by_base.items():
+        for commit in _iter_commits_between(repository, head, base):
+            counting_targets = get_counting_targets(commit, indexes)
+            for index in indexes:
+                if index in counting_targets:
+                    counts[index] += 1
+
+    return counts
+
+
+def find_cached_ancestor(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    repository: gitrepository.Repository,
+    head: str,
+    is_cached: typing.Callable[[str], bool],
+    tagged_commits: typing.Container[str],
+    limit: int,
+    is_counted: typing.Optional[CommitFilter] = None,
+) -> typing.Optional[typing.Tuple[str, int]]:
+    '''
+    Walk back from head until reaching commits for which is_cached returns True.
+
+    Returns tuple (cached commit, number of commits walked) if every walked path ends at
+    the same cached commit. Then the commits walked are exactly the commits reachable from
+    head but not from the cached commit, and as none of them is tagged, the nearest tag of
+    head is the nearest tag of the cached commit with the distance increased by the number
+    of commits walked (for which is_counted returns True if given).
+
+    Returns None if more than limit commits would be walked or if a path ends at another
+    cached commit, at a tagged commit or at a root commit.
+    '''
+
+    walked: typing.Set[str] = set()
+    cached_commits: typing.Set[str] = set()
+    stack = [head]
+
+    while stack:
+        commit = stack.pop()
+        if commit in walked or commit in cached_commits:
+            continue
+
+        if commit != head and is_cached(commit):
+            cached_commits.add(commit)
+            if len(cached_commits) > 1:
+                return None
+
+            continue
+
+        if commit in tagged_commits or len(walked) == limit:
+            return None
+
+        walked.add(commit)
+
+        parents = repository.commit(commit).parents
+        if not parents:
+            return None
+
+        stack.extend(parents)
+
+    if not cached_commits:
+        return None
+
+    if is_counted is not None:
+        return cached_commits.pop(), sum(1 for commit in walked if is_counted(commit))
+
+    return cached_commits.pop(), len(walked)
+
+
+class _ReachableCommits:
+    '''
+    Commits reachable from head found by a walk that proceeds only when needed.
+    '''
+
+    def __init__(self, repository: gitrepository.Repository, head: str) -> None:
+        super().__init__()
+
+        self._repository: gitrepository.Repository = repository
+        self._seen: typing.Set[str] = {head}
+        self._queue: typing.List[typing.Tuple[int, int, int, str]] = [_queue_item(repository, head, 0)]
+        self._order: int = 1
+
+    def contains(self, commit: str) -> bool:
+        generation = self._repository.generation(commit)
+
+        while commit not in self._seen:
+            # A commit is never an ancestor of commits whose generation is not greater than its own
+            if not self._queue or (generation is not None and -self._queue[0][0] <= generation):
+                return False
+
+            _, _, _, queued_commit = heapq.heappop(self._queue)
+            for parent in self._repository.commit(queued_commit).parents:
+                if parent not in self._seen:
+                    self._seen.add(parent)
+                    heapq.heappush(self._queue, _queue_item(self._repository, parent, self._order))
+                    self._order += 1
+
+        return True
+
+
+class _PendingTags:
+    '''
+    Tagged commits that may still be reached by the walk from head.
+
+    A commit is never an ancestor of a commit whose generation number (topological level)
+    is not greater than its own, so a tagged commit whose generation is greater than that of
+    every queued commit can not be reached anymore.
+    '''
+
+    def __init__(
+        self,
+        head_generation: typing.Optional[int],
+        tag_generations: typing.Optional[typing.Mapping[str, typing.Optional[int]]],
+    ) -> None:
+        super().__init__()
+
+        # Generations of the tagged commits that may be reached in ascending order
+        self._generations: typing.List[int] = []
+
+        # Without the generation of head or of some tagged commit nothing is ruled out
+        self._has_unknown: bool = tag_generations is None or head_generation is None
+        if tag_generations is not None and head_generation is not None:
+            for generation in tag_generations.values():
+                if generation is None:
+                    self._has_unknown = True
+
+                elif generation < head_generation:
+                    self._generations.append(generation)
+
+            self._generations.sort()
+
+    def may_be_reached(self, max_generation: int) -> bool:
+        '''
+        Return whether any of the tagged commits may be an ancestor of (or one of) the queued
+        commits whose greatest generation is max_generation.
+        '''
+
+        if self._has_unknown:
+            return True
+
+        while self._generations and self._generations[-1] > max_generation:
+            self._generations.pop()
+
+        return bool(self._generations)
+
+
+def _get_final_flags(flags: typing.Dict[str, int], queue: typing.Sequence[typing.Tuple[int, int, int, str]]) -> int:
+    final_flags = ~0
+    for _, _, _, queued_commit in queue:
+        final_flags &= flags[queued_commit]
+
+    return final_flags
+
+
+def _is_best_candidate_final(
+    candidates: typing.Sequence[_Candidate],
+    final_flags: int,
+    visited_count: int,
+    max_candidates: int,
+) -> bool:
+    final_candidates = [candidate for candidate in candidates if candidate.flag & final_flags]
+    if not final_candidates:
+        return False
+
+    best = min(final_candidates, key=lambda candidate: candidate.depth)
+
+    # Depths only increase, ties are won by the candidate found first and candidates
+    # found later have depth of at least the number of commits visited so far
+    for candidate in candidates:
+        if candidate.flag & final_flags:
+            continue
+
+        if candidate.depth < best.depth or (candidate.depth == best.depth and candidate.flag < best.flag):
+            return False
+
+    return len(candidates) == max_candidates or visited_count >= best.depth
+
+
+def _iter_commits_between(repository: gitrepository.Repository, head: str, base: str) -> typing.Iterator[str]:
+    if repository.commit(head).generation is None:
+        # Without generation numbers children are not always visited before their parents
+        yield from _iter_ancestors(repository, head, _get_ancestors(repository, base))
+        return
+
+    # Commits are visited in generation order, so the flags of a commit are final when it
+    # is visited; the walk stops when only commits reachable from base are queued
+    flags = {head: _FLAG_HEAD}
+    flags[base] = flags.get(base, 0) | _FLAG_BASE
+    queue = [_queue_item(repository, commit, order) for order, commit in enumerate(flags)]
+    heapq.heapify(queue)
+    order = len(queue)
+    queued_from_head_only = sum(1 for commit_flags in flags.values() if commit_flags == _FLAG_HEAD)
+
+    while queued_from_head_only:
+        _, _, _, commit = heapq.heappop(queue)
+        commit_flags = flags[commit]
+        if commit_flags == _FLAG_HEAD:
+            queued_from_head_only -= 1
+            yield commit
+
+        for parent in repository.commit(commit).parents:
+            parent_flags = flags.get(parent)
+            if parent_flags is None:
+                flags[parent] = commit_flags
+                heapq.heappush(queue, _queue_item(repository, parent, order))
+                order += 1
+                if commit_flags == _FLAG_HEAD:
+                    queued_from_head_only += 1
+
+                continue
+
+            if parent_flags == _FLAG_HEAD and commit_flags & _FLAG_BASE:
+                queued_from_head_only -= 1
+
+            flags[parent] = parent_flags | commit_flags
+
+
+def _get_ancestors(repository: gitrepository.Repository, commit: str) -> typing.Set[str]:
+    return set(_iter_ancestors(repository, commit, set()))
+
+
+def _iter_ancestors(
+    repository: gitrepository.Repository,
+    commit: str,
+    excluded: typing.Set[str],
+) -> typing.Iterator[str]:
+    # Iterate commit (unless excluded) and its ancestors not reachable only through excluded commits
+    if commit in excluded:
+        return
+
+    seen = {commit}
+    stack = [commit]
+    while stack:
+        current = stack.pop()
+        yield current
+        for parent in repository.commit(current).parents:
+            if parent not in seen and parent not in excluded:
+                seen.add(parent)
+                stack.append(parent)
+
+
+def _queue_item(
+    repository: gitrepository.Repository,
+    commit: str,
+    order: int,
+) -> typing.Tuple[int, int, int, str]:
+    # Generation order, in which all the children of a commit are visited before the commit
+    commit_data = repository.commit(commit)
+    generation = commit_data.generation if commit_data.generation is not None else GENERATION_INFINITY
+    return -generation, -commit_data.timestamp, order, commit
+
+
+def _date_queue_item(
+    repository: gitrepository.Repository,
+    commit: str,
+    order: int,
+) -> typing.Tuple[int, int, int, str]:
+    # Commit date order of git describe, commits of the same date in the order they are queued;
+    # the generation is not used for ordering
+    commit_data = repository.commit(commit)
+    generation = commit_data.generation if commit_data.generation is not None else GENERATION_INFINITY
+    return -commit_data.timestamp, order, generation, commit
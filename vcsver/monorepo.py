@@ -0,0 +1,162 @@
+# This module contains creating versions of many packages of one repository at once.
+#
+# Each package has its own tags (named with a tag prefix such as mypackage/) and only the
+# commits changing the files of the package are counted in its distance, like
+# GitRevisionInfoReader does with tag_prefix and path_scope. Instead of describing each
+# package separately, the history is walked once: every visited commit updates the
+# nearest tag candidates of all the packages, and the trees of the commit are compared with
+# those of its parents once for all of the package paths. The commits after the nearest
+# tags are then counted exactly, once for the packages sharing the tagged commit.
+
+import os
+import typing
+
+from . import errors
+from . import git
+from . import gitcoprocess
+from . import gitrepository
+from . import history
+from . import pathscope
+from . import tagindex
+from . import tagmatch
+from . import types
+from . import vcsver
+
+
+class Package(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    # Directory of the package relative to the repository path (or the current working directory)
+    path: str
+    # Prefix of the tag names of the package, e.g. mypackage/ for tags like mypackage/1.0
+    tag_prefix: str = ''
+
+
+def get_version_infos(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    packages: typing.Sequence[Package],
+    path: typing.Optional[str] = None,
+    revision: str = 'HEAD',
+    root_version: str = '0',
+    parse_tag: types.TagParser = lambda tag: tag,
+    first_parent: bool = False,
+    tag_pattern: tagmatch.Patterns = (),
+    tag_exclude: tagmatch.Patterns = (),
+) -> typing.List[types.VersionInfo]:
+    '''
+    Return version info of each package at revision.
+
+    The versions created from them are the same get_version would create with
+    GitRevisionInfoReader(tag_prefix=package.tag_prefix, path_scope=package.path) when
+    the revision is checked out and the working tree is clean.
+
+    Only the tags matching tag_pattern and not tag_exclude (globs as in git describe
+    --match and --exclude, matched against the tag names without the tag prefix) are used.
+    '''
+
+    tag_matchers = [tagmatch.TagMatcher(tag_pattern, tag_exclude, prefix=package.tag_prefix) for package in packages]
+
+    try:
+        with gitcoprocess.GitCoprocess(path) as coprocess:
+            repository = gitrepository.Repository.discover(path, object_fallback=coprocess.read)
+            revision_infos = _read_revision_infos(repository, packages, path, revision, first_parent, tag_matchers)
+
+    except errors.RepositoryNotFoundError as exception:
+        raise errors.RevisionInfoNotFoundError(f'Repository can not be read: {exception}') from exception
+
+    except errors.UnsupportedRepositoryError:
+        revision_infos = [
+            _read_revision_info_with_git(package, path, revision, first_parent, tag_pattern, tag_exclude)
+            for package in packages
+        ]
+
+    return [
+        vcsver.create_version_info(revision_info, root_version=root_version, parse_tag=parse_tag)
+        for revision_info in revision_infos
+    ]
+
+
+def _read_revision_infos(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    repository: gitrepository.Repository,
+    packages: typing.Sequence[Package],
+    path: typing.Optional[str],
+    revision: str,
+    first_parent: bool,
+    tag_matchers: typing.Sequence[tagmatch.TagMatcher],
+) -> typing.List[types.RevisionInfo]:
+    if repository.work_tree is None:
+        raise errors.InvalidConfigurationError('Path scope requires a working tree')
+
+    head = repository.resolve(revision)
+    commit = repository.abbreviate(head, 10)
+
+    # The tags of all the packages are read once and then divided between the packages
+    tag_entries = tagindex.read_tags(repository)
+    package_tags = [
+        git.get_describable_tags(repository, tag_entries={
+            name: entry for name, entry in tag_entries.items() if tag_matcher(name[len('refs/tags/'):])
+        })
+        for tag_matcher in tag_matchers
+    ]
+
+    path_set = pathscope.PathSet(repository, [
+        pathscope.get_repository_path(os.path.join(path or os.curdir, package.path), repository.work_tree)
+        for package in packages
+    ])
+
+    descriptions = history.describe_many(repository, head, package_tags, get_counting_targets=path_set.get_changed)
+
+    # The distance counted in the walk depends on the commit date order (like the depth of git
+    # describe), so the commits after the tags are counted exactly like GitRevisionInfoReader
+    # does with path_scope
+    tagged_distances = history.count_commits_between_many(
+        repository,
+        head,
+        [tagged_commit for tagged_commit, _ in descriptions],
+        path_set.get_changed,
+    )
+
+    revision_infos = []
+    for index, (tagged_commit, distance) in enumerate(descriptions):
+        latest_tag = None
+        if tagged_commit is not None:
+            distance = tagged_distances[index]
+            tag_name = git.get_tag_name(repository, package_tags[index][tagged_commit])
+            latest_tag = tag_matchers[index].strip_prefix(tag_name)
+
+        elif first_parent:
+            path_scope = pathscope.PathScope(repository, path_set.paths[index])
+            distance = history.count_commits(
+                repository,
+                head,
+                first_parent=True,
+                is_counted=path_scope.changes_from_first_parent,
+            )
+
+        revision_infos.append(types.RevisionInfo(latest_tag=latest_tag, distance=distance, commit=commit, dirty=False))
+
+    return revision_infos
+
+
+def _read_revision_info_with_git(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    package: Package,
+    path: typing.Optional[str],
+    revision: str,
+    first_parent: bool,
+    tag_pattern: tagmatch.Patterns,
+    tag_exclude: tagmatch.Patterns,
+) -> types.RevisionInfo:
+    revision_info = git.GitRevisionInfoReader(
+        path,
+        native=False,
+        first_parent=first_parent,
+        use_cache=False,
+        single_flight=False,
+        revision=revision,
+        tag_pattern=tag_pattern,
+        tag_exclude=tag_exclude,
+        tag_prefix=package.tag_prefix,
+        path_scope=package.path,
+    )()
+
+    if revision_info is None:
+        raise errors.RevisionInfoNotFoundError('No revision info available.')
+
+    return revision_info
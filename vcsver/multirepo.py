@@ -0,0 +1,90 @@
+# This module contains creating versions of many repositories (e.g. separate checkouts)
+# concurrently.
+#
+# Reading revision info is mostly waiting for the file system and git processes, so the
+# repositories are read by a pool of threads. The results are returned as soon as each
+# repository is read, and an error reading one repository does not stop reading the others.
+
+import concurrent.futures
+import os
+import typing
+
+from . import errors
+from . import git
+from . import pep440
+from . import types
+from . import vcsver
+
+
+# Called with the path of each repository
+ReaderFactory = typing.Callable[[str], types.RevisionInfoReader]
+
+
+class RepositoryVersion(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    path: str
+    # None if the version could not be created
+    version: typing.Optional[str]
+    # Exception raised while creating the version, if any
+    error: typing.Optional[Exception] = None
+
+
+def iter_repository_versions(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    paths: typing.Iterable[str],
+    max_workers: typing.Optional[int] = None,
+    root_version: str = '0',
+    parse_tag: types.TagParser = lambda tag: tag,
+    create_version: types.VersionStringFactory = pep440.post,
+    create_reader: ReaderFactory = git.GitRevisionInfoReader,
+) -> typing.Iterator[RepositoryVersion]:
+    '''
+    Iterate versions of the repositories at paths in the order they are read, reading at
+    most max_workers (by default, as many as concurrent.futures.ThreadPoolExecutor uses)
+    repositories at a time.
+
+    Each version is the same get_version creates with read_revision_info=create_reader(path),
+    except that PKG-INFO is looked for in the path when there is no revision info. If
+    creating the version raises an exception, the exception is returned in error.
+    '''
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tasks = [
+            executor.submit(_read_version, path, root_version, parse_tag, create_version, create_reader)
+            for path in paths
+        ]
+
+        try:
+            for task in concurrent.futures.as_completed(tasks):
+                yield task.result()
+
+        finally:
+            # Repositories not yet read are skipped if the iteration is stopped
+            for task in tasks:
+                task.cancel()
+
+
+def _read_version(
+    path: str,
+    root_version: str,
+    parse_tag: types.TagParser,
+    create_version: types.VersionStringFactory,
+    create_reader: ReaderFactory,
+) -> RepositoryVersion:
+    try:
+        revision_info = create_reader(path)()
+        if revision_info is None:
+            version = vcsver.get_version_from_pkg_info_file(os.path.join(path, 'PKG-INFO'))
+            if version is None:
+                raise errors.RevisionInfoNotFoundError('No revision info available.')
+
+        else:
+            version = vcsver.create_version_from_revision_info(
+                revision_info,
+                root_version=root_version,
+                parse_tag=parse_tag,
+                create_version=create_version,
+            )
+
+    except Exception as exception:  # pylint: disable=broad-except
+        return RepositoryVersion(path=path, version=None, error=exception)
+
+    return RepositoryVersion(path=path, version=version)
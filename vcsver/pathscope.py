@@ -0,0 +1,192 @@
+# This module contains deciding which commits change the files under a path of the
+# repository, so that the versions of a package in a repository of many packages change
+# only with the commits of the package.
+#
+# A commit changes the path if the tree entry of the path differs from that of every
+# parent, or if it is a root commit containing the path. Like git log --full-history --
+# <path>, this counts every non-merge commit changing the path, but merge commits are
+# counted only when the merge result differs from all of the parents (e.g. a conflict
+# was resolved), so the changes of a merged branch are not counted twice.
+#
+# The changed-path Bloom filters of the commit-graph tell that most commits do not change
+# the path compared with their first parent without reading any trees. Many paths (e.g.
+# one per package) are checked at once, reading the trees they share only once.
+
+import os
+import typing
+
+from . import errors
+from . import gitrepository
+
+
+_MODE_TREE = 0o040000
+
+# Parsed trees kept for the commits visited next (whose parents usually have the same trees)
+_MAX_CACHED_TREES = 1024
+
+# Mode and id of a tree entry
+_Entry = typing.Tuple[int, str]
+
+
+class PathScope:
+    '''
+    Tells whether commits change the path (relative to the top level directory of the
+    repository with / separators, '' for the whole tree).
+    '''
+
+    def __init__(self, repository: gitrepository.Repository, path: str) -> None:
+        super().__init__()
+
+        self.path: str = path
+        self._paths: PathSet = PathSet(repository, (path,))
+
+    def changes(self, commit: str) -> bool:
+        return bool(self._paths.get_changed(commit))
+
+    def changes_from_first_parent(self, commit: str) -> bool:
+        '''
+        Return True if the commit changes the path compared with its first parent like git
+        rev-list --first-parent -- <path> shows.
+        '''
+
+        return bool(self._paths.get_changed(commit, first_parent=True))
+
+
+class _PathNode:
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.children: typing.Dict[bytes, _PathNode] = {}
+        # Indexes of the paths ending at this node and of the paths at or below it
+        self.indexes: typing.List[int] = []
+        self.subtree_indexes: typing.Set[int] = set()
+
+
+class PathSet:
+    '''
+    Tells which of the paths (like in PathScope) commits change. The trees leading to the
+    paths are compared once for all of the paths, and only the subtrees that differ and
+    contain some of the paths are read.
+    '''
+
+    def __init__(self, repository: gitrepository.Repository, paths: typing.Sequence[str]) -> None:
+        super().__init__()
+
+        self.paths: typing.Tuple[str, ...] = tuple(paths)
+        self._repository: gitrepository.Repository = repository
+        self._root: _PathNode = _PathNode()
+        self._filter_keys: typing.List[typing.List[bytes]] = []
+        self._trees: typing.Dict[str, typing.Dict[bytes, _Entry]] = {}
+
+        for index, path in enumerate(self.paths):
+            components = [os.fsencode(component) for component in path.split('/') if component]
+            node = self._root
+            node.subtree_indexes.add(index)
+            for component in components:
+                node = node.children.setdefault(component, _PathNode())
+                node.subtree_indexes.add(index)
+
+            node.indexes.append(index)
+
+            # A filter of a commit changing the path contains also each leading directory of it
+            self._filter_keys.append([b'/'.join(components[:length]) for length in range(len(components), 0, -1)])
+
+    def get_changed(
+        self,
+        commit: str,
+        indexes: typing.Optional[typing.Set[int]] = None,
+        first_parent: bool = False,
+    ) -> typing.Set[int]:
+        '''
+        Return indexes of the paths (of indexes if given) whose tree entry in the commit
+        differs from that of every parent (or only of the first parent if first_parent is
+        True).
+        '''
+
+        commit_data = self._repository.commit(commit)
+        candidates = set(range(len(self.paths))) if indexes is None else set(indexes)
+        if not commit_data.parents:
+            return self._diff(commit_data.tree, None, candidates)
+
+        changed_path_filter = self._repository.changed_path_filter(commit)
+        if changed_path_filter is not None:
+            candidates = {
+                index
+                for index in candidates
+                if all(changed_path_filter.may_contain(key) for key in self._filter_keys[index])
+            }
+
+        for parent in commit_data.parents[:1] if first_parent else commit_data.parents:
+            if not candidates:
+                break
+
+            candidates = self._diff(commit_data.tree, self._repository.commit(parent).tree, candidates)
+
+        return candidates
+
+    def _diff(self, tree: str, other_tree: typing.Optional[str], indexes: typing.Set[int]) -> typing.Set[int]:
+        # Return those of indexes whose paths differ between the trees
+        changed: typing.Set[int] = set()
+        self._diff_node(
+            self._root,
+            (_MODE_TREE, tree),
+            (_MODE_TREE, other_tree) if other_tree is not None else None,
+            indexes,
+            changed,
+        )
+
+        return changed
+
+    def _diff_node(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        node: _PathNode,
+        entry: typing.Optional[_Entry],
+        other_entry: typing.Optional[_Entry],
+        indexes: typing.Set[int],
+        changed: typing.Set[int],
+    ) -> None:
+        if entry == other_entry or not node.subtree_indexes & indexes:
+            return
+
+        changed.update(index for index in node.indexes if index in indexes)
+        if not node.children:
+            return
+
+        entries = self._read_tree(entry)
+        other_entries = self._read_tree(other_entry)
+        for name, child in node.children.items():
+            self._diff_node(child, entries.get(name), other_entries.get(name), indexes, changed)
+
+    def _read_tree(self, entry: typing.Optional[_Entry]) -> typing.Dict[bytes, _Entry]:
+        # Paths below anything but a tree do not exist
+        if entry is None or entry[0] != _MODE_TREE:
+            return {}
+
+        tree = entry[1]
+        if tree not in self._trees:
+            if len(self._trees) >= _MAX_CACHED_TREES:
+                self._trees.clear()
+
+            self._trees[tree] = {
+                tree_entry.name: (tree_entry.mode, tree_entry.oid)
+                for tree_entry in self._repository.tree(tree)
+            }
+
+        return self._trees[tree]
+
+
+def get_repository_path(path: str, top_level_path: str) -> str:
+    '''
+    Return path (relative to the current working directory unless absolute) relative to
+    the top level directory of the working tree with / separators; '' for the top level
+    directory itself.
+    '''
+
+    relative_path = os.path.relpath(os.path.realpath(path), os.path.realpath(top_level_path))
+    if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+        raise errors.InvalidConfigurationError(f'Path {path} is outside of the working tree {top_level_path}')
+
+    if relative_path == os.curdir:
+        return ''
+
+    return relative_path.replace(os.sep, '/')
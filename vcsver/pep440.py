@@ -1,6 +1,33 @@
+import functools
+import re
+import typing
+
 from . import types
 
 
+# Version pattern of PEP 440 (Appendix B) accepting also the optional v prefix tags often have
+_VERSION_PATTERN = re.compile(
+    r'''
+    v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?P<pre>[-_.]?(?P<pre_label>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre_number>[0-9]+)?)?
+    (?P<post>(?:-(?P<post_number_implicit>[0-9]+))|(?:[-_.]?(?P<post_label>post|rev|r)[-_.]?(?P<post_number>[0-9]+)?))?
+    (?P<dev>[-_.]?dev[-_.]?(?P<dev_number>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    ''',
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_PRE_LABELS = {'a': 0, 'alpha': 0, 'b': 1, 'beta': 1, 'c': 2, 'rc': 2, 'pre': 2, 'preview': 2}
+
+# Sort keys placing versions without the segment before or after the ones with it
+_BEFORE = (-1,)
+_AFTER = (float('inf'),)
+
+VersionKey = typing.Tuple[typing.Any, ...]
+
+
 def post(version_info: types.VersionInfo) -> str:
     latest_version = version_info.latest_release
 
@@ -27,3 +54,62 @@ def post_with_dev(version_info: types.VersionInfo) -> str:
         latest_version = f'{latest_version}{dirty_separator}dirty'
 
     return latest_version
+
+
+def post_with_digest(version_info: types.VersionInfo) -> str:
+    latest_version = version_info.latest_release
+
+    dirty_separator = '+'
+    if version_info.distance != 0:
+        latest_version = f'{latest_version}.post{version_info.distance}+{version_info.commit}'
+        dirty_separator = '.'
+
+    if version_info.dirty:
+        # Without digest the version is the same for all modifications
+        dirty_label = f'd{version_info.dirty_digest}' if version_info.dirty_digest is not None else 'dirty'
+        latest_version = f'{latest_version}{dirty_separator}{dirty_label}'
+
+    return latest_version
+
+
+@functools.lru_cache(maxsize=None)
+def get_version_key(version: str) -> typing.Optional[VersionKey]:
+    '''
+    Return key ordering versions as PEP 440 does or None if version is not a valid PEP 440
+    version (optionally prefixed with v, as in tag names). The keys are memoized.
+    '''
+
+    match = _VERSION_PATTERN.fullmatch(version.strip())
+    if match is None:
+        return None
+
+    release = tuple(int(part) for part in match.group('release').split('.'))
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+
+    pre_release: VersionKey = _AFTER
+    if match.group('pre'):
+        pre_release = (_PRE_LABELS[match.group('pre_label').lower()], int(match.group('pre_number') or 0))
+
+    post_release: VersionKey = _BEFORE
+    if match.group('post'):
+        post_release = (int(match.group('post_number_implicit') or match.group('post_number') or 0),)
+
+    dev_release: VersionKey = _AFTER
+    if match.group('dev'):
+        dev_release = (int(match.group('dev_number') or 0),)
+
+    # Development releases of a release without pre or post release sort before its pre-releases
+    if pre_release is _AFTER and post_release is _BEFORE and dev_release is not _AFTER:
+        pre_release = _BEFORE
+
+    # Versions without local version label sort before the ones with it
+    local: VersionKey = ()
+    if match.group('local'):
+        # Numeric segments sort after alphanumeric ones
+        local = tuple(
+            (1, int(part), '') if part.isdigit() else (0, 0, part.lower())
+            for part in re.split(r'[-_.]', match.group('local'))
+        )
+
+    return int(match.group('epoch') or 0), release, pre_release, post_release, dev_release, local
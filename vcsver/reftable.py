@@ -0,0 +1,331 @@
+# This module contains read-only access to refs stored with the reftable backend
+# (extensions.refStorage = reftable).
+#
+# The tables are memory mapped and only the blocks needed for a lookup are read: the
+# ref index (if any) locates the ref block and the restart points of the block locate
+# the record. Object and log blocks are never read.
+
+import heapq
+import mmap
+import os
+import struct
+import typing
+import zlib
+
+from . import errors
+from . import gitindex
+
+
+_MAGIC = b'REFT'
+
+_HEADER = struct.Struct('>4sB3sQQ')
+_HASH_ID = struct.Struct('>4s')
+_FOOTER = struct.Struct('>QQQQQ')
+_CRC = struct.Struct('>I')
+
+_HASH_ID_SHA1 = b'sha1'
+
+_BLOCK_TYPE_REF = ord('r')
+_BLOCK_TYPE_INDEX = ord('i')
+
+_VALUE_DELETION = 0
+_VALUE_OID = 1
+_VALUE_PEELED = 2
+_VALUE_SYMREF = 3
+
+_BLOCK_HEADER_LENGTH = 4
+_OID_LENGTH = 20
+
+
+class RefRecord(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    name: str
+    # None (as is target) if the record deletes the ref
+    oid: typing.Optional[str] = None
+    peeled: typing.Optional[str] = None
+    # Name of the ref symbolic refs point to
+    target: typing.Optional[str] = None
+
+
+class Stack:
+    '''
+    Refs of a reftable stack (e.g. .git/reftable); tables added later override refs of
+    the earlier tables.
+    '''
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+
+        try:
+            with open(os.path.join(path, 'tables.list'), 'rt', encoding='utf-8') as tables_file:
+                table_names = tables_file.read().split()
+
+            # Newest table first
+            self._tables: typing.List[Table] = [Table(os.path.join(path, name)) for name in reversed(table_names)]
+
+        except OSError as exception:
+            raise errors.UnsupportedRepositoryError(f'Could not read reftable stack {path}: {exception}') from exception
+
+    def read(self, name: str) -> typing.Optional[RefRecord]:
+        '''
+        Return the record of ref name or None if there is no such ref.
+        '''
+
+        for table in self._tables:
+            record = table.read(name)
+            if record is not None:
+                return record if not _is_deletion(record) else None
+
+        return None
+
+    def iter_refs(self, prefix: str) -> typing.Iterator[RefRecord]:
+        '''
+        Iterate records of refs whose name starts with prefix in name order.
+        '''
+
+        merged_records = heapq.merge(*(
+            _iter_prioritized_records(table, prefix, priority)
+            for priority, table in enumerate(self._tables)
+        ))
+
+        previous_name = None
+        for name, _, record in merged_records:
+            # The record of the newest table comes first
+            if name != previous_name and not _is_deletion(record):
+                yield record
+
+            previous_name = name
+
+
+class Table:
+    def __init__(self, path: str) -> None:
+        super().__init__()
+
+        self._path: str = path
+        try:
+            with open(path, 'rb') as table_file:
+                self._data: mmap.mmap = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            self._header_length: int
+            self._block_size: int
+            self._header_length, self._block_size = self._read_header()
+
+            self._ref_index_position: int
+            self._end: int
+            self._ref_index_position, self._end = self._read_footer()
+
+        except (ValueError, IndexError, struct.error) as exception:
+            raise errors.UnsupportedRepositoryError(f'Invalid reftable {path}: {exception}') from exception
+
+    def read(self, name: str) -> typing.Optional[RefRecord]:
+        '''
+        Return the record of ref name (possibly a deletion) or None if the table does not contain it.
+        '''
+
+        for record in self._seek(name.encode()):
+            return record if record.name == name else None
+
+        return None
+
+    def iter_records(self, prefix: str) -> typing.Iterator[RefRecord]:
+        '''
+        Iterate records (including deletions) whose name starts with prefix in name order.
+        '''
+
+        for record in self._seek(prefix.encode()):
+            if not record.name.startswith(prefix):
+                return
+
+            yield record
+
+    def _seek(self, name: bytes) -> typing.Iterator[RefRecord]:
+        # Iterate records whose name is name or after it
+        try:
+            block_position: typing.Optional[int] = self._find_ref_block(name)
+            while block_position is not None:
+                block_end, records_offset = self._read_block_header(block_position, _BLOCK_TYPE_REF)
+                offset = self._find_restart(block_position, block_end, records_offset, name)
+                previous_name = b''
+                restarts_start = self._get_restarts_start(block_end)
+                while offset < restarts_start:
+                    record_name, value_type, offset = _read_key(self._data, offset, previous_name)
+                    record, offset = self._read_ref_value(record_name, value_type, offset)
+                    previous_name = record_name
+                    if record_name >= name:
+                        yield record
+
+                block_position = self._get_next_ref_block(block_position, block_end)
+
+        except (ValueError, IndexError, struct.error) as exception:
+            raise errors.UnsupportedRepositoryError(f'Invalid reftable {self._path}: {exception}') from exception
+
+    def _read_header(self) -> typing.Tuple[int, int]:
+        # Return length of the header and the block size
+        magic, version, block_size, _, _ = _HEADER.unpack_from(self._data, 0)
+        if magic != _MAGIC or version not in (1, 2):
+            raise errors.UnsupportedRepositoryError(f'Unsupported reftable {self._path}')
+
+        if version == 1:
+            return _HEADER.size, int.from_bytes(block_size, 'big')
+
+        if _HASH_ID.unpack_from(self._data, _HEADER.size)[0] != _HASH_ID_SHA1:
+            raise errors.UnsupportedRepositoryError(f'Unsupported hash in reftable {self._path}')
+
+        return _HEADER.size + _HASH_ID.size, int.from_bytes(block_size, 'big')
+
+    def _read_footer(self) -> typing.Tuple[int, int]:
+        footer_length = self._header_length + _FOOTER.size + _CRC.size
+        footer_start = len(self._data) - footer_length
+
+        footer = self._data[footer_start:]
+        if footer[:self._header_length] != self._data[:self._header_length]:
+            raise ValueError('footer does not match header')
+
+        if _CRC.unpack_from(footer, footer_length - _CRC.size)[0] != zlib.crc32(footer[:-_CRC.size]):
+            raise ValueError('footer checksum mismatch')
+
+        ref_index_position = _FOOTER.unpack_from(footer, self._header_length)[0]
+
+        return ref_index_position, footer_start
+
+    def _read_block_header(self, block_position: int, expected_type: int) -> typing.Tuple[int, int]:
+        # The first block contains also the file header; the offsets within the block
+        # (block length and restart offsets) are relative to the start of the file
+        header_offset = block_position + (self._header_length if block_position == 0 else 0)
+        block_type = self._data[header_offset]
+        if block_type != expected_type:
+            raise ValueError(f'unexpected block type {block_type} at {block_position}')
+
+        block_length = int.from_bytes(self._data[header_offset + 1:header_offset + 4], 'big')
+
+        return block_position + block_length, header_offset + _BLOCK_HEADER_LENGTH
+
+    def _get_restarts_start(self, block_end: int) -> int:
+        restart_count = struct.unpack_from('>H', self._data, block_end - 2)[0]
+        return block_end - 2 - 3 * restart_count
+
+    def _find_restart(
+        self,
+        block_position: int,
+        block_end: int,
+        records_offset: int,
+        name: bytes,
+    ) -> int:
+        # Return offset of the last restart point whose name is before name; the records at
+        # restart points store the full name
+        restarts_start = self._get_restarts_start(block_end)
+        low = 0
+        high = (block_end - 2 - restarts_start) // 3
+        offset = records_offset
+        while low < high:
+            middle = (low + high) // 2
+            restart_offset = block_position + int.from_bytes(
+                self._data[restarts_start + 3 * middle:restarts_start + 3 * middle + 3],
+                'big',
+            )
+            if _read_key(self._data, restart_offset, b'')[0] < name:
+                offset = restart_offset
+                low = middle + 1
+
+            else:
+                high = middle
+
+        return offset
+
+    def _find_ref_block(self, name: bytes) -> typing.Optional[int]:
+        if not self._is_ref_block(0):
+            return None
+
+        if self._ref_index_position == 0:
+            return self._find_ref_block_without_index(name)
+
+        # Index records contain the last name of each block they point to
+        block_position = self._ref_index_position
+        while True:
+            block_end, offset = self._read_block_header(block_position, _BLOCK_TYPE_INDEX)
+            restarts_start = self._get_restarts_start(block_end)
+            previous_name = b''
+            while True:
+                if offset >= restarts_start:
+                    return None
+
+                previous_name, _, offset = _read_key(self._data, offset, previous_name)
+                child_position, offset = gitindex.read_offset_varint(self._data, offset)
+                if previous_name >= name:
+                    break
+
+            if self._is_ref_block(child_position):
+                return child_position
+
+            block_position = child_position
+
+    def _find_ref_block_without_index(self, name: bytes) -> typing.Optional[int]:
+        # The last block whose first name is before name (or the first block)
+        block_position: typing.Optional[int] = 0
+        found_position = None
+        while block_position is not None:
+            block_end, records_offset = self._read_block_header(block_position, _BLOCK_TYPE_REF)
+            if found_position is not None and _read_key(self._data, records_offset, b'')[0] > name:
+                break
+
+            found_position = block_position
+            block_position = self._get_next_ref_block(block_position, block_end)
+
+        return found_position
+
+    def _get_next_ref_block(self, block_position: int, block_end: int) -> typing.Optional[int]:
+        # Blocks are padded with zeros to the block size unless they are unaligned
+        next_position = block_position + self._block_size
+        if self._block_size == 0 or block_end >= next_position or self._data[block_end] != 0:
+            next_position = block_end
+
+        return next_position if self._is_ref_block(next_position) else None
+
+    def _is_ref_block(self, block_position: int) -> bool:
+        header_offset = block_position + (self._header_length if block_position == 0 else 0)
+        return header_offset < self._end and self._data[header_offset] == _BLOCK_TYPE_REF
+
+    def _read_ref_value(self, name: bytes, value_type: int, offset: int) -> typing.Tuple[RefRecord, int]:
+        _, offset = gitindex.read_offset_varint(self._data, offset)  # update index delta
+        record_name = name.decode()
+
+        if value_type == _VALUE_DELETION:
+            return RefRecord(name=record_name), offset
+
+        if value_type == _VALUE_OID:
+            oid = self._data[offset:offset + _OID_LENGTH].hex()
+            return RefRecord(name=record_name, oid=oid), offset + _OID_LENGTH
+
+        if value_type == _VALUE_PEELED:
+            oid = self._data[offset:offset + _OID_LENGTH].hex()
+            peeled = self._data[offset + _OID_LENGTH:offset + 2 * _OID_LENGTH].hex()
+            return RefRecord(name=record_name, oid=oid, peeled=peeled), offset + 2 * _OID_LENGTH
+
+        if value_type == _VALUE_SYMREF:
+            target_length, offset = gitindex.read_offset_varint(self._data, offset)
+            target = self._data[offset:offset + target_length].decode()
+            return RefRecord(name=record_name, target=target), offset + target_length
+
+        raise ValueError(f'unknown value type {value_type}')
+
+
+def _iter_prioritized_records(
+    table: Table,
+    prefix: str,
+    priority: int,
+) -> typing.Iterator[typing.Tuple[str, int, RefRecord]]:
+    for record in table.iter_records(prefix):
+        yield record.name, priority, record
+
+
+def _is_deletion(record: RefRecord) -> bool:
+    return record.oid is None and record.target is None
+
+
+def _read_key(data: mmap.mmap, offset: int, previous_name: bytes) -> typing.Tuple[bytes, int, int]:
+    # Return name (stored as suffix of the previous name), value type and offset of the value
+    prefix_length, offset = gitindex.read_offset_varint(data, offset)
+    suffix_length_and_type, offset = gitindex.read_offset_varint(data, offset)
+    suffix_length = suffix_length_and_type >> 3
+    name = previous_name[:prefix_length] + data[offset:offset + suffix_length]
+
+    return name, suffix_length_and_type & 0x7, offset + suffix_length
@@ -1,11 +1,10 @@
+# This module contains the setuptools hook called in every build, also of projects not
+# using vcsver, so the modules creating the version are imported only if vcsver is
+# configured in pyproject.toml.
+
 import typing
 
-from . import (
-    config,
-    git,
-    pep440,
-    vcsver,
-)
+from . import config
 
 
 def finalize_distribution_options(dist: typing.Any) -> None:
@@ -15,9 +14,27 @@ def finalize_distribution_options(dist: typing.Any) -> None:
     if source is None:
         return
 
+    from . import (  # pylint: disable=import-outside-toplevel
+        git,
+        pep440,
+        vcsver,
+    )
+
+    dirty_digest = vcsver_config.get('dirty_digest', False)
+
     dist.metadata.version = vcsver.get_version(
         root_version='0',
-        read_revision_info=git.GitRevisionInfoReader(),
+        read_revision_info=git.GitRevisionInfoReader(
+            dirty=vcsver_config.get('dirty', git.DIRTY_FULL),
+            dirty_digest=dirty_digest,
+            tag_pattern=vcsver_config.get('tag_pattern', ()),
+            tag_exclude=vcsver_config.get('tag_exclude', ()),
+            tag_selection=vcsver_config.get('tag_selection', git.TAG_SELECTION_NEAREST),
+            tag_prefix=vcsver_config.get('tag_prefix', ''),
+            path_scope=vcsver_config.get('path_scope'),
+            timeout=vcsver_config.get('timeout'),
+            timeout_fallback=vcsver_config.get('timeout_fallback', git.TIMEOUT_FALLBACK_ERROR),
+        ),
         parse_tag=lambda tag: tag,
-        create_version=pep440.post,
+        create_version=pep440.post_with_digest if dirty_digest else pep440.post,
     )
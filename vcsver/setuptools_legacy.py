@@ -3,6 +3,7 @@
 import collections.abc
 import typing
 
+from . import errors
 from . import git
 from . import pep440
 from . import types
@@ -35,6 +36,18 @@ def get_version_kwargs(config: ConfigDict) -> typing.Dict[str, typing.Any]:
 
 def _get_revision_info_reader(config: ConfigDict) -> types.RevisionInfoReader:
     revision_info_reader = config.get('read_revision_info', DEFAULT_READ_REVISION_INFO)
+
+    reader_options = {option: config[option] for option in _READER_OPTIONS if option in config}
+    if reader_options:
+        # The reader options are passed to the reader created from an identifier
+        identifier = config.get('read_revision_info', 'git')
+        if not isinstance(identifier, str):
+            raise errors.InvalidConfigurationError(
+                f'{", ".join(reader_options)} requires read_revision_info identifier',
+            )
+
+        return REVISION_INFO_READERS[identifier](**reader_options)
+
     if isinstance(revision_info_reader, str):
         revision_info_reader = REVISION_INFO_READERS[revision_info_reader]()
 
@@ -50,13 +63,31 @@ def _get_parse_tag(config: ConfigDict) -> types.TagParser:
 
 
 def _get_create_version(config: ConfigDict) -> types.VersionStringFactory:
-    create_version = config.get('create_version', DEFAULT_CREATE_VERSION)
+    dirty_digest = config.get('dirty_digest', False)
+    # The digest is used by default like in pyproject.toml
+    create_version = config.get('create_version', _DIGEST_VERSION_SCHEMA if dirty_digest else DEFAULT_CREATE_VERSION)
     if isinstance(create_version, str):
+        if dirty_digest and create_version != _DIGEST_VERSION_SCHEMA:
+            raise errors.InvalidConfigurationError(f'Version scheme {create_version} does not use dirty_digest')
+
         create_version = VERSION_SCHEMAS[create_version]
 
     return create_version
 
 
+# Configuration passed to the reader factories
+_READER_OPTIONS = (
+    'dirty',
+    'dirty_digest',
+    'tag_pattern',
+    'tag_exclude',
+    'tag_selection',
+    'tag_prefix',
+    'path_scope',
+    'timeout',
+    'timeout_fallback',
+)
+
 REVISION_INFO_READERS: typing.Dict[
     str,
     types.RevisionInfoReaderFactory,
@@ -71,13 +102,18 @@ TAG_PARSERS: typing.Dict[
     'plain': lambda tag: tag,
 }
 
+# Version scheme using dirty_digest of the revision info
+_DIGEST_VERSION_SCHEMA = 'pep440.post_with_digest'
+
 VERSION_SCHEMAS: typing.Dict[str, types.VersionStringFactory] = {
     'pep440.post': pep440.post,
     'pep440.post_with_dev': pep440.post_with_dev,
+    'pep440.post_with_digest': pep440.post_with_digest,
 }
 
 
 DEFAULT_ROOT_VERSION: str = '0'
-DEFAULT_READ_REVISION_INFO: types.RevisionInfoReader = REVISION_INFO_READERS['git']()
+# The reader is created when a version is read, not when the module is imported
+DEFAULT_READ_REVISION_INFO: typing.Union[str, types.RevisionInfoReader] = 'git'
 DEFAULT_PARSE_TAG: types.TagParser = TAG_PARSERS['plain']
 DEFAULT_CREATE_VERSION: types.VersionStringFactory = VERSION_SCHEMAS['pep440.post']
@@ -0,0 +1,162 @@
+# This module contains coordination of concurrent processes computing the same value.
+#
+# When many build processes start at the same time in the same checkout, only one of
+# them (the leader) computes the value while the others wait for the leader to publish
+# the result and then reuse it.
+
+import contextlib
+import json
+import os
+import socket
+import time
+import typing
+
+
+class SingleFlight:
+    '''
+    Lock file based single-flight execution shared by processes.
+
+    The lock file records the host name, process id and creation time of the leader. A lock
+    left behind by a crashed leader is broken when its process no longer exists (checked
+    only on the same host) or when it is older than stale_timeout seconds.
+    '''
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        lock_path: str,
+        result_path: str,
+        stale_timeout: float = 120.0,
+        wait_timeout: float = 60.0,
+        poll_interval: float = 0.02,
+    ) -> None:
+        super().__init__()
+
+        self._lock_path: str = lock_path
+        self._result_path: str = result_path
+        self._stale_timeout: float = stale_timeout
+        self._wait_timeout: float = wait_timeout
+        self._poll_interval: float = poll_interval
+
+    def run(self, key: str, compute: typing.Callable[[], typing.Any]) -> typing.Any:
+        '''
+        Return value computed by compute or by another process running with the same key.
+
+        The value must be JSON serializable.
+        '''
+
+        wait_started = time.time()
+        deadline = time.monotonic() + self._wait_timeout
+
+        while time.monotonic() < deadline:
+            if self._acquire():
+                try:
+                    value = compute()
+                    self._publish(key, value)
+                    return value
+
+                finally:
+                    self._release()
+
+            self._wait_for_release(deadline)
+
+            found, value = self._read_result(key, wait_started)
+            if found:
+                return value
+
+        return compute()
+
+    def _acquire(self) -> bool:
+        try:
+            file_descriptor = os.open(self._lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+
+        except FileExistsError:
+            return False
+
+        except OSError:
+            # Lock can not be created (e.g. read-only file system); run without coordination
+            return True
+
+        with os.fdopen(file_descriptor, 'wt', encoding='utf-8') as lock_file:
+            lock_file.write(f'{socket.gethostname()}\n{os.getpid()}\n{time.time()}\n')
+
+        return True
+
+    def _release(self) -> None:
+        with contextlib.suppress(OSError):
+            os.unlink(self._lock_path)
+
+    def _wait_for_release(self, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            try:
+                lock_stat = os.stat(self._lock_path)
+
+            except FileNotFoundError:
+                return
+
+            if self._is_stale(lock_stat):
+                self._break_stale_lock(lock_stat)
+                return
+
+            time.sleep(self._poll_interval)
+
+    def _is_stale(self, lock_stat: os.stat_result) -> bool:
+        if time.time() - lock_stat.st_mtime > self._stale_timeout:
+            return True
+
+        try:
+            with open(self._lock_path, 'rt', encoding='utf-8') as lock_file:
+                hostname, pid, _ = lock_file.read().split('\n', 2)
+
+        except (OSError, ValueError):
+            # The leader has not written the lock content yet
+            return False
+
+        if hostname != socket.gethostname() or os.name != 'posix':
+            return False
+
+        try:
+            os.kill(int(pid), 0)
+
+        except ProcessLookupError:
+            return True
+
+        except (PermissionError, ValueError):
+            pass
+
+        return False
+
+    def _break_stale_lock(self, lock_stat: os.stat_result) -> None:
+        # Do not remove a lock created by a new leader after the stale lock was examined
+        with contextlib.suppress(OSError):
+            current_stat = os.stat(self._lock_path)
+            if (current_stat.st_ino, current_stat.st_mtime_ns) == (lock_stat.st_ino, lock_stat.st_mtime_ns):
+                os.unlink(self._lock_path)
+
+    def _publish(self, key: str, value: typing.Any) -> None:
+        temporary_path = f'{self._result_path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary_path, 'wt', encoding='utf-8') as result_file:
+                json.dump({'key': key, 'time': time.time(), 'value': value}, result_file)
+
+            os.replace(temporary_path, self._result_path)
+
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(temporary_path)
+
+    def _read_result(self, key: str, not_before: float) -> typing.Tuple[bool, typing.Any]:
+        try:
+            with open(self._result_path, 'rt', encoding='utf-8') as result_file:
+                result = json.load(result_file)
+
+        except (OSError, ValueError):
+            return False, None
+
+        if not isinstance(result, dict) or result.get('key') != key:
+            return False, None
+
+        # Results published before this process started waiting may be outdated
+        if not isinstance(result.get('time'), (int, float)) or result['time'] < not_before:
+            return False, None
+
+        return True, result.get('value')
@@ -0,0 +1,129 @@
+# This module contains the persistent index of tags used by the native Git reader.
+#
+# Finding the nearest tag needs the commit each tag points to; peeling an annotated tag
+# means reading the tag object. The index stores the peeled commit and its generation
+# number of every tag in the common Git directory and is valid as long as the tags
+# signature of the repository (stat data of packed-refs, reftable stack and tag
+# directories) does not change. When it changes, only the tags that were added or moved
+# are peeled again.
+
+import os
+import typing
+
+from . import cache
+from . import gitrepository
+from . import tagmatch
+
+
+# Number of tag patterns whose tags are indexed at the same time
+_MAX_INDEXES = 4
+
+
+class TagEntry(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    oid: str
+    # Commit the tag points to; None if the tag can not be used for describing (a
+    # lightweight tag or a tag of an object other than commit)
+    peeled: typing.Optional[str]
+    # Generation number of the peeled commit; None if it is not in the commit-graph
+    generation: typing.Optional[int]
+
+
+def read_tags(
+    repository: gitrepository.Repository,
+    tag_matcher: typing.Optional[tagmatch.TagMatcher] = None,
+    use_index: bool = True,
+) -> typing.Dict[str, TagEntry]:
+    '''
+    Return entries of the tags (matching tag_matcher if given) by ref name in name order.
+    '''
+
+    if not use_index:
+        return {ref.name: _read_entry(repository, ref) for ref in _iter_tag_refs(repository, tag_matcher)}
+
+    index_file = cache.CacheFile(os.path.join(repository.common_dir, 'vcsver-tags'), max_entries=_MAX_INDEXES)
+    matcher_signature = tag_matcher.get_signature() if tag_matcher else ''
+    tags_signature = repository.tags_signature()
+
+    indexed_entries = _parse_entries(index_file.get(matcher_signature), tags_signature)
+    if indexed_entries is not None:
+        return {name: _refresh_generation(repository, entry) for name, entry in indexed_entries.items()}
+
+    # Entries of unchanged tags are reused from the indexes of any tag pattern
+    reusable_entries: typing.Dict[str, TagEntry] = {}
+    for other_matcher_signature in index_file.keys():
+        reusable_entries.update(_parse_entries(index_file.get(other_matcher_signature)) or {})
+
+    entries: typing.Dict[str, TagEntry] = {}
+    for ref in _iter_tag_refs(repository, tag_matcher):
+        entry = reusable_entries.get(ref.name)
+        if entry is None or entry.oid != ref.oid:
+            entry = _read_entry(repository, ref)
+
+        entries[ref.name] = _refresh_generation(repository, entry)
+
+    index_file.put(matcher_signature, {
+        'signature': tags_signature,
+        'tags': {name: list(entry) for name, entry in entries.items()},
+    })
+
+    return entries
+
+
+def _parse_entries(
+    index: typing.Any,
+    tags_signature: typing.Optional[str] = None,
+) -> typing.Optional[typing.Dict[str, TagEntry]]:
+    # Return the entries of the index (if it is valid and has tags_signature if given)
+    if not isinstance(index, dict) or not isinstance(index.get('tags'), dict):
+        return None
+
+    if tags_signature is not None and index.get('signature') != tags_signature:
+        return None
+
+    try:
+        return {name: TagEntry(*entry) for name, entry in index['tags'].items()}
+
+    except TypeError:
+        return None
+
+
+def _iter_tag_refs(
+    repository: gitrepository.Repository,
+    tag_matcher: typing.Optional[tagmatch.TagMatcher],
+) -> typing.Iterator[gitrepository.Ref]:
+    def matches(name: str) -> bool:
+        return tag_matcher is None or tag_matcher(name[len('refs/tags/'):])
+
+    # The tags not matching are never read (nor their tag objects peeled)
+    prefix = 'refs/tags/' + (tag_matcher.get_prefix() if tag_matcher else '')
+
+    return repository.iter_refs(prefix, matches if tag_matcher else None)
+
+
+def _read_entry(repository: gitrepository.Repository, ref: gitrepository.Ref) -> TagEntry:
+    if ref.peeled is None:
+        object_type, peeled = repository.peel(ref.oid)
+        if peeled == ref.oid or object_type != 'commit':
+            return TagEntry(oid=ref.oid, peeled=None, generation=None)
+
+    else:
+        # Peeled objects other than commits are never reached when walking the history
+        peeled = ref.peeled
+
+    return TagEntry(oid=ref.oid, peeled=peeled, generation=repository.generation(peeled))
+
+
+def _refresh_generation(repository: gitrepository.Repository, entry: TagEntry) -> TagEntry:
+    # The commit may have been added to the commit-graph after the entry was indexed
+    if entry.peeled is None or entry.generation is not None:
+        return entry
+
+    return entry._replace(generation=repository.generation(entry.peeled))
+
+
+def get_generations(tag_entries: typing.Mapping[str, TagEntry]) -> typing.Dict[str, typing.Optional[int]]:
+    '''
+    Return generation numbers of the tagged commits.
+    '''
+
+    return {entry.peeled: entry.generation for entry in tag_entries.values() if entry.peeled is not None}
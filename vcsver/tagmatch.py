@@ -0,0 +1,192 @@
+# This module contains matching tag names with glob patterns the same way as
+# git describe --match and --exclude do.
+#
+# The patterns are matched against the whole tag name (without refs/tags/ and the tag
+# prefix, if any) and, as in git, * and ? match also slashes.
+
+import re
+import typing
+
+from . import errors
+
+
+Patterns = typing.Union[str, typing.Sequence[str]]
+
+_CHARACTER_CLASSES = {
+    'alnum': r'a-zA-Z0-9',
+    'alpha': r'a-zA-Z',
+    'blank': r' \t',
+    'digit': r'0-9',
+    'lower': r'a-z',
+    'punct': re.escape('!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'),
+    'space': r'\s',
+    'upper': r'A-Z',
+    'xdigit': r'0-9a-fA-F',
+}
+
+
+class TagMatcher:
+    '''
+    Tag name filter: a tag matches if it starts with the prefix and the rest of the name
+    matches any of the patterns (or there are no patterns) and none of the excludes.
+    '''
+
+    def __init__(self, patterns: Patterns = (), excludes: Patterns = (), prefix: str = '') -> None:
+        super().__init__()
+
+        if not isinstance(prefix, str):
+            raise errors.InvalidConfigurationError(f'Invalid tag prefix: {prefix}')
+
+        self.patterns: typing.Tuple[str, ...] = _as_tuple(patterns)
+        self.excludes: typing.Tuple[str, ...] = _as_tuple(excludes)
+        self.prefix: str = prefix
+
+        self._pattern_regexes: typing.List[typing.Pattern[str]] = [_translate(pattern) for pattern in self.patterns]
+        self._exclude_regexes: typing.List[typing.Pattern[str]] = [_translate(exclude) for exclude in self.excludes]
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns or self.excludes or self.prefix)
+
+    def __call__(self, name: str) -> bool:
+        if not name.startswith(self.prefix):
+            return False
+
+        name = name[len(self.prefix):]
+        if self._pattern_regexes and not any(regex.fullmatch(name) for regex in self._pattern_regexes):
+            return False
+
+        return not any(regex.fullmatch(name) for regex in self._exclude_regexes)
+
+    def get_prefix(self) -> str:
+        '''
+        Return the longest prefix all matching tag names start with.
+        '''
+
+        if not self.patterns:
+            return self.prefix
+
+        prefixes = [_get_literal_prefix(pattern) for pattern in self.patterns]
+        prefix = prefixes[0]
+        for other_prefix in prefixes[1:]:
+            while not other_prefix.startswith(prefix):
+                prefix = prefix[:-1]
+
+        return self.prefix + prefix
+
+    def get_git_args(self) -> typing.Tuple[str, ...]:
+        '''
+        Return the git describe arguments selecting the same tags.
+        '''
+
+        prefix = escape(self.prefix)
+        patterns = self.patterns or (('*',) if self.prefix else ())
+
+        return (
+            tuple(arg for pattern in patterns for arg in ('--match', prefix + pattern))
+            + tuple(arg for exclude in self.excludes for arg in ('--exclude', prefix + exclude))
+        )
+
+    def get_signature(self) -> str:
+        return ' '.join(
+            ([f'prefix={self.prefix}'] if self.prefix else [])
+            + [f'match={pattern}' for pattern in self.patterns]
+            + [f'exclude={exclude}' for exclude in self.excludes]
+        )
+
+    def strip_prefix(self, name: str) -> str:
+        '''
+        Return the tag name without the prefix.
+        '''
+
+        return name[len(self.prefix):] if name.startswith(self.prefix) else name
+
+
+def escape(name: str) -> str:
+    '''
+    Return pattern matching only name.
+    '''
+
+    return re.sub(r'([*?[\\])', r'\\\1', name)
+
+
+def _as_tuple(patterns: Patterns) -> typing.Tuple[str, ...]:
+    if isinstance(patterns, str):
+        return (patterns,)
+
+    if not all(isinstance(pattern, str) for pattern in patterns):
+        raise errors.InvalidConfigurationError(f'Invalid tag patterns: {patterns}')
+
+    return tuple(patterns)
+
+
+def _get_literal_prefix(pattern: str) -> str:
+    match = re.match(r'[^*?[\\]*', pattern)
+    assert match is not None
+    return match.group(0)
+
+
+def _translate(pattern: str) -> typing.Pattern[str]:
+    regex = []
+    index = 0
+    while index < len(pattern):
+        character = pattern[index]
+        index += 1
+
+        if character == '*':
+            regex.append('.*')
+
+        elif character == '?':
+            regex.append('.')
+
+        elif character == '\\' and index < len(pattern):
+            regex.append(re.escape(pattern[index]))
+            index += 1
+
+        elif character == '[':
+            bracket_regex, index = _translate_bracket(pattern, index)
+            regex.append(bracket_regex)
+
+        else:
+            regex.append(re.escape(character))
+
+    return re.compile(''.join(regex), re.DOTALL)
+
+
+def _translate_bracket(pattern: str, index: int) -> typing.Tuple[str, int]:
+    # Return regex of the bracket expression starting after [ and the index after it
+    start = index
+    negated = index < len(pattern) and pattern[index] in '!^'
+    if negated:
+        index += 1
+
+    characters = []
+    first = True
+    while index < len(pattern) and (pattern[index] != ']' or first):
+        first = False
+        if pattern.startswith('[:', index):
+            end = pattern.find(':]', index + 2)
+            class_name = pattern[index + 2:end] if end != -1 else ''
+            if class_name not in _CHARACTER_CLASSES:
+                raise errors.InvalidConfigurationError(f'Invalid tag pattern: {pattern}')
+
+            characters.append(_CHARACTER_CLASSES[class_name])
+            index = end + 2
+            continue
+
+        escaped = pattern[index] == '\\' and index + 1 < len(pattern)
+        if escaped:
+            index += 1
+
+        is_range = characters and index + 1 < len(pattern) and pattern[index + 1] != ']'
+        if pattern[index] == '-' and not escaped and is_range:
+            characters.append('-')
+
+        else:
+            characters.append(re.escape(pattern[index]))
+
+        index += 1
+
+    if index >= len(pattern):
+        raise errors.InvalidConfigurationError(f'Invalid tag pattern: {pattern[start - 1:]}')
+
+    return f'[{"^" if negated else ""}{"".join(characters)}]', index + 1
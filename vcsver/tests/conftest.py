@@ -0,0 +1,78 @@
+import os
+import pathlib
+import subprocess
+import typing
+
+import pytest
+
+from .. import gitdiscovery
+
+
+class GitRepository:
+    def __init__(self, path: pathlib.Path) -> None:
+        super().__init__()
+
+        self.path = path
+        self._timestamp = 1600000000
+
+    def git(self, *args: str, check: bool = True) -> str:
+        return self.git_output(*args, check=check).decode().strip()
+
+    def git_output(self, *args: str, check: bool = True) -> bytes:
+        self._timestamp += 60
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME='Author',
+            GIT_AUTHOR_EMAIL='author@example.com',
+            GIT_AUTHOR_DATE=f'{self._timestamp} +0000',
+            GIT_COMMITTER_NAME='Committer',
+            GIT_COMMITTER_EMAIL='committer@example.com',
+            GIT_COMMITTER_DATE=f'{self._timestamp} +0000',
+            GIT_CONFIG_GLOBAL=os.devnull,
+            GIT_CONFIG_NOSYSTEM='1',
+        )
+
+        return subprocess.run(
+            ('git',) + args,
+            cwd=self.path,
+            env=env,
+            check=check,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        ).stdout
+
+    def write(self, filename: str, content: str) -> None:
+        file_path = self.path / filename
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding='utf-8')
+
+    def commit(
+        self,
+        message: str = 'Commit',
+        filename: typing.Optional[str] = None,
+        timestamp: typing.Optional[int] = None,
+    ) -> str:
+        self.write(filename or 'file.txt', f'{message}\n')
+        self.git('add', '--all')
+        if timestamp is not None:
+            # The commit gets the timestamp; the following commands continue from it
+            self._timestamp = timestamp - 60
+
+        self.git('commit', '--quiet', '--message', message)
+        return self.git('rev-parse', 'HEAD')
+
+    def tag(self, name: str, annotated: bool = True, revision: str = 'HEAD') -> None:
+        if annotated:
+            self.git('tag', '--annotate', '--message', name, name, revision)
+
+        else:
+            self.git('tag', name, revision)
+
+
+@pytest.fixture
+def git_repository(tmp_path) -> GitRepository:
+    repository = GitRepository(tmp_path / 'repository')
+    repository.path.mkdir()
+    repository.git('init', '--quiet', '--initial-branch=main')
+    gitdiscovery.clear_cache()
+    return repository
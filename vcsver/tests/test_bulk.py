@@ -0,0 +1,86 @@
+import pytest
+
+from .. import bulk
+from .. import git
+from .. import pep440
+from .. import vcsver
+
+
+def _build_history(git_repository):
+    git_repository.commit('Initial')
+    git_repository.commit('Second')
+    git_repository.tag('1.0')
+    git_repository.commit('Third')
+
+    git_repository.git('checkout', '--quiet', '-b', 'feature')
+    git_repository.commit('Feature 1', filename='feature.txt')
+    git_repository.tag('1.1.dev0')
+    git_repository.commit('Feature 2', filename='feature.txt')
+
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.commit('Fourth')
+    git_repository.git('merge', '--quiet', '--no-edit', 'feature')
+    git_repository.commit('Fifth')
+    git_repository.tag('1.1', annotated=False)
+    git_repository.commit('Sixth')
+
+
+def _checkout_versions(git_repository, commits, **version_args):
+    versions = []
+    for commit in commits:
+        git_repository.git('checkout', '--quiet', '--detach', commit)
+        versions.append(vcsver.get_version(
+            read_revision_info=git.GitRevisionInfoReader(str(git_repository.path), native=False),
+            **version_args,
+        ))
+
+    return versions
+
+
+@pytest.mark.parametrize(
+    'revisions',
+    (
+        ('main',),
+        ('1.0..main',),
+        ('feature', '^main~2'),
+    ),
+)
+def test_versions_match_checked_out_versions(git_repository, revisions):
+    _build_history(git_repository)
+
+    commit_versions = list(bulk.iter_versions(
+        revisions,
+        path=str(git_repository.path),
+        create_version=pep440.post_with_dev,
+    ))
+
+    commits = git_repository.git('rev-list', '--topo-order', '--reverse', *revisions).split()
+    assert [commit_version.commit for commit_version in commit_versions] == commits
+    assert [commit_version.version for commit_version in commit_versions] == _checkout_versions(
+        git_repository,
+        commits,
+        create_version=pep440.post_with_dev,
+    )
+
+
+def test_versions_without_tags(git_repository):
+    git_repository.commit('Initial')
+    git_repository.git('checkout', '--quiet', '-b', 'feature')
+    git_repository.commit('Feature', filename='feature.txt')
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.commit('Second')
+    git_repository.git('merge', '--quiet', '--no-edit', 'feature')
+
+    commit_versions = list(bulk.iter_versions(
+        ('main',),
+        path=str(git_repository.path),
+        root_version='0.1',
+        parse_tag=lambda tag: tag,
+    ))
+
+    commits = git_repository.git('rev-list', '--topo-order', '--reverse', 'main').split()
+    assert [commit_version.version for commit_version in commit_versions] == _checkout_versions(
+        git_repository,
+        commits,
+        root_version='0.1',
+    )
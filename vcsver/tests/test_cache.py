@@ -0,0 +1,46 @@
+from .. import cache
+
+
+def test_put_and_get(tmp_path):
+    cache_path = str(tmp_path / 'cache')
+
+    cache_file = cache.CacheFile(cache_path)
+    assert cache_file.get('key') is None
+
+    cache_file.put('key', ['value', 1])
+
+    assert cache.CacheFile(cache_path).get('key') == ['value', 1]
+    assert [path.name for path in tmp_path.iterdir()] == ['cache']
+
+
+def test_oldest_entries_are_dropped(tmp_path):
+    cache_path = str(tmp_path / 'cache')
+
+    cache_file = cache.CacheFile(cache_path, max_entries=2)
+    cache_file.put('first', 1)
+    cache_file.put('second', 2)
+    cache_file.put('first', 1)
+    cache_file.put('third', 3)
+
+    cache_file = cache.CacheFile(cache_path, max_entries=2)
+    assert cache_file.get('first') == 1
+    assert cache_file.get('second') is None
+    assert cache_file.get('third') == 3
+
+
+def test_invalid_cache_file_is_ignored(tmp_path):
+    cache_path = tmp_path / 'cache'
+    cache_path.write_text('{invalid', encoding='utf-8')
+
+    cache_file = cache.CacheFile(str(cache_path))
+    assert cache_file.get('key') is None
+
+    cache_file.put('key', 'value')
+    assert cache.CacheFile(str(cache_path)).get('key') == 'value'
+
+
+def test_write_failure_is_ignored(tmp_path):
+    cache_file = cache.CacheFile(str(tmp_path / 'missing-directory' / 'cache'))
+    cache_file.put('key', 'value')
+
+    assert cache_file.get('key') == 'value'
@@ -0,0 +1,91 @@
+import json
+
+from .. import cli
+
+
+def test_versions(git_repository, capsys):
+    first = git_repository.commit('Initial')
+    git_repository.tag('1.0')
+    second = git_repository.commit('Second')
+
+    exit_code = cli.main([
+        'versions',
+        '--path', str(git_repository.path),
+        '--create-version', 'pep440.post_with_dev',
+        'main',
+    ])
+
+    assert exit_code == 0
+    assert capsys.readouterr().out == (
+        f'{first} 1.0\n'
+        f'{second} 1.0.post0.dev1+{second[:10]}\n'
+    )
+
+
+def test_versions_with_tag_pattern(git_repository, capsys):
+    first = git_repository.commit('Initial')
+    git_repository.tag('v1.0')
+    second = git_repository.commit('Second')
+    git_repository.tag('deploy-1')
+    git_repository.tag('v1.1-rc1')
+
+    exit_code = cli.main([
+        'versions',
+        '--path', str(git_repository.path),
+        '--match', 'v*',
+        '--exclude', '*-rc*',
+    ])
+
+    assert exit_code == 0
+    assert capsys.readouterr().out == (
+        f'{first} v1.0\n'
+        f'{second} v1.0.post1+{second[:10]}\n'
+    )
+
+
+def test_versions_outside_repository(tmp_path, capsys):
+    exit_code = cli.main(['versions', '--path', str(tmp_path)])
+
+    assert exit_code == 1
+    assert capsys.readouterr().err.startswith('vcsver: ')
+
+
+def test_packages(git_repository, capsys):
+    git_repository.write('pkg-a/a.txt', 'a')
+    git_repository.commit('Initial', filename='libs/pkg-b/b.txt')
+    git_repository.tag('pkg-a/1.0')
+    git_repository.tag('b-1.0')
+    git_repository.commit('A 1', filename='pkg-a/a.txt')
+    commit = git_repository.commit('Other', filename='README')
+
+    exit_code = cli.main([
+        'packages',
+        '--path', str(git_repository.path),
+        'pkg-a',
+        'libs/pkg-b=b-',
+    ])
+
+    assert exit_code == 0
+    assert capsys.readouterr().out == (
+        f'pkg-a 1.0.post1+{commit[:10]}\n'
+        'libs/pkg-b 1.0\n'
+    )
+
+
+def test_repositories_json(git_repository, tmp_path, capsys):
+    git_repository.commit('Initial')
+    git_repository.tag('1.0')
+
+    exit_code = cli.main([
+        'repositories',
+        '--json',
+        str(git_repository.path),
+        str(tmp_path),
+    ])
+
+    assert exit_code == 1
+    entries = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(entries, key=lambda entry: entry['path']) == [
+        {'path': str(tmp_path), 'version': None, 'error': 'No revision info available.'},
+        {'path': str(git_repository.path), 'version': '1.0', 'error': None},
+    ]
@@ -0,0 +1,132 @@
+import pytest
+
+from .. import commitgraph
+from .. import gitrepository
+
+
+def _build_history_with_merges(git_repository):
+    git_repository.commit('Initial commit')
+    for branch in ('first', 'second', 'third'):
+        git_repository.git('checkout', '--quiet', '-b', branch, 'main')
+        git_repository.commit(f'Commit to {branch}', filename=f'{branch}.txt')
+
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.commit('Commit to main')
+    git_repository.git('merge', '--quiet', '--no-edit', 'first', 'second', 'third')
+    git_repository.commit('Commit after octopus merge')
+
+
+@pytest.mark.parametrize(
+    'write_args',
+    (
+        (),
+        ('--split',),
+    ),
+)
+def test_read_commit_graph(
+    git_repository,
+    write_args,
+):
+    _build_history_with_merges(git_repository)
+
+    if write_args:
+        # Create chain of two layers
+        git_repository.git('commit-graph', 'write', '--reachable', *write_args)
+        git_repository.commit('Commit in second layer')
+
+    git_repository.git('commit-graph', 'write', '--reachable', *write_args)
+
+    commit_graph = commitgraph.CommitGraph.open(str(git_repository.path / '.git' / 'objects'))
+    assert commit_graph is not None
+    assert commit_graph.has_generations
+
+    generations = {}
+    for line in reversed(git_repository.git('rev-list', '--parents', '--topo-order', 'HEAD').split('\n')):
+        oid, *parents = line.split(' ')
+        generations[oid] = 1 + max((generations[parent] for parent in parents), default=0)
+
+        assert commit_graph.commit(oid) == commitgraph.CommitGraphEntry(
+            tree=git_repository.git('rev-parse', f'{oid}^{{tree}}'),
+            parents=tuple(parents),
+            timestamp=int(git_repository.git('show', '--no-patch', '--format=%ct', oid)),
+            generation=generations[oid],
+        )
+
+
+def test_commit_graph_does_not_exist(git_repository):
+    git_repository.commit()
+
+    assert commitgraph.CommitGraph.open(str(git_repository.path / '.git' / 'objects')) is None
+
+
+def test_repository_reads_commits_not_in_commit_graph(git_repository):
+    _build_history_with_merges(git_repository)
+    git_repository.git('commit-graph', 'write', '--reachable')
+    new_commit = git_repository.commit('Commit not in commit-graph')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert repository.commit(new_commit).generation is None
+    assert repository.commit(repository.commit(new_commit).parents[0]).generation == 4
+
+
+@pytest.mark.parametrize(
+    ('seed', 'data', 'expected_hash'),
+    (
+        (0, b'', 0x00000000),
+        (0, b'Hello world!', 0x627b0c2c),
+        (0, b'The quick brown fox jumps over the lazy dog', 0x2e4ff723),
+    ),
+)
+def test_murmur3(seed, data, expected_hash):
+    assert commitgraph.murmur3(seed, data) == expected_hash
+    assert commitgraph.murmur3(seed, data, signed_bytes=True) == expected_hash
+
+
+def test_murmur3_signed_bytes():
+    assert commitgraph.murmur3(0, 'ü.txt'.encode(), signed_bytes=True) != commitgraph.murmur3(0, 'ü.txt'.encode())
+
+
+@pytest.mark.parametrize('split', (False, True))
+def test_changed_path_filter(git_repository, split):
+    git_repository.write('pkg/sub/a.txt', 'a')
+    git_repository.write('päck/ü.txt', 'a')
+    git_repository.commit('Initial', filename='README')
+    if split:
+        git_repository.git('commit-graph', 'write', '--reachable', '--changed-paths', '--split')
+
+    changes = {
+        git_repository.commit('Change 1', filename='pkg/sub/a.txt'): ('pkg', 'pkg/sub', 'pkg/sub/a.txt'),
+        git_repository.commit('Change 2', filename='päck/ü.txt'): ('päck', 'päck/ü.txt'),
+    }
+    git_repository.git('commit-graph', 'write', '--reachable', '--changed-paths', *(('--split',) if split else ()))
+    commit_graph = commitgraph.CommitGraph.open(str(git_repository.path / '.git' / 'objects'))
+    assert commit_graph is not None
+
+    for commit, changed_paths in changes.items():
+        changed_path_filter = commit_graph.changed_path_filter(commit)
+        assert changed_path_filter is not None
+        assert [
+            path
+            for path in ('pkg', 'pkg/sub', 'pkg/sub/a.txt', 'päck', 'päck/ü.txt', 'other')
+            if changed_path_filter.may_contain(path.encode())
+        ] == list(changed_paths)
+
+
+def test_changed_path_filter_without_filters(git_repository):
+    commit = git_repository.commit()
+    git_repository.git('commit-graph', 'write', '--reachable')
+    commit_graph = commitgraph.CommitGraph.open(str(git_repository.path / '.git' / 'objects'))
+    assert commit_graph is not None
+
+    assert commit_graph.changed_path_filter(commit) is None
+
+
+def test_repository_does_not_read_changed_paths_if_disabled(git_repository):
+    commit = git_repository.commit()
+    git_repository.git('commit-graph', 'write', '--reachable', '--changed-paths')
+    git_repository.git('config', 'commitGraph.readChangedPaths', 'false')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert repository.changed_path_filter(commit) is None
@@ -18,6 +18,14 @@ from .. import (
             {'future-option': 'future-value'},
         ),
         ({'tool': {'vcsver': {'source': 'git'}}}, {'source': 'git'}),
+        (
+            {'tool': {'vcsver': {'source': 'git', 'dirty': 'tracked-only'}}},
+            {'source': 'git', 'dirty': 'tracked-only'},
+        ),
+        (
+            {'tool': {'vcsver': {'source': 'git', 'timeout': 10, 'timeout_fallback': 'skip-dirty'}}},
+            {'source': 'git', 'timeout': 10, 'timeout_fallback': 'skip-dirty'},
+        ),
     ),
 )
 def test_read(
@@ -50,6 +58,17 @@ def test_pyproject_toml_not_found(
     'config_data',
     (
         {'source': 'foo'},
+        {'source': 'git', 'dirty': 'sometimes'},
+        {'source': 'git', 'dirty_digest': 'yes'},
+        {'source': 'git', 'tag_pattern': 1},
+        {'source': 'git', 'tag_selection': 'newest'},
+        {'source': 'git', 'tag_prefix': ['pkg/']},
+        {'source': 'git', 'path_scope': 1},
+        {'source': 'git', 'timeout': 0},
+        {'source': 'git', 'timeout': '10'},
+        {'source': 'git', 'timeout': True},
+        {'source': 'git', 'timeout_fallback': 'skip'},
+        {'source': 'git', 'tag_exclude': ['*-rc*', 1]},
     ),
 )
 def test_read_invalid_config(
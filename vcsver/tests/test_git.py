@@ -1,21 +1,46 @@
+import asyncio
+import subprocess
+import time
+
 import pytest
 
+from .. import errors
+from .. import gitrepository
+from .. import tagmatch
 from .. import types
 from .. import git
+from .. import gitcommands
+from .. import gitcoprocess
 
 
 def test_outside_git_clone(fake_process):
+    fake_process.register_subprocess(
+        ('git', 'describe', '--dirty', '--always', '--long', '--abbrev=10'),
+        stdout=b'fatal: not a git repository (or any of the parent directories): .git',
+        returncode=128,
+    )
+
     fake_process.register_subprocess(
         ('git', 'rev-parse', '--show-toplevel'),
         stdout=b'',
         returncode=128,
     )
 
-    read_revision_info = git.GitRevisionInfoReader()
+    read_revision_info = git.GitRevisionInfoReader(native=False)
 
     assert read_revision_info() is None
 
 
+def test_outside_git_clone_without_git(fake_process, tmp_path, monkeypatch):
+    # Unregistered commands fail the test; the repository is searched without running git
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(tmp_path))
+
+    read_revision_info = git.GitRevisionInfoReader(str(tmp_path))
+
+    assert read_revision_info() is None
+    assert not fake_process.calls
+
+
 def test_with_no_commits(fake_process):
     fake_process.register_subprocess(
         ('git', 'rev-parse', '--show-toplevel'),
@@ -28,7 +53,7 @@ def test_with_no_commits(fake_process):
         returncode=128,
     )
 
-    read_revision_info = git.GitRevisionInfoReader()
+    read_revision_info = git.GitRevisionInfoReader(native=False)
 
     assert read_revision_info() == types.RevisionInfo(
         latest_tag=None,
@@ -54,20 +79,807 @@ def test_with_commits(
     commits,
     expected_revision_info,
 ):
+    # Unregistered commands fail the test; only describe (and rev-list when there are no tags) are run
     fake_process.register_subprocess(
-        ('git', 'rev-parse', '--show-toplevel'),
-        stdout=b'/git/repo',
+        ('git', 'describe', '--dirty', '--always', '--long', '--abbrev=10'),
+        stdout=describe_output,
     )
 
+    fake_process.register_subprocess(
+        ('git', 'rev-list', '--count', 'HEAD'),
+        stdout=f'{commits}\n'.encode(),
+    )
+
+    read_revision_info = git.GitRevisionInfoReader(native=False)
+    assert read_revision_info() == expected_revision_info
+
+    expected_git_calls = 1 if expected_revision_info.latest_tag is not None else 2
+    assert len(fake_process.calls) == expected_git_calls
+
+
+def test_count_first_parent_commits(fake_process):
     fake_process.register_subprocess(
         ('git', 'describe', '--dirty', '--always', '--long', '--abbrev=10'),
-        stdout=describe_output,
+        stdout=b'912dd9d',
+    )
+
+    fake_process.register_subprocess(
+        ('git', 'rev-list', '--count', '--first-parent', 'HEAD'),
+        stdout=b'3\n',
+    )
+
+    read_revision_info = git.GitRevisionInfoReader(native=False, first_parent=True)
+    assert read_revision_info() == types.RevisionInfo(latest_tag=None, distance=3, commit='912dd9d', dirty=False)
+
+
+@pytest.mark.parametrize(
+    ('dirty', 'diff_args'),
+    (
+        ('tracked-only', ('--ignore-submodules=dirty',)),
+        ('ignore-submodules', ('--ignore-submodules=all',)),
+    ),
+)
+def test_dirty_check_mode(fake_process, dirty, diff_args):
+    fake_process.register_subprocess(
+        ('git', 'describe', '--always', '--long', '--abbrev=10'),
+        stdout=b'1.0-1-g912dd9d',
     )
 
     fake_process.register_subprocess(
-        ('git', 'log', '--oneline'),
-        stdout='\n'.join(str(index) for index in range(0, commits)).encode() + b'\n'
+        ('git', 'diff', '--quiet', *diff_args, 'HEAD', '--'),
+        returncode=1,
     )
 
-    read_revision_info = git.GitRevisionInfoReader()
+    read_revision_info = git.GitRevisionInfoReader(native=False, dirty=dirty)
+    assert read_revision_info() == types.RevisionInfo(latest_tag='1.0', distance=1, commit='912dd9d', dirty=True)
+
+
+def test_skip_dirty_check(fake_process):
+    fake_process.register_subprocess(
+        ('git', 'describe', '--always', '--long', '--abbrev=10'),
+        stdout=b'1.0-1-g912dd9d',
+    )
+
+    read_revision_info = git.GitRevisionInfoReader(native=False, dirty='skip')
+    assert read_revision_info() == types.RevisionInfo(latest_tag='1.0', distance=1, commit='912dd9d', dirty=False)
+    assert len(fake_process.calls) == 1
+
+
+def test_invalid_dirty_check_mode():
+    with pytest.raises(errors.InvalidConfigurationError):
+        git.GitRevisionInfoReader(dirty='sometimes')
+
+
+@pytest.mark.parametrize('modified', (False, True))
+def test_dirty_digest(git_repository, modified):
+    git_repository.commit('Initial')
+    git_repository.tag('1.0')
+    if modified:
+        git_repository.write('file.txt', 'Modified\n')
+
+    revision_infos = [
+        git.GitRevisionInfoReader(str(git_repository.path), native=native, dirty_digest=True)()
+        for native in (True, False)
+    ]
+
+    assert revision_infos[0] == revision_infos[1]
+    assert revision_infos[0].dirty == modified
+    assert (revision_infos[0].dirty_digest is not None) == modified
+
+
+@pytest.mark.parametrize('dirty', ('full', 'tracked-only', 'ignore-submodules'))
+@pytest.mark.parametrize('modified', (False, True))
+def test_dirty_check_after_describe(git_repository, dirty, modified):
+    git_repository.commit('Initial', filename='file.txt')
+    git_repository.tag('1.0')
+    # Only the modification time changes unless the file is modified
+    git_repository.write('file.txt', 'Modified\n' if modified else 'Initial\n')
+
+    # With the skip-dirty timeout fallback, the working tree is checked in its own step
+    revision_infos = [
+        git.GitRevisionInfoReader(str(git_repository.path), native=False, dirty=dirty, **reader_args)()
+        for reader_args in ({}, {'timeout': 60, 'timeout_fallback': 'skip-dirty'})
+    ]
+
+    assert revision_infos[0] == revision_infos[1]
+    assert revision_infos[0].dirty == modified
+
+
+@pytest.mark.parametrize('change', (None, 'modified', 'committed'))
+def test_dirty_check_mode_with_submodule(git_repository, change):
+    git_repository.commit('Initial')
+    git_repository.tag('1.0')
+    git_repository.git(
+        '-c', 'protocol.file.allow=always',
+        'submodule', 'add', '--quiet', str(git_repository.path), 'submodule',
+    )
+    git_repository.commit('Add submodule')
+    if change is not None:
+        git_repository.write('submodule/file.txt', 'Modified\n')
+
+    if change == 'committed':
+        git_repository.git('-C', 'submodule', 'commit', '--quiet', '--all', '--message', 'Modified')
+
+    expected_dirty = {
+        'full': change is not None,
+        'tracked-only': change == 'committed',
+        'ignore-submodules': False,
+    }
+    assert {
+        dirty: {
+            git.GitRevisionInfoReader(str(git_repository.path), native=native, dirty=dirty)().dirty
+            for native in (True, False)
+        }
+        for dirty in expected_dirty
+    } == {dirty: {expected} for dirty, expected in expected_dirty.items()}
+
+
+@pytest.mark.parametrize(
+    ('tag_pattern', 'tag_exclude'),
+    (
+        ('v*', ()),
+        (('v1.*', 'release/*'), ()),
+        ((), 'deploy-*'),
+        ('v*', ('*-rc*', 'v2.*')),
+        ('none-*', ()),
+    ),
+)
+@pytest.mark.parametrize('packed', (False, True))
+def test_tag_pattern(git_repository, tag_pattern, tag_exclude, packed):
+    git_repository.commit('Initial')
+    git_repository.tag('v1.0')
+    git_repository.commit('Second')
+    git_repository.tag('release/1.1')
+    git_repository.commit('Third')
+    git_repository.tag('v2.0-rc1')
+    git_repository.tag('deploy-1')
+    git_repository.commit('Fourth')
+    git_repository.tag('deploy-2')
+    git_repository.tag('v2.0', annotated=False)
+    if packed:
+        git_repository.git('pack-refs', '--all')
+
+    revision_infos = [
+        git.GitRevisionInfoReader(
+            str(git_repository.path),
+            native=native,
+            use_cache=False,
+            tag_pattern=tag_pattern,
+            tag_exclude=tag_exclude,
+        )()
+        for native in (True, False)
+    ]
+
+    assert revision_infos[0] == revision_infos[1]
+
+
+@pytest.mark.parametrize('commit_graph', (False, True))
+@pytest.mark.parametrize('first_parent', (False, True))
+def test_highest_version_with_clock_skew(git_repository, commit_graph, first_parent):
+    # git describe visits the parent of the (older) tagged commit through the side branch
+    # first and counts it, but only the commits not reachable from the tag are counted
+    root = git_repository.commit('Root', timestamp=1600001000)
+    git_repository.commit('Tagged', timestamp=1600000900)
+    git_repository.tag('2.0')
+    git_repository.git('checkout', '--quiet', '-b', 'side', root)
+    git_repository.commit('Side', filename='side.txt', timestamp=1600001100)
+    git_repository.tag('1.0')
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.git('merge', '--quiet', '--no-ff', '--no-commit', 'side')
+    git_repository.commit('Merge', filename='merge.txt', timestamp=1600001200)
+    if commit_graph:
+        git_repository.git('commit-graph', 'write', '--reachable')
+
+    revision_infos = [
+        git.GitRevisionInfoReader(
+            str(git_repository.path),
+            native=native,
+            use_cache=False,
+            first_parent=first_parent,
+            tag_selection='highest-version',
+        )()
+        for native in (True, False)
+    ]
+
+    assert revision_infos[0] == revision_infos[1]
+    assert (revision_infos[0].latest_tag, revision_infos[0].distance) == ('2.0', 2)
+
+
+@pytest.mark.parametrize('native', (True, False))
+@pytest.mark.parametrize('commit_graph', (False, True))
+@pytest.mark.parametrize(
+    ('tag_selection', 'tag_pattern', 'expected_latest_tag', 'expected_distance'),
+    (
+        ('nearest', (), '1.4.1', 4),
+        ('highest-version', (), 'v2.0', 4),
+        ('highest-version', '1.*', '1.4.1', 4),
+        ('highest-version', 'none-*', None, 6),
+    ),
+)
+def test_tag_selection(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    git_repository,
+    native,
+    commit_graph,
+    tag_selection,
+    tag_pattern,
+    expected_latest_tag,
+    expected_distance,
+):
+    # A maintenance branch is merged to the main line after the 2.0 release
+    git_repository.commit('Initial')
+    git_repository.tag('1.4.0')
+    git_repository.git('branch', 'maintenance')
+    git_repository.commit('Main 1')
+    git_repository.tag('v2.0')
+    git_repository.tag('2.1.dev0', annotated=False)
+    git_repository.commit('Main 2')
+    git_repository.git('checkout', '--quiet', 'maintenance')
+    git_repository.commit('Fix 1', filename='fix.txt')
+    git_repository.tag('1.4.1')
+    git_repository.tag('release', annotated=False)
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.git('merge', '--quiet', '--no-edit', 'maintenance')
+    git_repository.commit('Main 3')
+    git_repository.git('checkout', '--quiet', '-b', 'unmerged', 'maintenance')
+    git_repository.commit('Fix 2', filename='fix.txt')
+    git_repository.tag('3.0')
+    git_repository.git('checkout', '--quiet', 'main')
+    if commit_graph:
+        git_repository.git('commit-graph', 'write', '--reachable')
+
+    revision_info = git.GitRevisionInfoReader(
+        str(git_repository.path),
+        native=native,
+        use_cache=False,
+        tag_pattern=tag_pattern,
+        tag_selection=tag_selection,
+    )()
+
+    assert (revision_info.latest_tag, revision_info.distance) == (expected_latest_tag, expected_distance)
+
+
+def test_invalid_tag_selection():
+    with pytest.raises(errors.InvalidConfigurationError):
+        git.GitRevisionInfoReader(tag_selection='newest')
+
+
+def _build_monorepo(git_repository):
+    git_repository.write('pkg-a/a.txt', 'a')
+    git_repository.write('pkg-b/b.txt', 'b')
+    git_repository.commit('Initial', filename='README')
+    git_repository.tag('pkg-a/v1.0')
+    git_repository.tag('pkg-b/v2.0')
+    git_repository.commit('B 1', filename='pkg-b/b.txt')
+    git_repository.commit('A 1', filename='pkg-a/a.txt')
+    git_repository.git('checkout', '--quiet', '-b', 'side')
+    git_repository.commit('A 2', filename='pkg-a/side.txt')
+    git_repository.commit('Other', filename='README')
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.commit('B 2', filename='pkg-b/b.txt')
+    # The merge result of pkg-b differs from both parents
+    git_repository.git('merge', '--quiet', '--no-ff', '--no-commit', 'side')
+    git_repository.write('pkg-b/merge.txt', 'resolved')
+    git_repository.git('add', '--all')
+    git_repository.git('commit', '--quiet', '--no-edit')
+    git_repository.commit('Other 2', filename='README')
+
+
+@pytest.mark.parametrize('native', (True, False))
+@pytest.mark.parametrize('use_cache', (False, True))
+@pytest.mark.parametrize('commit_graph_args', (None, (), ('--changed-paths',)))
+@pytest.mark.parametrize(
+    ('reader_args', 'expected_latest_tag', 'expected_distance'),
+    (
+        ({'tag_prefix': 'pkg-a/', 'path_scope': 'pkg-a'}, 'v1.0', 2),
+        ({'tag_prefix': 'pkg-b/', 'path_scope': 'pkg-b'}, 'v2.0', 3),
+        ({'tag_prefix': 'pkg-b/', 'path_scope': 'pkg-b', 'tag_selection': 'highest-version'}, 'v2.0', 3),
+        ({'tag_prefix': 'pkg-a/', 'path_scope': ''}, 'v1.0', 7),
+        ({'tag_prefix': 'pkg-a/', 'path_scope': 'pkg-c'}, 'v1.0', 0),
+        ({'tag_prefix': 'pkg-a/', 'tag_pattern': 'none'}, None, 8),
+        ({'tag_prefix': 'pkg-a/', 'tag_pattern': 'none', 'path_scope': 'pkg-a'}, None, 3),
+        ({'tag_prefix': 'pkg-b/', 'tag_pattern': 'none', 'path_scope': 'pkg-b', 'first_parent': True}, None, 4),
+    ),
+)
+def test_path_scope(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    git_repository,
+    native,
+    use_cache,
+    commit_graph_args,
+    reader_args,
+    expected_latest_tag,
+    expected_distance,
+):
+    _build_monorepo(git_repository)
+    if commit_graph_args is not None:
+        git_repository.git('commit-graph', 'write', '--reachable', *commit_graph_args)
+
+    revision_info = git.GitRevisionInfoReader(
+        str(git_repository.path),
+        native=native,
+        use_cache=use_cache,
+        single_flight=False,
+        **reader_args,
+    )()
+
+    assert (revision_info.latest_tag, revision_info.distance) == (expected_latest_tag, expected_distance)
+
+
+@pytest.mark.parametrize('native', (True, False))
+def test_path_scope_relative_to_path(git_repository, native):
+    _build_monorepo(git_repository)
+
+    revision_info = git.GitRevisionInfoReader(
+        str(git_repository.path / 'pkg-a'),
+        native=native,
+        tag_prefix='pkg-a/',
+        path_scope='.',
+    )()
+
+    assert (revision_info.latest_tag, revision_info.distance) == ('v1.0', 2)
+
+
+def test_path_scope_extends_cached_distance(git_repository):
+    _build_monorepo(git_repository)
+    reader = git.GitRevisionInfoReader(str(git_repository.path), tag_prefix='pkg-a/', path_scope='pkg-a')
+    assert reader().distance == 2
+
+    git_repository.commit('B 3', filename='pkg-b/b.txt')
+    git_repository.commit('A 3', filename='pkg-a/a.txt')
+
+    assert reader().distance == 3
+
+
+def test_path_scope_outside_working_tree(git_repository, tmp_path):
+    git_repository.commit('Initial')
+
+    with pytest.raises(errors.InvalidConfigurationError):
+        git.GitRevisionInfoReader(str(git_repository.path), path_scope=str(tmp_path))()
+
+
+@pytest.mark.parametrize('native', (True, False))
+@pytest.mark.parametrize(
+    'reader_args',
+    (
+        {},
+        {'dirty': 'tracked-only', 'dirty_digest': True},
+        {'dirty': 'ignore-submodules'},
+        {'revision': 'side'},
+        {'tag_prefix': 'pkg-a/', 'path_scope': 'pkg-a'},
+        {'tag_prefix': 'pkg-b/', 'path_scope': 'pkg-b', 'tag_selection': 'highest-version'},
+        {'tag_pattern': 'none', 'first_parent': True},
+    ),
+)
+def test_read_async(git_repository, native, reader_args):
+    _build_monorepo(git_repository)
+    git_repository.write('pkg-a/a.txt', 'modified')
+
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), native=native, **reader_args)
+
+    assert asyncio.run(read_revision_info.read_async()) == read_revision_info()
+
+
+@pytest.mark.parametrize('native', (True, False))
+def test_read_async_outside_repository(tmp_path, native):
+    read_revision_info = git.GitRevisionInfoReader(str(tmp_path), native=native)
+
+    assert asyncio.run(read_revision_info.read_async()) is None
+
+
+def test_read_async_runs_independent_commands_concurrently(git_repository, mocker):
+    git_repository.commit('Initial')
+    git_repository.tag('1.0')
+    git_repository.write('file.txt', 'modified')
+
+    create_subprocess_exec = asyncio.create_subprocess_exec
+    running_commands = []
+    concurrent_commands = []
+
+    async def create_process(*args, **kwargs):
+        process = await create_subprocess_exec(*args, **kwargs)
+        running_commands.append(args[1])
+        concurrent_commands.append(list(running_commands))
+        communicate = process.communicate
+
+        async def communicate_and_finish(*communicate_args):
+            try:
+                return await communicate(*communicate_args)
+
+            finally:
+                running_commands.remove(args[1])
+
+        process.communicate = communicate_and_finish
+        return process
+
+    mocker.patch.object(asyncio, 'create_subprocess_exec', create_process)
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), native=False, dirty='tracked-only')
+
+    assert asyncio.run(read_revision_info.read_async()) == read_revision_info()
+    assert ['describe', 'diff'] in concurrent_commands
+
+
+def test_tag_pattern_does_not_read_other_tags(git_repository, mocker):
+    git_repository.commit('Initial')
+    git_repository.tag('v1.0')
+    for index in range(0, 10):
+        git_repository.tag(f'nightly-{index}')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+    read_ref_spy = mocker.spy(repository, 'read_ref')
+    peel_spy = mocker.spy(repository, 'peel')
+
+    tags = git.get_describable_tags(repository, tagmatch.TagMatcher('v*'))
+
+    assert [ref.name for ref in tags.values()] == ['refs/tags/v1.0']
+    assert [call[0][0] for call in read_ref_spy.call_args_list] == ['refs/tags/v1.0']
+    assert peel_spy.call_count == 1
+
+
+def _build_history(git_repository, scenario):
+    if scenario == 'no-commits':
+        return
+
+    git_repository.commit('Initial commit')
+
+    if scenario == 'untagged':
+        git_repository.commit('Second commit')
+
+    elif scenario == 'tagged-head':
+        git_repository.tag('1.0')
+
+    elif scenario == 'lightweight-tag':
+        git_repository.tag('0.9', annotated=False)
+        git_repository.commit('Second commit')
+
+    elif scenario in ('tagged-ancestor', 'packed'):
+        git_repository.tag('1.0')
+        git_repository.commit('Second commit')
+        git_repository.tag('1.1', annotated=False)
+        git_repository.commit('Third commit')
+
+    elif scenario in ('merge', 'untagged-merge'):
+        if scenario == 'merge':
+            git_repository.tag('1.0')
+
+        git_repository.git('checkout', '--quiet', '-b', 'feature')
+        git_repository.commit('Feature 1', filename='feature.txt')
+        git_repository.commit('Feature 2', filename='feature.txt')
+        if scenario == 'merge':
+            git_repository.tag('1.1-rc1')
+
+        git_repository.git('checkout', '--quiet', 'main')
+        git_repository.commit('Main 1')
+        git_repository.git('merge', '--quiet', '--no-edit', 'feature')
+
+    elif scenario == 'same-commit-tags':
+        git_repository.tag('1.0')
+        git_repository.tag('1.0-final')
+        git_repository.commit('Second commit')
+
+    elif scenario == 'commit-graph':
+        git_repository.tag('1.0')
+        git_repository.git('checkout', '--quiet', '-b', 'feature')
+        git_repository.commit('Feature', filename='feature.txt')
+        git_repository.tag('1.1-rc1')
+        git_repository.git('checkout', '--quiet', 'main')
+        for index in range(0, 3):
+            git_repository.commit(f'Main {index}')
+
+        git_repository.git('merge', '--quiet', '--no-edit', 'feature')
+        git_repository.git('commit-graph', 'write', '--reachable')
+        git_repository.commit('Commit not in commit-graph')
+
+    if scenario == 'packed':
+        git_repository.git('gc', '--quiet', '--aggressive')
+
+
+@pytest.mark.parametrize(
+    'scenario',
+    (
+        'no-commits',
+        'untagged',
+        'tagged-head',
+        'lightweight-tag',
+        'tagged-ancestor',
+        'merge',
+        'untagged-merge',
+        'same-commit-tags',
+        'packed',
+        'commit-graph',
+    ),
+)
+@pytest.mark.parametrize('dirty', (False, True))
+@pytest.mark.parametrize('first_parent', (False, True))
+def test_native_reader_matches_git(
+    git_repository,
+    scenario,
+    dirty,
+    first_parent,
+):
+    _build_history(git_repository, scenario)
+    if dirty and scenario != 'no-commits':
+        git_repository.write('file.txt', 'Modified\n')
+
+    path = str(git_repository.path)
+    native_reader = git.GitRevisionInfoReader(path=path, first_parent=first_parent)
+    native_revision_info = native_reader._read_native(  # pylint: disable=protected-access
+        gitrepository.Repository.discover(path),
+    )
+
+    assert native_revision_info == git.GitRevisionInfoReader(path=path, native=False, first_parent=first_parent)()
+
+
+@pytest.mark.parametrize('revision', ('main', 'feature', '1.0', 'lightweight', 'HEAD~1', 'FULL_ID'))
+@pytest.mark.parametrize('native', (False, True))
+def test_read_revision(git_repository, revision, native):
+    git_repository.commit('Initial')
+    git_repository.tag('1.0')
+    git_repository.git('checkout', '--quiet', '-b', 'feature')
+    git_repository.commit('Feature', filename='feature.txt')
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.commit('Second')
+    git_repository.tag('lightweight', annotated=False)
+    git_repository.commit('Third')
+
+    if revision == 'FULL_ID':
+        revision = git_repository.git('rev-parse', 'feature')
+
+    commit = git_repository.git('rev-parse', f'{revision}^{{commit}}')
+    git_repository.git('checkout', '--quiet', '--detach', revision)
+    expected_revision_info = git.GitRevisionInfoReader(str(git_repository.path), native=False)()
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.write('file.txt', 'Modified\n')
+
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), native=native, revision=revision)
+
+    assert expected_revision_info.commit == commit[:10]
     assert read_revision_info() == expected_revision_info
+
+
+def test_read_unknown_revision(git_repository):
+    git_repository.commit()
+
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), revision='unknown')
+
+    with pytest.raises(errors.RevisionInfoNotFoundError):
+        read_revision_info()
+
+
+def test_native_reader_falls_back_to_git(
+    mocker,
+    git_repository,
+):
+    git_repository.commit()
+    git_repository.tag('1.0')
+
+    mocker.patch(
+        'vcsver.gitrepository.Repository.discover',
+        side_effect=errors.UnsupportedRepositoryError('Unsupported'),
+    )
+    read_with_git_mock = mocker.patch(
+        'vcsver.git.GitRevisionInfoReader._read_with_git',
+        return_value=mocker.sentinel.revision_info,
+    )
+
+    read_revision_info = git.GitRevisionInfoReader(path=str(git_repository.path))
+
+    assert read_revision_info() == mocker.sentinel.revision_info
+    read_with_git_mock.assert_called_once_with(None, None)
+
+
+def _make_reads_time_out(mocker, native, timeout):
+    if native:
+        # The native reader is left running in its thread after the timeout
+        mocker.patch.object(
+            git.GitRevisionInfoReader,
+            '_read_with_repository',
+            side_effect=lambda *args: time.sleep(timeout * 5),
+        )
+
+    else:
+        mocker.patch('vcsver.gitcommands.run', side_effect=subprocess.TimeoutExpired('git', timeout))
+        mocker.patch('vcsver.gitcommands.run_async', side_effect=subprocess.TimeoutExpired('git', timeout))
+
+
+@pytest.mark.parametrize('use_asyncio', (False, True))
+@pytest.mark.parametrize('native', (True, False))
+def test_timeout_uses_last_known_revision_info(git_repository, mocker, caplog, native, use_asyncio):
+    git_repository.commit('First commit')
+    git_repository.tag('1.0')
+    git_repository.commit('Second commit')
+
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), native=native, timeout=0.2)
+    expected_revision_info = read_revision_info()
+
+    _make_reads_time_out(mocker, native, 0.2)
+
+    if use_asyncio:
+        revision_info = asyncio.run(read_revision_info.read_async())
+
+    else:
+        revision_info = read_revision_info()
+
+    assert revision_info == expected_revision_info
+    assert 'took longer than 0.2 seconds' in caplog.text
+
+
+def test_timeout_does_not_use_revision_info_of_other_commit(git_repository, mocker):
+    git_repository.commit('First commit')
+    git_repository.tag('1.0')
+
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), native=False, timeout=0.2)
+    read_revision_info()
+    git_repository.commit('Second commit')
+
+    _make_reads_time_out(mocker, False, 0.2)
+
+    with pytest.raises(errors.RevisionInfoNotFoundError):
+        read_revision_info()
+
+
+@pytest.mark.parametrize('use_asyncio', (False, True))
+@pytest.mark.parametrize('native', (True, False))
+def test_timeout_fallback_skips_dirty_check(git_repository, mocker, caplog, native, use_asyncio):
+    git_repository.commit()
+    git_repository.tag('1.0')
+    git_repository.write('file.txt', 'modified')
+
+    timeout = 2
+    if native:
+        mocker.patch.object(
+            git.GitRevisionInfoReader,
+            '_is_dirty',
+            side_effect=lambda *args: time.sleep(timeout * 5),
+        )
+
+    else:
+        run = gitcommands.run
+        run_async = gitcommands.run_async
+
+        def run_slow_dirty_check(command, path=None, timeout=None):
+            if 'diff-index' in command.args:
+                raise subprocess.TimeoutExpired('git', timeout)
+
+            return run(command, path, timeout)
+
+        async def run_slow_dirty_check_async(command, path=None, timeout=None):
+            if 'diff-index' in command.args:
+                raise subprocess.TimeoutExpired('git', timeout)
+
+            return await run_async(command, path, timeout)
+
+        mocker.patch('vcsver.gitcommands.run', side_effect=run_slow_dirty_check)
+        mocker.patch('vcsver.gitcommands.run_async', side_effect=run_slow_dirty_check_async)
+
+    read_before = mocker.spy(
+        git.GitRevisionInfoReader,
+        '_read_before_async' if use_asyncio else '_read_before',
+    )
+    read_revision_info = git.GitRevisionInfoReader(
+        str(git_repository.path),
+        native=native,
+        timeout=timeout,
+        timeout_fallback='skip-dirty',
+    )
+
+    start = time.monotonic()
+    if use_asyncio:
+        revision_info = asyncio.run(read_revision_info.read_async())
+
+    else:
+        revision_info = read_revision_info()
+
+    assert revision_info == types.RevisionInfo(
+        latest_tag='1.0',
+        distance=0,
+        commit=git_repository.git('rev-parse', '--short=10', 'HEAD'),
+        dirty=False,
+    )
+    assert 'without checking whether the working tree is dirty' in caplog.text
+    # The tag and distance read before the timeout are used instead of reading again
+    assert read_before.call_count == 1
+    assert time.monotonic() - start < timeout * 1.5
+
+
+@pytest.mark.parametrize('reader_args', ({'timeout': 0}, {'timeout': 1, 'timeout_fallback': 'ignore'}))
+def test_invalid_timeout(reader_args):
+    with pytest.raises(errors.InvalidConfigurationError):
+        git.GitRevisionInfoReader(**reader_args)
+
+
+def test_native_reader_caches_tag_and_distance(
+    mocker,
+    git_repository,
+):
+    git_repository.commit('Initial commit')
+    git_repository.tag('1.0')
+    git_repository.commit('Second commit')
+
+    describe_spy = mocker.spy(git.history, 'describe')
+    read_revision_info = git.GitRevisionInfoReader(path=str(git_repository.path))
+
+    expected_revision_info = read_revision_info()
+    assert expected_revision_info.latest_tag == '1.0'
+    assert read_revision_info() == expected_revision_info
+    assert describe_spy.call_count == 1
+
+    git_repository.tag('1.1')
+    assert read_revision_info().latest_tag == '1.1'
+    assert describe_spy.call_count == 2
+
+    git_repository.git('tag', '--force', '--annotate', '--message', '1.1', '1.1', 'HEAD^')
+    assert read_revision_info().distance == 1
+    assert describe_spy.call_count == 3
+
+    # Distance of a new commit is extended from the cached distance of its parent
+    git_repository.commit('Third commit')
+    assert read_revision_info().distance == 2
+    assert describe_spy.call_count == 3
+
+
+@pytest.mark.parametrize(
+    'scenario',
+    (
+        'linear',
+        'merge-of-cached-commits',
+        'merge-of-new-branch',
+        'tag-on-new-commit',
+        'tag-on-merged-branch',
+    ),
+)
+def test_native_reader_extends_cached_distance(
+    git_repository,
+    scenario,
+):
+    read_revision_info = git.GitRevisionInfoReader(path=str(git_repository.path))
+
+    git_repository.commit('Initial commit')
+    git_repository.tag('1.0')
+    git_repository.commit('Second commit')
+
+    if scenario in ('merge-of-cached-commits', 'merge-of-new-branch', 'tag-on-merged-branch'):
+        git_repository.git('checkout', '--quiet', '-b', 'feature', 'HEAD^')
+        git_repository.commit('Feature', filename='feature.txt')
+        if scenario == 'merge-of-cached-commits':
+            read_revision_info()
+
+        elif scenario == 'tag-on-merged-branch':
+            git_repository.tag('1.1-rc1')
+
+        git_repository.git('checkout', '--quiet', 'main')
+
+    read_revision_info()
+
+    if scenario == 'linear':
+        git_repository.commit('Third commit')
+        git_repository.commit('Fourth commit')
+
+    elif scenario == 'tag-on-new-commit':
+        git_repository.commit('Third commit')
+        git_repository.tag('1.1')
+        git_repository.commit('Fourth commit')
+
+    else:
+        git_repository.git('merge', '--quiet', '--no-edit', 'feature')
+
+    path = str(git_repository.path)
+    assert read_revision_info() == git.GitRevisionInfoReader(path=path, native=False)()
+
+
+def test_native_reader_reads_missing_objects_with_coprocess(git_repository, tmp_path):
+    git_repository.commit()
+    git_repository.tag('1.0')
+    tag = git_repository.git('rev-parse', '1.0')
+
+    object_source = tmp_path / 'object-source'
+    git_repository.git('clone', '--quiet', '--no-local', str(git_repository.path), str(object_source))
+    (git_repository.path / '.git' / 'objects' / tag[:2] / tag[2:]).unlink()
+
+    with gitcoprocess.GitCoprocess(str(object_source)) as coprocess:
+        read_revision_info = git.GitRevisionInfoReader(
+            str(git_repository.path),
+            use_cache=False,
+            single_flight=False,
+            coprocess=coprocess,
+        )
+
+        assert read_revision_info().latest_tag == '1.0'
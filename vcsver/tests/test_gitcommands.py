@@ -0,0 +1,60 @@
+import asyncio
+import subprocess
+import time
+
+import pytest
+
+from .. import gitcommands
+
+
+def _get_head_and_tree_steps():
+    git_rev_parse, git_log = yield [
+        gitcommands.Command(('rev-parse', 'HEAD')),
+        gitcommands.Command(('log', '--format=%T', '-1')),
+    ]
+    head = git_rev_parse.stdout.decode().strip()
+
+    git_cat_file, = yield [gitcommands.Command(('cat-file', '--batch-check'), input=f'{head}\n'.encode())]
+
+    return git_cat_file.stdout.decode().split()[1], git_log.stdout.decode().strip()
+
+
+@pytest.mark.parametrize('use_asyncio', (False, True))
+def test_run_steps(git_repository, use_asyncio):
+    git_repository.commit('Initial')
+    steps = _get_head_and_tree_steps()
+
+    if use_asyncio:
+        result = asyncio.run(gitcommands.run_steps_async(steps, str(git_repository.path)))
+
+    else:
+        result = gitcommands.run_steps(steps, str(git_repository.path))
+
+    assert result == ('commit', git_repository.git('rev-parse', 'HEAD^{tree}'))
+
+
+@pytest.mark.parametrize('use_asyncio', (False, True))
+def test_run_failing_command(tmp_path, use_asyncio):
+    command = gitcommands.Command(('rev-parse', '--show-toplevel'))
+
+    if use_asyncio:
+        result = asyncio.run(gitcommands.run_async(command, str(tmp_path)))
+
+    else:
+        result = gitcommands.run(command, str(tmp_path))
+
+    assert result.returncode != 0
+    assert result.args == ('git', 'rev-parse', '--show-toplevel')
+
+
+@pytest.mark.parametrize('use_asyncio', (False, True))
+def test_run_steps_after_deadline(git_repository, use_asyncio):
+    git_repository.commit('Initial')
+    steps = _get_head_and_tree_steps()
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        if use_asyncio:
+            asyncio.run(gitcommands.run_steps_async(steps, str(git_repository.path), time.monotonic()))
+
+        else:
+            gitcommands.run_steps(steps, str(git_repository.path), time.monotonic())
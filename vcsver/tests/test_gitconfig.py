@@ -0,0 +1,22 @@
+from .. import gitconfig
+
+
+def test_read_config(tmp_path):
+    config_path = tmp_path / 'config'
+    config_path.write_text(
+        '[core]\n'
+        '\trepositoryformatversion = 1\n'
+        '\tbare = false ; comment\n'
+        '[remote "origin"]\n'
+        '\turl = "https://example.com/#repo"\n'
+        '[extensions]\n'
+        '\tnoop\n',
+        encoding='utf-8',
+    )
+
+    assert gitconfig.read_config(str(config_path)) == {
+        'core.repositoryformatversion': '1',
+        'core.bare': 'false',
+        'remote.origin.url': 'https://example.com/#repo',
+        'extensions.noop': 'true',
+    }
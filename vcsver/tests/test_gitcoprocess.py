@@ -0,0 +1,109 @@
+import subprocess
+import sys
+
+import pytest
+
+from .. import gitcoprocess
+from .. import gitrepository
+
+
+def test_coprocess_reads_objects(git_repository):
+    commit = git_repository.commit()
+    git_repository.tag('1.0')
+    tag = git_repository.git('rev-parse', '1.0')
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    with gitcoprocess.GitCoprocess(str(git_repository.path)) as coprocess:
+        objects = list(coprocess.read_many((commit, tag, '0' * 40, commit)))
+        object_types = list(coprocess.read_types((tag, '0' * 40)))
+
+        assert coprocess.read(commit) == repository.objects.read(commit)
+        assert coprocess.read_type(commit) == 'commit'
+
+    assert objects == [
+        (commit, repository.objects.read(commit)),
+        (tag, repository.objects.read(tag)),
+        ('0' * 40, None),
+        (commit, repository.objects.read(commit)),
+    ]
+    assert object_types == [(tag, 'tag'), ('0' * 40, None)]
+
+
+def test_coprocess_reads_names_with_spaces(git_repository):
+    git_repository.commit(filename='file with space')
+    git_repository.commit(filename='file missing')
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    with gitcoprocess.GitCoprocess(str(git_repository.path)) as coprocess:
+        objects = dict(coprocess.read_many(('HEAD:file with space', 'HEAD:file missing', 'HEAD:no such file')))
+
+    assert objects == {
+        'HEAD:file with space': repository.objects.read(git_repository.git('rev-parse', 'HEAD:file with space')),
+        'HEAD:file missing': repository.objects.read(git_repository.git('rev-parse', 'HEAD:file missing')),
+        'HEAD:no such file': None,
+    }
+
+
+def test_coprocess_reads_while_iterating_replies(git_repository):
+    commit = git_repository.commit()
+
+    with gitcoprocess.GitCoprocess(str(git_repository.path)) as coprocess:
+        for name, git_object in coprocess.read_many((commit, commit)):
+            assert coprocess.read(name) == git_object
+
+
+def test_coprocess_rejects_unexpected_reply(tmp_path):
+    cat_file = gitcoprocess._CatFileProcess(  # pylint: disable=protected-access
+        (sys.executable, '-c', 'import sys; sys.stdin.readline(); print("unexpected reply", flush=True)'),
+        str(tmp_path),
+        timeout=10,
+    )
+
+    with pytest.raises(OSError):
+        cat_file.request(('HEAD',))
+
+    cat_file.close()
+
+
+def test_coprocess_restarts_after_crash(git_repository):
+    commit = git_repository.commit()
+
+    with gitcoprocess.GitCoprocess(str(git_repository.path)) as coprocess:
+        assert coprocess.read_type(commit) == 'commit'
+
+        coprocess._batch_check._process.kill()  # pylint: disable=protected-access
+
+        assert coprocess.read_type(commit) == 'commit'
+
+
+def test_coprocess_closes_process_output(git_repository):
+    commit = git_repository.commit()
+
+    with gitcoprocess.GitCoprocess(str(git_repository.path)) as coprocess:
+        assert coprocess.read_type(commit) == 'commit'
+        process = coprocess._batch_check._process  # pylint: disable=protected-access
+
+    assert process.stdout.closed
+
+
+def test_coprocess_times_out(tmp_path):
+    cat_file = gitcoprocess._CatFileProcess(  # pylint: disable=protected-access
+        (sys.executable, '-c', 'import time; time.sleep(30)'),
+        str(tmp_path),
+        timeout=0.1,
+    )
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        cat_file.request(('HEAD',))
+
+    cat_file.close()
+
+
+def test_coprocess_streams_rev_list(git_repository):
+    commits = [git_repository.commit(f'Commit {index}') for index in range(3)]
+
+    with gitcoprocess.GitCoprocess(str(git_repository.path)) as coprocess:
+        assert list(coprocess.iter_rev_list('--reverse', 'HEAD')) == commits
+
+        with pytest.raises(subprocess.CalledProcessError):
+            list(coprocess.iter_rev_list('unknown-revision'))
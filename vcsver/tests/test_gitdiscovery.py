@@ -0,0 +1,111 @@
+import os
+import subprocess
+
+import pytest
+
+from .. import gitdiscovery
+from .. import gitrepository
+
+
+def _git_location(path):
+    result = subprocess.run(
+        (
+            'git', 'rev-parse', '--path-format=absolute',
+            '--absolute-git-dir', '--git-common-dir', '--show-toplevel',
+        ),
+        cwd=path,
+        check=False,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        return None
+
+    return gitdiscovery.Location(*result.stdout.decode().splitlines())
+
+
+@pytest.mark.parametrize(
+    'scenario',
+    (
+        'repository',
+        'subdirectory',
+        'worktree',
+        'separate-git-dir',
+        'submodule',
+        'environment',
+        'ceiling',
+        'ceiling-repository',
+        'no-repository',
+    ),
+)
+def test_find_repository_matches_git(git_repository, tmp_path, monkeypatch, scenario):
+    git_repository.commit('Initial')
+    path = git_repository.path
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(tmp_path))
+
+    if scenario == 'subdirectory':
+        path = path / 'directory' / 'subdirectory'
+        path.mkdir(parents=True)
+
+    elif scenario == 'worktree':
+        path = tmp_path / 'worktree'
+        git_repository.git('worktree', 'add', '--quiet', str(path))
+
+    elif scenario == 'separate-git-dir':
+        path = tmp_path / 'separate'
+        path.mkdir()
+        subprocess.run(
+            ('git', 'init', '--quiet', f'--separate-git-dir={tmp_path / "separate.git"}'),
+            cwd=path,
+            check=True,
+        )
+
+    elif scenario == 'submodule':
+        git_repository.git(
+            '-c', 'protocol.file.allow=always',
+            'submodule', 'add', '--quiet', str(git_repository.path), 'submodule',
+        )
+        path = path / 'submodule' / 'directory'
+        path.mkdir()
+
+    elif scenario == 'environment':
+        path = tmp_path / 'elsewhere'
+        path.mkdir()
+        monkeypatch.setenv('GIT_DIR', os.path.relpath(git_repository.path / '.git', path))
+        monkeypatch.setenv('GIT_WORK_TREE', str(git_repository.path))
+
+    elif scenario in ('ceiling', 'ceiling-repository'):
+        path = path / 'directory' / 'subdirectory'
+        path.mkdir(parents=True)
+        ceiling = path.parent if scenario == 'ceiling' else path
+        monkeypatch.setenv('GIT_CEILING_DIRECTORIES', f'{tmp_path}:{ceiling}')
+
+    elif scenario == 'no-repository':
+        path = tmp_path / 'no-repository'
+        path.mkdir()
+
+    location = gitdiscovery.find_repository(str(path))
+
+    assert location == _git_location(path)
+    assert (location is None) == (scenario in ('ceiling', 'no-repository'))
+
+    if location is not None:
+        repository = gitrepository.Repository.discover(str(path))
+        assert (repository.git_dir, repository.common_dir, repository.work_tree) == location
+
+
+def test_find_repository_caches_location(tmp_path, monkeypatch):
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(tmp_path))
+    gitdiscovery.clear_cache()
+
+    assert gitdiscovery.find_repository(str(tmp_path)) is None
+
+    subprocess.run(('git', 'init', '--quiet'), cwd=tmp_path, check=True)
+    assert gitdiscovery.find_repository(str(tmp_path)) is None
+
+    gitdiscovery.clear_cache()
+    assert gitdiscovery.find_repository(str(tmp_path)) == gitdiscovery.Location(
+        git_dir=str(tmp_path / '.git'),
+        common_dir=str(tmp_path / '.git'),
+        work_tree=str(tmp_path),
+    )
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from .. import gitindex
+
+
+def _ls_files(git_repository):
+    entries = []
+    for line in git_repository.git_output('ls-files', '--stage', '-z').split(b'\0'):
+        if line:
+            info, path = line.split(b'\t', 1)
+            mode, oid, stage = info.split(b' ')
+            entries.append((path, int(mode, 8), oid.decode(), int(stage)))
+
+    return entries
+
+
+def _read_entries(git_repository):
+    index = gitindex.read_index(str(git_repository.path / '.git' / 'index'))
+    return [(entry.path, entry.mode, entry.oid, entry.stage) for entry in index.entries]
+
+
+@pytest.mark.parametrize('version', (2, 3, 4))
+@pytest.mark.parametrize('split', (False, True))
+def test_read_index(git_repository, version, split):
+    git_repository.git('update-index', f'--index-version={version}')
+    if split:
+        git_repository.git('update-index', '--split-index')
+
+    for index in range(0, 30):
+        git_repository.write(f'directory/{"subdirectory/" * (index % 3)}file-{index}.txt', f'{index}\n')
+
+    os.symlink('directory', git_repository.path / 'symlink')
+    git_repository.git('add', '--all')
+    # Paths of at least 4095 bytes do not fit in the name length of the entry flags (nor in
+    # the file system, so the file is only added to the index)
+    git_repository.git(
+        'update-index',
+        '--add',
+        '--cacheinfo',
+        f'100644,{git_repository.git("rev-parse", ":directory/file-0.txt")},{"long-directory-name/" * 210}file.txt',
+    )
+    git_repository.git('update-index', '--chmod=+x', 'directory/file-0.txt')
+    git_repository.git('commit', '--quiet', '--message', 'Initial')
+
+    # With split index, these are stored as replaced, deleted and new entries of the split index
+    git_repository.write('directory/file-6.txt', 'Modified\n')
+    git_repository.git('rm', '--quiet', 'directory/file-3.txt')
+    git_repository.write('directory/new.txt', 'New\n')
+    git_repository.git('add', '--all')
+    git_repository.git('update-index', '--skip-worktree', 'directory/file-9.txt')
+
+    if split:
+        assert list((git_repository.path / '.git').glob('sharedindex.*'))
+
+    assert _read_entries(git_repository) == _ls_files(git_repository)
+
+    index = gitindex.read_index(str(git_repository.path / '.git' / 'index'))
+    skip_worktree_entries = [entry.path for entry in index.entries if entry.skip_worktree]
+    assert skip_worktree_entries == [b'directory/file-9.txt']
+
+
+def test_read_cache_tree(git_repository):
+    git_repository.write('directory/subdirectory/file.txt', 'File\n')
+    git_repository.write('other/file.txt', 'File\n')
+    git_repository.write('file.txt', 'File\n')
+    git_repository.git('add', '--all')
+    tree = git_repository.git('write-tree')
+
+    index = gitindex.read_index(str(git_repository.path / '.git' / 'index'))
+
+    assert index.cache_tree == {
+        b'': tree,
+        b'directory': git_repository.git('rev-parse', f'{tree}:directory'),
+        b'directory/subdirectory': git_repository.git('rev-parse', f'{tree}:directory/subdirectory'),
+        b'other': git_repository.git('rev-parse', f'{tree}:other'),
+    }
+
+    git_repository.write('directory/subdirectory/file.txt', 'Modified\n')
+    git_repository.git('add', 'directory/subdirectory/file.txt')
+
+    index = gitindex.read_index(str(git_repository.path / '.git' / 'index'))
+
+    assert set(index.cache_tree) == {b'other'}
+
+
+def test_read_missing_index(tmp_path):
+    assert gitindex.read_index(str(tmp_path / 'index')) is None
+
+
+@pytest.mark.parametrize(
+    'words, bit_count, positions',
+    (
+        # Run of 2 words of zeros followed by 1 literal word
+        (((1 << 33) | (2 << 1), 0b1001), 200, [128, 131]),
+        # Run of 1 word of ones followed by no literal words
+        (((1 << 1) | 1,), 60, list(range(0, 60))),
+        ((), 0, []),
+    ),
+)
+def test_read_ewah_bitmap(words, bit_count, positions):
+    data = (
+        bit_count.to_bytes(4, 'big')
+        + len(words).to_bytes(4, 'big')
+        + b''.join(word.to_bytes(8, 'big') for word in words)
+        + (0).to_bytes(4, 'big')
+    )
+
+    assert gitindex._read_ewah_bitmap(data, 0) == (positions, len(data))  # pylint: disable=protected-access
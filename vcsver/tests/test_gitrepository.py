@@ -0,0 +1,110 @@
+import pytest
+
+from .. import errors
+from .. import gitrepository
+
+
+@pytest.mark.parametrize('packed', (False, True))
+def test_read_objects(
+    git_repository,
+    packed,
+):
+    for index in range(0, 20):
+        git_repository.write('file.txt', ''.join(f'line {line}\n' for line in range(0, 100 + index)))
+        git_repository.git('add', 'file.txt')
+        git_repository.git('commit', '--quiet', '--message', f'Commit {index}')
+
+    git_repository.tag('1.0')
+
+    if packed:
+        git_repository.git('gc', '--quiet', '--aggressive')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path / 'subdirectory'))
+
+    for oid in git_repository.git('rev-list', '--objects', '--all').split('\n'):
+        oid = oid.split(' ')[0]
+        object_type = git_repository.git('cat-file', '-t', oid)
+
+        assert repository.objects.read_type(oid) == object_type
+        assert repository.objects.read(oid) == (
+            object_type,
+            git_repository.git_output('cat-file', object_type, oid),
+        )
+
+    head = git_repository.git('rev-parse', 'HEAD')
+    assert repository.head() == head
+    assert repository.commit(head).parents == (git_repository.git('rev-parse', 'HEAD^'),)
+    assert repository.peel(repository.read_ref('refs/tags/1.0')) == ('commit', head)
+    assert repository.abbreviate(head, 4) == git_repository.git('rev-parse', '--short=4', 'HEAD')
+
+
+def test_read_packed_refs(tmp_path):
+    packed_refs_path = tmp_path / 'packed-refs'
+    packed_refs_path.write_text(
+        '# pack-refs with: peeled fully-peeled sorted\n'
+        f'{"1" * 40} refs/heads/main\n'
+        f'{"2" * 40} refs/tags/1.0\n'
+        f'^{"1" * 40}\n',
+        encoding='utf-8',
+    )
+
+    assert gitrepository.read_packed_refs(str(packed_refs_path)) == {
+        'refs/heads/main': gitrepository.Ref(name='refs/heads/main', oid='1' * 40, peeled=None),
+        'refs/tags/1.0': gitrepository.Ref(name='refs/tags/1.0', oid='2' * 40, peeled='1' * 40),
+    }
+
+
+@pytest.mark.parametrize(
+    'config',
+    (
+        '[core]\n\trepositoryformatversion = 1\n[extensions]\n\tobjectFormat = sha256\n',
+        '[core]\n\trepositoryformatversion = 1\n[extensions]\n\tunknownExtension = true\n',
+        '[core]\n\trepositoryformatversion = 2\n',
+        '[core]\n\tbare = true\n',
+    ),
+)
+def test_unsupported_repository(
+    git_repository,
+    config,
+):
+    (git_repository.path / '.git' / 'config').write_text(config, encoding='utf-8')
+
+    with pytest.raises(errors.UnsupportedRepositoryError):
+        gitrepository.Repository.discover(str(git_repository.path))
+
+
+def test_resolve_revision(git_repository):
+    first = git_repository.commit('First')
+    git_repository.tag('1.0')
+    second = git_repository.commit('Second')
+    git_repository.git('branch', 'feature', first)
+    git_repository.git('tag', 'main', first)
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert repository.resolve(second) == second
+    assert repository.resolve(second.upper()) == second
+    assert repository.resolve('HEAD') == second
+    assert repository.resolve('feature') == first
+    assert repository.resolve('1.0') == first
+    assert repository.resolve('refs/heads/main') == second
+    assert repository.resolve('heads/main') == second
+    # Tags take precedence over branches like in git
+    assert repository.resolve('main') == first
+
+
+@pytest.mark.parametrize('revision', ('HEAD~1', 'main^{commit}', '../config', 'config', 'unknown', '1234567'))
+def test_resolve_unsupported_revision(git_repository, revision):
+    git_repository.commit()
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    with pytest.raises(errors.UnsupportedRepositoryError):
+        repository.resolve(revision)
+
+
+def test_discover_outside_repository(tmp_path, monkeypatch):
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(tmp_path))
+
+    with pytest.raises(errors.RepositoryNotFoundError):
+        gitrepository.Repository.discover(str(tmp_path))
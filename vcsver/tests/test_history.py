@@ -0,0 +1,285 @@
+import typing
+
+import pytest
+
+from .. import gitrepository
+from .. import history
+
+
+class FakeRepository:
+    def __init__(self, parents, generations=True):
+        super().__init__()
+
+        self._commits = {}
+        self.read_commits = set()
+
+        levels = {}
+        for timestamp, (oid, commit_parents) in enumerate(parents.items()):
+            levels[oid] = 1 + max((levels[parent] for parent in commit_parents), default=0)
+            self._commits[oid] = gitrepository.Commit(
+                tree='',
+                parents=tuple(commit_parents),
+                timestamp=timestamp,
+                generation=levels[oid] if generations else None,
+            )
+
+    def commit(self, oid):
+        self.read_commits.add(oid)
+        return self._commits[oid]
+
+    def generation(self, oid):
+        return self._commits[oid].generation
+
+
+def _linear_history(length):
+    return {
+        f'c{index}': [f'c{index - 1}'] if index else []
+        for index in range(0, length)
+    }
+
+
+@pytest.mark.parametrize('generations', (False, True))
+@pytest.mark.parametrize(
+    ('parents', 'tagged_commits', 'expected_description'),
+    (
+        (_linear_history(5), set(), None),
+        (_linear_history(5), {'c4'}, ('c4', 0)),
+        (_linear_history(5), {'c1'}, ('c1', 3)),
+        (_linear_history(5), {'c1', 'c2'}, ('c2', 2)),
+        (
+            {
+                'root': [],
+                'tagged-side': ['root'],
+                'main-1': ['root'],
+                'main-2': ['main-1'],
+                'merge': ['main-2', 'tagged-side'],
+            },
+            {'root', 'tagged-side'},
+            ('tagged-side', 3),
+        ),
+    ),
+)
+def test_describe(
+    parents,
+    tagged_commits,
+    expected_description,
+    generations,
+):
+    repository = FakeRepository(parents, generations)
+    head = list(parents)[-1]
+
+    assert history.describe(repository, head, tagged_commits) == expected_description
+
+
+def test_describe_stops_when_best_candidate_is_final():
+    repository = FakeRepository(_linear_history(10000))
+
+    assert history.describe(repository, 'c9999', {'c9990', 'c10', 'c0'}) == ('c9990', 9)
+    assert len(repository.read_commits) < 20
+
+
+@pytest.mark.parametrize('generations', (False, True))
+def test_describe_rules_out_unreachable_tags(generations):
+    # The tags are on a branch forked from an ancestor of head
+    parents = _linear_history(10000)
+    parents['branch'] = ['c9000']
+    parents['branch-tagged'] = ['branch']
+    repository = FakeRepository(parents, generations)
+    tagged_commits = {'branch-tagged', 'c9999'}
+    tag_generations = {commit: repository.commit(commit).generation for commit in tagged_commits}
+    repository.read_commits.clear()
+
+    description = history.describe(repository, 'c9500', tagged_commits, tag_generations=tag_generations)
+
+    assert description is None
+    # With generations, the walk stops when the queued commits are older than every tagged commit
+    assert (len(repository.read_commits) < 1000) == generations
+
+
+@pytest.mark.parametrize('commit_graph', (False, True))
+def test_describe_with_clock_skew_matches_git_describe(git_repository, commit_graph):
+    # The tagged commit is older than its parent, which git describe visits first through
+    # the side branch and counts in the distance
+    root = git_repository.commit('Root', timestamp=1600001000)
+    tagged = git_repository.commit('Tagged', timestamp=1600000900)
+    git_repository.tag('1.0')
+    git_repository.git('checkout', '--quiet', '-b', 'side', root)
+    git_repository.commit('Side', filename='side.txt', timestamp=1600001100)
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.git('merge', '--quiet', '--no-ff', '--no-commit', 'side')
+    head = git_repository.commit('Merge', filename='merge.txt', timestamp=1600001200)
+    if commit_graph:
+        git_repository.git('commit-graph', 'write', '--reachable')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+    assert (repository.commit(head).generation is not None) == commit_graph
+
+    _, distance, _ = git_repository.git('describe', '--long').rsplit('-', 2)
+    assert history.describe(repository, head, {tagged}) == (tagged, int(distance)) == (tagged, 3)
+
+
+_MERGE_HISTORY = {
+    'root': [],
+    'main-1': ['root'],
+    'maintenance-1': ['root'],
+    'maintenance-2': ['maintenance-1'],
+    'main-2': ['main-1', 'maintenance-1'],
+    'main-3': ['main-2'],
+    'other-1': ['main-1'],
+}
+
+
+def _ancestors(parents, commit):
+    ancestors = {commit}
+    for parent in parents[commit]:
+        ancestors |= _ancestors(parents, parent)
+
+    return ancestors
+
+
+_TAG_SETS: typing.Tuple[typing.Set[str], ...] = (
+    {'root'},
+    {'main-1', 'maintenance-1'},
+    {'other-1'},
+    {'maintenance-2', 'main-3'},
+    set(),
+)
+
+
+@pytest.mark.parametrize('generations', (False, True))
+@pytest.mark.parametrize('head', ('main-3', 'maintenance-2', 'other-1'))
+def test_describe_many(generations, head):
+    repository = FakeRepository(_MERGE_HISTORY, generations)
+
+    descriptions = history.describe_many(repository, head, _TAG_SETS)
+
+    for tagged_commits, description in zip(_TAG_SETS, descriptions):
+        expected_description = history.describe(repository, head, tagged_commits)
+        if expected_description is None:
+            expected_description = (None, history.count_commits(repository, head))
+
+        assert description == expected_description
+
+
+@pytest.mark.parametrize('generations', (False, True))
+def test_describe_many_counts_only_counted_commits(generations):
+    repository = FakeRepository(_MERGE_HISTORY, generations)
+
+    # The first set counts the commits of main and the others those of maintenance
+    descriptions = history.describe_many(
+        repository,
+        'main-3',
+        _TAG_SETS,
+        get_counting_targets=lambda commit, indexes: {0} if commit.split('-')[0] == 'main' else {1, 2, 3, 4},
+    )
+
+    assert descriptions == [('root', 3), ('maintenance-1', 0), (None, 2), ('main-3', 0), (None, 2)]
+
+
+def test_describe_many_walks_once():
+    parents = _linear_history(1000)
+    repository = FakeRepository(parents)
+    read_commits = []
+    commit = repository.commit
+    repository.commit = lambda oid: read_commits.append(oid) or commit(oid)
+
+    descriptions = history.describe_many(repository, 'c999', [{'c990'}, {'c900'}, {'c995', 'c10'}])
+
+    assert descriptions == [('c990', 9), ('c900', 99), ('c995', 4)]
+    assert len(read_commits) <= 2 * 101
+
+
+@pytest.mark.parametrize('generations', (False, True))
+@pytest.mark.parametrize('head', list(_MERGE_HISTORY))
+@pytest.mark.parametrize('base', list(_MERGE_HISTORY))
+def test_count_commits_between(generations, head, base):
+    repository = FakeRepository(_MERGE_HISTORY, generations)
+
+    assert history.count_commits_between(repository, head, base) == len(
+        _ancestors(_MERGE_HISTORY, head) - _ancestors(_MERGE_HISTORY, base)
+    )
+
+
+@pytest.mark.parametrize('generations', (False, True))
+def test_count_commits_between_many(generations):
+    repository = FakeRepository(_MERGE_HISTORY, generations)
+    bases = ['root', 'maintenance-1', None, 'root', 'main-3']
+
+    # The commits on the main branch are counted for the even indexes only
+    assert history.count_commits_between_many(
+        repository,
+        'main-3',
+        bases,
+        lambda commit, indexes: {index for index in indexes if index % 2 == 0 or not commit.startswith('main-')},
+    ) == [4, 0, 0, 1, 0]
+
+
+@pytest.mark.parametrize('generations', (False, True))
+@pytest.mark.parametrize(
+    ('commits', 'expected_result'),
+    (
+        ([], None),
+        (['other-1', 'maintenance-2'], None),
+        (['other-1', 'maintenance-1', 'main-1'], ('maintenance-1', 3)),
+        (['main-3', 'root'], ('main-3', 0)),
+        (['root', 'main-1'], ('root', 4)),
+    ),
+)
+def test_find_first_reachable(generations, commits, expected_result):
+    repository = FakeRepository(_MERGE_HISTORY, generations)
+
+    assert history.find_first_reachable(repository, 'main-3', commits) == expected_result
+
+
+def test_find_first_reachable_walks_only_as_far_as_needed():
+    parents = _linear_history(10000)
+    parents['branch'] = ['c9990']
+    repository = FakeRepository(parents)
+
+    assert history.find_first_reachable(repository, 'c9999', ['branch', 'c9980', 'c0']) == ('c9980', 19)
+    assert len(repository.read_commits) < 100
+
+
+def test_count_commits():
+    parents = _linear_history(10)
+    parents['merge'] = ['c9', 'c5']
+
+    assert history.count_commits(FakeRepository(parents), 'merge') == 11
+
+
+@pytest.mark.parametrize(
+    ('cached_commits', 'tagged_commits', 'limit', 'expected_result'),
+    (
+        ({'c5'}, set(), 100, ('c5', 4)),
+        ({'c5', 'c7'}, set(), 100, ('c7', 2)),
+        ({'c5'}, {'c6'}, 100, None),
+        ({'c5'}, set(), 3, None),
+        (set(), set(), 100, None),
+    ),
+)
+def test_find_cached_ancestor(
+    cached_commits,
+    tagged_commits,
+    limit,
+    expected_result,
+):
+    repository = FakeRepository(_linear_history(10))
+
+    assert history.find_cached_ancestor(
+        repository,
+        'c9',
+        lambda commit: commit in cached_commits,
+        tagged_commits,
+        limit=limit,
+    ) == expected_result
+
+
+def test_find_cached_ancestor_with_merges():
+    parents = _linear_history(5)
+    parents['side'] = ['c2']
+    parents['merge'] = ['c4', 'side']
+    repository = FakeRepository(parents)
+
+    assert history.find_cached_ancestor(repository, 'merge', {'c4'}.__contains__, set(), limit=100) is None
+    assert history.find_cached_ancestor(repository, 'merge', {'c4', 'side'}.__contains__, set(), limit=100) is None
+    assert history.find_cached_ancestor(repository, 'merge', {'c2'}.__contains__, set(), limit=100) == ('c2', 4)
@@ -0,0 +1,166 @@
+import pytest
+
+from .. import errors
+from .. import git
+from .. import gitrepository
+from .. import history
+from .. import monorepo
+from .. import types
+
+
+_PACKAGES = (
+    monorepo.Package('pkg-a', 'pkg-a/'),
+    monorepo.Package('pkg-b', 'pkg-b/'),
+    monorepo.Package('libs/pkg-c', 'pkg-c/'),
+    monorepo.Package('pkg-d', 'pkg-d/'),
+)
+
+
+def _build_history(git_repository):
+    git_repository.write('pkg-b/b.txt', 'b')
+    git_repository.write('README', 'readme')
+    git_repository.commit('Initial', filename='pkg-a/a.txt')
+    git_repository.tag('pkg-b/v2.0')
+    git_repository.tag('pkg-a/v1.0')
+    git_repository.commit('C 1', filename='libs/pkg-c/c.txt')
+    git_repository.commit('B 1', filename='pkg-b/b.txt')
+    git_repository.tag('pkg-b/v2.1')
+    git_repository.commit('A 1', filename='pkg-a/a.txt')
+
+    git_repository.git('checkout', '--quiet', '-b', 'side')
+    git_repository.commit('A 2', filename='pkg-a/side.txt')
+    git_repository.tag('pkg-a/v1.1.dev0')
+    git_repository.commit('C 2', filename='libs/pkg-c/c.txt')
+    git_repository.commit('Other', filename='README')
+
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.commit('B 2', filename='pkg-b/b.txt')
+    # The merge changes pkg-b compared with both parents
+    git_repository.git('merge', '--quiet', '--no-ff', '--no-commit', 'side')
+    git_repository.commit('Merge', filename='pkg-b/merge.txt')
+    git_repository.commit('A 3', filename='pkg-a/a.txt')
+    git_repository.commit('Other 2', filename='README')
+
+
+def _read_package_versions(git_repository, revision='HEAD', packages=_PACKAGES, native=False, **reader_args):
+    return [
+        git.GitRevisionInfoReader(
+            str(git_repository.path),
+            native=native,
+            revision=revision,
+            tag_prefix=package.tag_prefix,
+            path_scope=package.path,
+            **reader_args,
+        )()
+        for package in packages
+    ]
+
+
+@pytest.mark.parametrize('commit_graph_args', (None, ('--changed-paths',)))
+@pytest.mark.parametrize('revision', ('main', 'side', 'main~2'))
+@pytest.mark.parametrize('first_parent', (False, True))
+def test_version_infos_match_package_versions(git_repository, commit_graph_args, revision, first_parent):
+    _build_history(git_repository)
+    if commit_graph_args is not None:
+        git_repository.git('commit-graph', 'write', '--reachable', *commit_graph_args)
+
+    version_infos = monorepo.get_version_infos(
+        _PACKAGES,
+        path=str(git_repository.path),
+        revision=revision,
+        root_version='0.1',
+        parse_tag=lambda tag: tag.lstrip('v'),
+        first_parent=first_parent,
+    )
+
+    commit = git_repository.git('rev-parse', '--short=10', revision)
+    assert version_infos == [
+        types.VersionInfo(
+            latest_release=revision_info.latest_tag.lstrip('v') if revision_info.latest_tag else '0.1',
+            distance=revision_info.distance,
+            commit=commit,
+            dirty=False,
+        )
+        for revision_info in _read_package_versions(git_repository, revision, first_parent=first_parent)
+    ]
+
+
+@pytest.mark.parametrize('commit_graph', (False, True))
+@pytest.mark.parametrize('native', (True, False))
+def test_version_infos_with_clock_skew_match_package_versions(git_repository, commit_graph, native):
+    # The tagged commit is older than its parent, which the walk visits first through the side
+    # branch; only the commits after the tag are counted in the distance
+    packages = (monorepo.Package('pkg-a', 'pkg-a/'), monorepo.Package('pkg-b', 'pkg-b/'))
+    root = git_repository.commit('Root', filename='pkg-a/a.txt', timestamp=1600001000)
+    git_repository.commit('Tagged', filename='pkg-a/a.txt', timestamp=1600000900)
+    git_repository.tag('pkg-a/1.0')
+    git_repository.tag('pkg-b/1.0')
+    git_repository.git('checkout', '--quiet', '-b', 'side', root)
+    git_repository.commit('Side', filename='pkg-a/side.txt', timestamp=1600001100)
+    git_repository.git('checkout', '--quiet', 'main')
+    git_repository.git('merge', '--quiet', '--no-ff', '--no-commit', 'side')
+    git_repository.commit('Merge', filename='pkg-b/b.txt', timestamp=1600001200)
+    if commit_graph:
+        git_repository.git('commit-graph', 'write', '--reachable')
+
+    version_infos = monorepo.get_version_infos(packages, path=str(git_repository.path))
+
+    revision_infos = _read_package_versions(git_repository, packages=packages, native=native, use_cache=False)
+    assert [(version_info.latest_release, version_info.distance) for version_info in version_infos] == [
+        (revision_info.latest_tag, revision_info.distance)
+        for revision_info in revision_infos
+    ] == [('1.0', 2), ('1.0', 1)]
+
+
+def test_version_infos_with_tag_pattern(git_repository):
+    _build_history(git_repository)
+
+    version_infos = monorepo.get_version_infos(
+        _PACKAGES,
+        path=str(git_repository.path),
+        tag_pattern='v*',
+        tag_exclude='*.dev*',
+    )
+
+    assert [(version_info.latest_release, version_info.distance) for version_info in version_infos] == [
+        ('v1.0', 3),
+        ('v2.1', 2),
+        ('0', 2),
+        ('0', 0),
+    ]
+
+
+def test_version_infos_walk_history_once(git_repository, mocker):
+    _build_history(git_repository)
+    describe_many = mocker.spy(history, 'describe_many')
+    describe = mocker.spy(history, 'describe')
+
+    monorepo.get_version_infos(_PACKAGES, path=str(git_repository.path))
+
+    assert describe_many.call_count == 1
+    assert describe.call_count == 0
+
+
+def test_version_infos_with_git(git_repository, mocker):
+    _build_history(git_repository)
+    expected_version_infos = monorepo.get_version_infos(_PACKAGES, path=str(git_repository.path))
+
+    mocker.patch.object(
+        gitrepository.Repository,
+        'discover',
+        side_effect=errors.UnsupportedRepositoryError('Unsupported'),
+    )
+
+    assert monorepo.get_version_infos(_PACKAGES, path=str(git_repository.path)) == expected_version_infos
+
+
+def test_version_infos_outside_repository(tmp_path):
+    with pytest.raises(errors.RevisionInfoNotFoundError):
+        monorepo.get_version_infos(_PACKAGES, path=str(tmp_path))
+
+
+def test_package_outside_working_tree(git_repository):
+    git_repository.commit('Initial')
+
+    with pytest.raises(errors.InvalidConfigurationError):
+        monorepo.get_version_infos([monorepo.Package('..', 'other/')], path=str(git_repository.path))
@@ -0,0 +1,111 @@
+import threading
+import time
+
+from .. import errors
+from .. import git
+from .. import multirepo
+from .. import pep440
+from .. import types
+from .. import vcsver
+from . import conftest
+
+
+def _create_repositories(tmp_path, count):
+    repositories = []
+    for index in range(count):
+        repository = conftest.GitRepository(tmp_path / f'repository-{index}')
+        repository.path.mkdir()
+        repository.git('init', '--quiet', '--initial-branch=main')
+        repository.commit('Initial')
+        repository.tag(f'{index}.0')
+        for number in range(index):
+            repository.commit(f'Commit {number}')
+
+        repositories.append(repository)
+
+    return repositories
+
+
+def test_repository_versions(tmp_path):
+    repositories = _create_repositories(tmp_path, 4)
+    paths = [str(repository.path) for repository in repositories]
+
+    repository_versions = list(multirepo.iter_repository_versions(paths, create_version=pep440.post_with_dev))
+
+    assert sorted(repository_versions) == sorted(
+        multirepo.RepositoryVersion(
+            path=path,
+            version=vcsver.get_version(
+                read_revision_info=git.GitRevisionInfoReader(path),
+                create_version=pep440.post_with_dev,
+            ),
+        )
+        for path in paths
+    )
+
+
+def test_repository_versions_with_errors(tmp_path):
+    repository = _create_repositories(tmp_path, 1)[0]
+    (tmp_path / 'empty').mkdir()
+    (tmp_path / 'sdist').mkdir()
+    (tmp_path / 'sdist' / 'PKG-INFO').write_text('Version: 1.5.9\n', encoding='utf-8')
+
+    repository_versions = {
+        repository_version.path: repository_version
+        for repository_version in multirepo.iter_repository_versions([
+            str(repository.path),
+            str(tmp_path / 'empty'),
+            str(tmp_path / 'sdist'),
+        ])
+    }
+
+    assert repository_versions[str(repository.path)] == multirepo.RepositoryVersion(str(repository.path), '0.0')
+    assert repository_versions[str(tmp_path / 'sdist')] == multirepo.RepositoryVersion(str(tmp_path / 'sdist'), '1.5.9')
+    assert repository_versions[str(tmp_path / 'empty')].version is None
+    assert isinstance(repository_versions[str(tmp_path / 'empty')].error, errors.RevisionInfoNotFoundError)
+
+
+def test_repository_versions_are_read_concurrently():
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def create_reader(path):
+        def read_revision_info():
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+
+            time.sleep(0.05)
+
+            with lock:
+                running[0] -= 1
+
+            return types.RevisionInfo(latest_tag=path, distance=0, commit=None, dirty=False)
+
+        return read_revision_info
+
+    paths = [str(index) for index in range(8)]
+    repository_versions = list(multirepo.iter_repository_versions(paths, max_workers=3, create_reader=create_reader))
+
+    assert sorted(repository_version.version for repository_version in repository_versions) == paths
+    assert max_running[0] == 3
+
+
+def test_repository_versions_are_returned_as_read():
+    slow_read = threading.Event()
+
+    def create_reader(path):
+        def read_revision_info():
+            if path == 'slow':
+                slow_read.wait(5)
+
+            return types.RevisionInfo(latest_tag=path, distance=0, commit=None, dirty=False)
+
+        return read_revision_info
+
+    repository_versions = multirepo.iter_repository_versions(['slow', 'fast'], create_reader=create_reader)
+
+    assert next(repository_versions).path == 'fast'
+    slow_read.set()
+    assert next(repository_versions).path == 'slow'
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from .. import errors
+from .. import gitrepository
+from .. import pathscope
+
+
+@pytest.mark.parametrize('commit_graph_args', (None, ('--changed-paths',)))
+def test_changes(git_repository, commit_graph_args):
+    git_repository.write('pkg/sub/a.txt', 'a')
+    initial = git_repository.commit('Initial', filename='README')
+    other = git_repository.commit('Other', filename='README')
+    nested = git_repository.commit('Nested', filename='pkg/sub/a.txt')
+    git_repository.git('checkout', '--quiet', '-b', 'side')
+    side = git_repository.commit('Side', filename='pkg/side.txt')
+    git_repository.git('checkout', '--quiet', 'main')
+    main = git_repository.commit('Main', filename='README')
+    git_repository.git('merge', '--quiet', '--no-edit', 'side')
+    merge = git_repository.git('rev-parse', 'HEAD')
+    git_repository.git('rm', '--quiet', '-r', 'pkg')
+    removal = git_repository.commit('Remove', filename='README')
+    if commit_graph_args is not None:
+        git_repository.git('commit-graph', 'write', '--reachable', *commit_graph_args)
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+    path_scope = pathscope.PathScope(repository, 'pkg')
+
+    assert [
+        commit
+        for commit in (initial, other, nested, side, main, merge, removal)
+        if path_scope.changes(commit)
+    ] == [initial, nested, side, removal]
+    assert path_scope.changes_from_first_parent(merge)
+    assert pathscope.PathScope(repository, 'pkg/sub').changes(nested)
+    assert not pathscope.PathScope(repository, 'pkg/sub').changes(side)
+    assert not pathscope.PathScope(repository, 'README/pkg').changes(initial)
+
+
+def test_changes_reads_no_trees_of_filtered_commits(git_repository, mocker):
+    git_repository.write('pkg/a.txt', 'a')
+    git_repository.commit('Initial', filename='README')
+    commits = [git_repository.commit(f'Other {index}', filename='README') for index in range(5)]
+    git_repository.git('commit-graph', 'write', '--reachable', '--changed-paths')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+    read_tree = mocker.spy(repository, 'tree')
+    path_scope = pathscope.PathScope(repository, 'pkg')
+
+    assert not any(path_scope.changes(commit) for commit in commits)
+    assert read_tree.call_count == 0
+
+
+@pytest.mark.parametrize(
+    ('path', 'expected_path'),
+    (
+        ('.', ''),
+        ('pkg', 'pkg'),
+        (os.path.join('pkg', 'sub', '..', 'sub'), 'pkg/sub'),
+    ),
+)
+def test_get_repository_path(tmp_path, monkeypatch, path, expected_path):
+    (tmp_path / 'pkg' / 'sub').mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+
+    assert pathscope.get_repository_path(path, str(tmp_path)) == expected_path
+
+
+def test_get_repository_path_outside_working_tree(tmp_path):
+    with pytest.raises(errors.InvalidConfigurationError):
+        pathscope.get_repository_path(str(tmp_path), str(tmp_path / 'repository'))
@@ -55,6 +55,36 @@ _PEP440_POST_WITH_DEV_VERSIONS = (
 )
 
 
+@pytest.mark.parametrize(
+    ('version_info', 'expected_version_string'),
+    (
+        (VersionInfo(latest_release='1.0', distance=0, commit='abcdef', dirty=False), '1.0'),
+        (VersionInfo(latest_release='1.0', distance=0, commit='abcdef', dirty=True), '1.0+dirty'),
+        (
+            VersionInfo(latest_release='1.0', distance=0, commit='abcdef', dirty=True, dirty_digest='012345'),
+            '1.0+d012345',
+        ),
+        (VersionInfo(latest_release='1.0', distance=1, commit='abcdef', dirty=False), '1.0.post1+abcdef'),
+        (
+            VersionInfo(latest_release='1.0', distance=1, commit='abcdef', dirty=True, dirty_digest='012345'),
+            '1.0.post1+abcdef.d012345',
+        ),
+        (VersionInfo(latest_release='0', distance=0, commit=None, dirty=True), '0+dirty'),
+    ),
+)
+def test_pep440_post_with_digest(version_info, expected_version_string):
+    assert pep440.post_with_digest(version_info) == expected_version_string
+
+
+_PEP440_POST_WITH_DIGEST_VERSIONS = (
+    '1.0',
+    '1.0.post1+abcdef',
+    '1.1',
+    '1.1+d012345',
+    '1.1.post1+abcdef.d012345',
+)
+
+
 def _version_order_cases(version_strings):
     return list(zip(
         version_strings,
@@ -67,6 +97,7 @@ def _version_order_cases(version_strings):
     itertools.chain(
         _version_order_cases(_PEP440_POST_VERSIONS),
         _version_order_cases(_PEP440_POST_WITH_DEV_VERSIONS),
+        _version_order_cases(_PEP440_POST_WITH_DIGEST_VERSIONS),
     )
 )
 def test_version_ordering(prev_version, next_version):
@@ -78,3 +109,44 @@ def test_version_ordering(prev_version, next_version):
 
     # Make sure that the version strings generated match the ordering used by packaging library
     assert prev_version < next_version
+
+
+_VERSIONS = (
+    '0.9',
+    '1.0.dev0',
+    '1.0a0',
+    '1.0a1.dev1',
+    '1.0a1',
+    '1.0b1',
+    '1.0c1',
+    '1.0rc2.post1.dev3',
+    '1.0rc2.post1',
+    '1.0',
+    '1.0.0',
+    '1.0+1',
+    '1.0+1.a',
+    '1.0+a',
+    '1.0+abc.1',
+    '1.0+abc.2',
+    '1.0.post1.dev1',
+    '1.0-1',
+    '1.0.post2',
+    '1.1',
+    'v1.2',
+    '2.0',
+    '1!0.1',
+)
+
+
+@pytest.mark.parametrize(('version', 'other_version'), list(itertools.product(_VERSIONS, _VERSIONS)))
+def test_get_version_key(version, other_version):
+    key = pep440.get_version_key(version)
+    other_key = pep440.get_version_key(other_version)
+
+    assert (key < other_key) == (Version(version) < Version(other_version))
+    assert (key == other_key) == (Version(version) == Version(other_version))
+
+
+@pytest.mark.parametrize('version', ('', 'release', 'deploy-1', '1.0-final', 'v'))
+def test_get_version_key_of_invalid_version(version):
+    assert pep440.get_version_key(version) is None
@@ -0,0 +1,257 @@
+import os
+import struct
+import zlib
+
+import pytest
+
+from .. import errors
+from .. import git
+from .. import reftable
+
+
+_RESTART_INTERVAL = 4
+
+
+def _encode_varint(value):
+    encoded = [value & 0x7f]
+    value >>= 7
+    while value:
+        value -= 1
+        encoded.append(0x80 | (value & 0x7f))
+        value >>= 7
+
+    return bytes(reversed(encoded))
+
+
+def _encode_ref_value(value):
+    if value is None:
+        return 0, b''
+
+    if value.startswith('ref: '):
+        target = value[len('ref: '):].encode()
+        return 3, _encode_varint(len(target)) + target
+
+    if ' ' in value:
+        oid, peeled = value.split(' ')
+        return 2, bytes.fromhex(oid) + bytes.fromhex(peeled)
+
+    return 1, bytes.fromhex(value)
+
+
+def _write_blocks(table, block_type, entries, block_size, padded):  # pylint: disable=too-many-locals
+    # Write entries (name, value type, value) to blocks; return (position, last name) of each block
+    blocks = []
+    index = 0
+    while index < len(entries):
+        block_position = len(table) if len(table) > _header_length(table) else 0
+        start_length = len(table) - block_position + 4
+        records = bytearray()
+        restarts = []
+        previous_name = b''
+        while index < len(entries):
+            name, value_type, value = entries[index]
+            is_restart = len(records) == 0 or (index % _RESTART_INTERVAL) == 0
+            prefix_length = 0
+            if not is_restart:
+                while prefix_length < min(len(name), len(previous_name)) and \
+                        name[prefix_length] == previous_name[prefix_length]:
+                    prefix_length += 1
+
+            record = (
+                _encode_varint(prefix_length)
+                + _encode_varint(((len(name) - prefix_length) << 3) | value_type)
+                + name[prefix_length:]
+                + value
+            )
+            block_length = start_length + len(records) + len(record) + 3 * (len(restarts) + 1) + 2
+            if records and block_length > block_size:
+                break
+
+            if is_restart:
+                restarts.append(start_length + len(records))
+
+            records += record
+            previous_name = name
+            index += 1
+
+        block_length = start_length + len(records) + 3 * len(restarts) + 2
+        table += block_type + block_length.to_bytes(3, 'big') + records
+        table += b''.join(restart.to_bytes(3, 'big') for restart in restarts) + len(restarts).to_bytes(2, 'big')
+        if padded:
+            table += b'\0' * (block_position + block_size - len(table))
+
+        blocks.append((block_position, previous_name))
+
+    return blocks
+
+
+def _header_length(table):
+    return 24 if table[4] == 1 else 28
+
+
+def write_table(  # pylint: disable=too-many-arguments,too-many-locals
+    path,
+    refs,
+    *,
+    block_size=256,
+    index=False,
+    padded=True,
+    version=1,
+):
+    '''
+    Write reftable file containing refs (a dict of name to object id, "object id peeled
+    id", "ref: target" or None for deletions).
+    '''
+
+    table = bytearray(struct.pack('>4sB3sQQ', b'REFT', version, block_size.to_bytes(3, 'big'), 1, 1))
+    if version == 2:
+        table += b'sha1'
+
+    header = bytes(table)
+
+    entries = []
+    for name in sorted(refs):
+        value_type, value = _encode_ref_value(refs[name])
+        entries.append((name.encode(), value_type, _encode_varint(0) + value))
+
+    blocks = _write_blocks(table, b'r', entries, block_size, padded)
+
+    ref_index_position = 0
+    # Index blocks are written until a single block indexes the blocks of the previous level
+    while index and len(blocks) > 1:
+        index_entries = [(name, 0, _encode_varint(position)) for position, name in blocks]
+        blocks = _write_blocks(table, b'i', index_entries, block_size, padded=False)
+        ref_index_position = blocks[0][0]
+
+    footer = header + struct.pack('>QQQQQ', ref_index_position, 0, 0, 0, 0)
+    table += footer + struct.pack('>I', zlib.crc32(footer))
+
+    path.write_bytes(bytes(table))
+
+
+def write_stack(path, tables):
+    path.mkdir(exist_ok=True)
+    names = []
+    for index, refs in enumerate(tables):
+        name = f'0x{index + 1:012x}-0x{index + 1:012x}-{index:08x}.ref'
+        write_table(path / name, refs)
+        names.append(name)
+
+    (path / 'tables.list').write_text(''.join(f'{name}\n' for name in names), encoding='utf-8')
+
+
+def _oid(number):
+    return f'{number:040x}'
+
+
+_REFS = {
+    'HEAD': 'ref: refs/heads/main',
+    'refs/heads/main': _oid(1),
+    **{f'refs/heads/feature-{number}': _oid(number) for number in range(2, 40)},
+    **{f'refs/tags/v1.{number}': f'{_oid(1000 + number)} {_oid(number)}' for number in range(0, 150)},
+    'refs/tags/deleted': None,
+}
+
+
+@pytest.mark.parametrize('index', (False, True))
+@pytest.mark.parametrize('padded', (False, True))
+@pytest.mark.parametrize('version', (1, 2))
+def test_read_table(tmp_path, index, padded, version):
+    write_table(tmp_path / 'table.ref', _REFS, index=index, padded=padded, version=version)
+
+    table = reftable.Table(str(tmp_path / 'table.ref'))
+
+    assert table.read('HEAD') == reftable.RefRecord(name='HEAD', target='refs/heads/main')
+    assert table.read('refs/heads/feature-2') == reftable.RefRecord(name='refs/heads/feature-2', oid=_oid(2))
+    assert table.read('refs/tags/v1.149') == reftable.RefRecord(
+        name='refs/tags/v1.149',
+        oid=_oid(1149),
+        peeled=_oid(149),
+    )
+    assert table.read('refs/tags/deleted') == reftable.RefRecord(name='refs/tags/deleted')
+
+    for name in ('A', 'refs/heads/feature-1', 'refs/tags/v1.1000', 'refs/tags/v2', 'zzz'):
+        assert table.read(name) is None
+
+    for name in _REFS:
+        assert table.read(name).name == name
+
+    assert [record.name for record in table.iter_records('refs/tags/v1.1')] == sorted(
+        name for name in _REFS if name.startswith('refs/tags/v1.1')
+    )
+
+
+def test_read_stack(tmp_path):
+    write_stack(
+        tmp_path / 'reftable',
+        (
+            {'HEAD': 'ref: refs/heads/main', 'refs/heads/main': _oid(1), 'refs/tags/1.0': _oid(1)},
+            {'refs/tags/1.1': _oid(2), 'refs/tags/1.2': _oid(3)},
+            {'refs/tags/1.0': None, 'refs/tags/1.1': _oid(4)},
+        ),
+    )
+
+    stack = reftable.Stack(str(tmp_path / 'reftable'))
+
+    assert stack.read('HEAD') == reftable.RefRecord(name='HEAD', target='refs/heads/main')
+    assert stack.read('refs/tags/1.0') is None
+    assert stack.read('refs/tags/1.1').oid == _oid(4)
+    assert list(stack.iter_refs('refs/tags/')) == [
+        reftable.RefRecord(name='refs/tags/1.1', oid=_oid(4)),
+        reftable.RefRecord(name='refs/tags/1.2', oid=_oid(3)),
+    ]
+
+
+def test_invalid_table(tmp_path):
+    (tmp_path / 'table.ref').write_bytes(b'REFT' + b'\0' * 100)
+
+    with pytest.raises(errors.UnsupportedRepositoryError):
+        reftable.Table(str(tmp_path / 'table.ref'))
+
+
+def _convert_to_reftable(git_repository):
+    refs = {'HEAD': f'ref: {git_repository.git("symbolic-ref", "HEAD")}'}
+    for line in git_repository.git('for-each-ref', '--format=%(refname) %(objectname) %(*objectname)').split('\n'):
+        name, oid, peeled = (line.split(' ') + [''])[:3]
+        refs[name] = f'{oid} {peeled}' if peeled else oid
+
+    git_dir = git_repository.path / '.git'
+    write_stack(git_dir / 'reftable', (refs,))
+
+    git_repository.git('config', 'core.repositoryformatversion', '1')
+    git_repository.git('config', 'extensions.refStorage', 'reftable')
+
+    # Like git, leave behind files that make older git versions not use the files backend
+    for root, _, files in os.walk(git_dir / 'refs'):
+        for filename in files:
+            os.unlink(os.path.join(root, filename))
+
+    if (git_dir / 'packed-refs').exists():
+        (git_dir / 'packed-refs').unlink()
+
+    (git_dir / 'HEAD').write_text('ref: refs/heads/.invalid\n', encoding='utf-8')
+
+
+@pytest.mark.parametrize('tagged', (False, True))
+def test_read_revision_info_from_reftable(git_repository, tagged):
+    git_repository.commit('Initial')
+    if tagged:
+        git_repository.tag('1.0')
+        git_repository.commit('Second')
+        git_repository.tag('1.1-rc1', annotated=False)
+
+    git_repository.commit('Third')
+    git_repository.git('branch', 'feature')
+
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), use_cache=False, single_flight=False)
+    expected_revision_info = read_revision_info()
+
+    _convert_to_reftable(git_repository)
+
+    # Git versions without reftable support would fail if the reader fell back to git
+    assert read_revision_info() == expected_revision_info
+    assert git.GitRevisionInfoReader(
+        str(git_repository.path),
+        revision='feature',
+        use_cache=False,
+    )().commit == expected_revision_info.commit
@@ -1,3 +1,7 @@
+import os
+import subprocess
+import sys
+
 import pytest
 
 from .. import (
@@ -47,3 +51,107 @@ def test_finalize_distribution_options(
     )
 
     assert dist_mock.metadata.version == mocker.sentinel.version
+
+
+_DEFAULT_SELECTION_ARGS = {
+    'tag_pattern': (),
+    'tag_exclude': (),
+    'tag_selection': 'nearest',
+    'tag_prefix': '',
+    'path_scope': None,
+    'timeout': None,
+    'timeout_fallback': 'error',
+}
+
+
+@pytest.mark.parametrize(
+    ('config', 'expected_reader_args', 'expected_create_version'),
+    (
+        (
+            {'dirty': 'skip'},
+            {'dirty': 'skip', 'dirty_digest': False, **_DEFAULT_SELECTION_ARGS},
+            pep440.post,
+        ),
+        (
+            {'dirty_digest': True},
+            {'dirty': 'full', 'dirty_digest': True, **_DEFAULT_SELECTION_ARGS},
+            pep440.post_with_digest,
+        ),
+        (
+            {'tag_pattern': 'v*', 'tag_exclude': ['*-rc*']},
+            {
+                **_DEFAULT_SELECTION_ARGS,
+                'dirty': 'full',
+                'dirty_digest': False,
+                'tag_pattern': 'v*',
+                'tag_exclude': ['*-rc*'],
+            },
+            pep440.post,
+        ),
+        (
+            {'tag_selection': 'highest-version'},
+            {**_DEFAULT_SELECTION_ARGS, 'dirty': 'full', 'dirty_digest': False, 'tag_selection': 'highest-version'},
+            pep440.post,
+        ),
+        (
+            {'tag_prefix': 'pkg/', 'path_scope': '.'},
+            {
+                **_DEFAULT_SELECTION_ARGS,
+                'dirty': 'full',
+                'dirty_digest': False,
+                'tag_prefix': 'pkg/',
+                'path_scope': '.',
+            },
+            pep440.post,
+        ),
+        (
+            {'timeout': 2.5, 'timeout_fallback': 'skip-dirty'},
+            {
+                **_DEFAULT_SELECTION_ARGS,
+                'dirty': 'full',
+                'dirty_digest': False,
+                'timeout': 2.5,
+                'timeout_fallback': 'skip-dirty',
+            },
+            pep440.post,
+        ),
+    ),
+)
+def test_reader_options(mocker, config, expected_reader_args, expected_create_version):
+    mocker.patch(
+        'vcsver.config.read',
+        return_value={'source': 'git', **config},
+    )
+
+    reader_mock = mocker.patch('vcsver.git.GitRevisionInfoReader')
+    get_version_mock = mocker.patch('vcsver.vcsver.get_version')
+
+    setuptools.finalize_distribution_options(mocker.Mock())
+
+    reader_mock.assert_called_once_with(**expected_reader_args)
+    get_version_mock.assert_called_once_with(
+        root_version='0',
+        read_revision_info=reader_mock.return_value,
+        parse_tag=mocker.ANY,
+        create_version=expected_create_version,
+    )
+
+
+def test_hook_imports_little_without_vcsver_configuration(tmp_path):
+    (tmp_path / 'pyproject.toml').write_text('[build-system]\nrequires = ["setuptools"]\n', encoding='utf-8')
+    script = (
+        'import sys; '
+        'import vcsver.setuptools; '
+        'vcsver.setuptools.finalize_distribution_options(None); '
+        'print(" ".join(sorted(name for name in sys.modules if name.startswith(("vcsver", "tomli")))))'
+    )
+
+    output = subprocess.run(
+        (sys.executable, '-c', script),
+        cwd=str(tmp_path),
+        env={**os.environ, 'PYTHONPATH': os.path.dirname(os.path.dirname(os.path.dirname(__file__)))},
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout.decode()
+
+    assert output.split() == ['vcsver', 'vcsver.config', 'vcsver.errors', 'vcsver.setuptools']
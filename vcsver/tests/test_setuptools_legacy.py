@@ -1,5 +1,7 @@
 import pytest
 
+from .. import errors
+from .. import git
 from .. import setuptools_legacy
 from .. import types
 
@@ -54,3 +56,67 @@ def test_vcsver(
         if isinstance(vcsver, dict)
         else {}
     )
+
+
+@pytest.mark.parametrize(
+    ('config', 'expected_reader_args'),
+    (
+        ({'dirty': 'skip'}, {'dirty': 'skip'}),
+        ({'dirty': 'skip', 'read_revision_info': 'git'}, {'dirty': 'skip'}),
+        ({'dirty_digest': True}, {'dirty_digest': True}),
+        ({'tag_pattern': 'v*', 'tag_exclude': ['*-rc*']}, {'tag_pattern': 'v*', 'tag_exclude': ['*-rc*']}),
+        ({'tag_selection': 'highest-version'}, {'tag_selection': 'highest-version'}),
+        ({'tag_prefix': 'pkg/', 'path_scope': '.'}, {'tag_prefix': 'pkg/', 'path_scope': '.'}),
+        ({'timeout': 2.5, 'timeout_fallback': 'skip-dirty'}, {'timeout': 2.5, 'timeout_fallback': 'skip-dirty'}),
+    ),
+)
+def test_reader_options(mocker, config, expected_reader_args):
+    reader_mock = mocker.patch.dict(
+        setuptools_legacy.REVISION_INFO_READERS,
+        {'git': mocker.Mock(return_value=mocker.sentinel.reader)},
+    )
+
+    kwargs = setuptools_legacy.get_version_kwargs(config)
+
+    assert kwargs['read_revision_info'] == mocker.sentinel.reader
+    reader_mock['git'].assert_called_once_with(**expected_reader_args)
+
+
+@pytest.mark.parametrize(
+    ('config', 'expected_version'),
+    (
+        ({'dirty_digest': True}, '1.2.3+d012345'),
+        ({'dirty_digest': True, 'create_version': 'pep440.post_with_digest'}, '1.2.3+d012345'),
+        ({'dirty_digest': False}, '1.2.3+dirty'),
+    ),
+)
+def test_dirty_digest_version_scheme(mocker, config, expected_version):
+    mocker.patch.dict(
+        setuptools_legacy.REVISION_INFO_READERS,
+        {'git': mocker.Mock(return_value=lambda: types.RevisionInfo(
+            latest_tag='1.2.3',
+            distance=0,
+            commit='abcdef',
+            dirty=True,
+            dirty_digest='012345',
+        ))},
+    )
+    dist_mock = mocker.Mock(name='Dist')
+
+    setuptools_legacy.vcsver(dist_mock, 'vcsver', config)
+
+    assert dist_mock.metadata.version == expected_version
+
+
+@pytest.mark.parametrize(
+    'config',
+    (
+        {'dirty': 'sometimes'},
+        {'dirty_digest': True, 'create_version': 'pep440.post'},
+        {'dirty': 'skip', 'read_revision_info': git.GitRevisionInfoReader()},
+        {'dirty_digest': True, 'read_revision_info': git.GitRevisionInfoReader()},
+    ),
+)
+def test_invalid_reader_options(config):
+    with pytest.raises(errors.InvalidConfigurationError):
+        setuptools_legacy.get_version_kwargs(config)
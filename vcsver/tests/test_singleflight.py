@@ -0,0 +1,122 @@
+import os
+import socket
+import subprocess
+import threading
+import time
+
+import pytest
+
+from .. import singleflight
+
+
+@pytest.fixture(name='single_flight')
+def _single_flight(tmp_path):
+    return singleflight.SingleFlight(
+        str(tmp_path / 'lock'),
+        str(tmp_path / 'result'),
+        stale_timeout=10.0,
+        wait_timeout=5.0,
+    )
+
+
+def _write_lock(tmp_path, pid, hostname=None):
+    (tmp_path / 'lock').write_text(
+        f'{hostname or socket.gethostname()}\n{pid}\n{time.time()}\n',
+        encoding='utf-8',
+    )
+
+
+def test_compute_without_other_processes(
+    tmp_path,
+    single_flight,
+):
+    assert single_flight.run('key', lambda: ['value']) == ['value']
+
+    assert not (tmp_path / 'lock').exists()
+
+
+def test_concurrent_calls_compute_once(single_flight):
+    computations = []
+    results = []
+    barrier = threading.Barrier(8)
+
+    def compute():
+        computations.append(None)
+        time.sleep(0.3)
+        return 'value'
+
+    def run():
+        barrier.wait()
+        results.append(single_flight.run('key', compute))
+
+    threads = [threading.Thread(target=run) for _ in range(0, 8)]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert results == ['value'] * 8
+    assert len(computations) == 1
+
+
+def test_wait_for_result_of_other_process(
+    tmp_path,
+    single_flight,
+):
+    _write_lock(tmp_path, os.getpid())
+
+    def publish_result():
+        time.sleep(0.1)
+        other_process = singleflight.SingleFlight(str(tmp_path / 'other-lock'), str(tmp_path / 'result'))
+        other_process.run('key', lambda: 'other value')
+        (tmp_path / 'lock').unlink()
+
+    thread = threading.Thread(target=publish_result)
+    thread.start()
+
+    assert single_flight.run('key', lambda: 'value') == 'other value'
+    thread.join()
+
+
+def test_result_with_different_key_is_not_used(
+    tmp_path,
+    single_flight,
+):
+    _write_lock(tmp_path, os.getpid())
+
+    def publish_result():
+        time.sleep(0.1)
+        other_process = singleflight.SingleFlight(str(tmp_path / 'other-lock'), str(tmp_path / 'result'))
+        other_process.run('other key', lambda: 'other value')
+        (tmp_path / 'lock').unlink()
+
+    thread = threading.Thread(target=publish_result)
+    thread.start()
+
+    assert single_flight.run('key', lambda: 'value') == 'value'
+    thread.join()
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='Process liveness is checked only on POSIX systems')
+def test_lock_of_crashed_process_is_broken(
+    tmp_path,
+    single_flight,
+):
+    with subprocess.Popen(('true',)) as crashed_process:
+        crashed_process.wait()
+
+    _write_lock(tmp_path, crashed_process.pid)
+
+    assert single_flight.run('key', lambda: 'value') == 'value'
+
+
+def test_old_lock_is_broken(
+    tmp_path,
+    single_flight,
+):
+    _write_lock(tmp_path, os.getpid(), hostname='other-host')
+    old_time = time.time() - 60
+    os.utime(tmp_path / 'lock', (old_time, old_time))
+
+    assert single_flight.run('key', lambda: 'value') == 'value'
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from .. import gitrepository
+from .. import tagindex
+from .. import tagmatch
+
+
+def _build_tags(git_repository):
+    git_repository.commit('Initial')
+    git_repository.tag('1.0')
+    git_repository.tag('lightweight', annotated=False)
+    tree = git_repository.git('rev-parse', 'HEAD^{tree}')
+    git_repository.tag('tree', revision=tree)
+    git_repository.commit('Second')
+    git_repository.tag('1.1')
+    git_repository.git('tag', '--annotate', '--message', 'Nested', 'nested', '1.1')
+
+
+def _discover(git_repository):
+    return gitrepository.Repository.discover(str(git_repository.path))
+
+
+@pytest.mark.parametrize('packed', (False, True))
+@pytest.mark.parametrize('commit_graph', (False, True))
+def test_read_tags(git_repository, packed, commit_graph):
+    _build_tags(git_repository)
+    if packed:
+        git_repository.git('pack-refs', '--all')
+
+    if commit_graph:
+        git_repository.git('commit-graph', 'write', '--reachable')
+
+    entries = tagindex.read_tags(_discover(git_repository), use_index=False)
+
+    first, second = git_repository.git('rev-list', '--reverse', 'HEAD').split()
+    assert list(entries) == [
+        'refs/tags/1.0',
+        'refs/tags/1.1',
+        'refs/tags/lightweight',
+        'refs/tags/nested',
+        'refs/tags/tree',
+    ]
+    assert entries['refs/tags/1.0'].peeled == first
+    assert entries['refs/tags/1.1'].peeled == second
+    assert entries['refs/tags/nested'].peeled == second
+    assert entries['refs/tags/lightweight'].peeled is None
+    # Peeled objects other than commits are never reached by walking the history
+    tree = git_repository.git('rev-parse', 'tree^{}')
+    assert entries['refs/tags/tree'].peeled == (tree if packed else None)
+    assert entries['refs/tags/1.0'].generation == (1 if commit_graph else None)
+    assert entries['refs/tags/1.1'].generation == (2 if commit_graph else None)
+
+    # The index gives the same entries when it is created and when it is used
+    assert tagindex.read_tags(_discover(git_repository)) == entries
+    assert tagindex.read_tags(_discover(git_repository)) == entries
+
+
+def test_index_is_used_while_tags_do_not_change(git_repository, mocker):
+    _build_tags(git_repository)
+    tagindex.read_tags(_discover(git_repository))
+
+    repository = _discover(git_repository)
+    iter_refs_spy = mocker.spy(repository, 'iter_refs')
+    peel_spy = mocker.spy(repository, 'peel')
+
+    entries = tagindex.read_tags(repository)
+
+    assert len(entries) == 5
+    assert iter_refs_spy.call_count == 0
+    assert peel_spy.call_count == 0
+
+
+def test_index_is_updated_incrementally(git_repository, mocker):
+    _build_tags(git_repository)
+    tagindex.read_tags(_discover(git_repository))
+
+    git_repository.commit('Third')
+    git_repository.tag('1.2')
+    git_repository.git('tag', '--delete', '1.0')
+    git_repository.git('tag', '--force', '--annotate', '--message', 'Moved', '1.1')
+
+    repository = _discover(git_repository)
+    peel_spy = mocker.spy(repository, 'peel')
+
+    entries = tagindex.read_tags(repository)
+
+    assert entries == tagindex.read_tags(_discover(git_repository), use_index=False)
+    assert sorted(call[0][0] for call in peel_spy.call_args_list) == sorted(
+        git_repository.git('rev-parse', tag) for tag in ('1.1', '1.2')
+    )
+
+
+def test_index_refreshes_generations(git_repository):
+    _build_tags(git_repository)
+    tagindex.read_tags(_discover(git_repository))
+    git_repository.git('commit-graph', 'write', '--reachable')
+
+    entries = tagindex.read_tags(_discover(git_repository))
+
+    assert entries['refs/tags/1.1'].generation == 2
+
+
+def test_index_per_tag_pattern(git_repository, mocker):
+    _build_tags(git_repository)
+    tagindex.read_tags(_discover(git_repository))
+
+    repository = _discover(git_repository)
+    peel_spy = mocker.spy(repository, 'peel')
+
+    entries = tagindex.read_tags(repository, tagmatch.TagMatcher('1.*'))
+
+    # The entries indexed for all the tags are reused
+    assert list(entries) == ['refs/tags/1.0', 'refs/tags/1.1']
+    assert peel_spy.call_count == 0
+
+
+@pytest.mark.parametrize('content', ('', 'invalid', '{"version": 1, "entries": {"": {"tags": {"a": 1}}}}'))
+def test_invalid_index(git_repository, content):
+    _build_tags(git_repository)
+    with open(os.path.join(git_repository.path, '.git', 'vcsver-tags'), 'wt', encoding='utf-8') as index_file:
+        index_file.write(content)
+
+    assert tagindex.read_tags(_discover(git_repository)) == tagindex.read_tags(
+        _discover(git_repository),
+        use_index=False,
+    )
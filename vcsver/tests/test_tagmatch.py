@@ -0,0 +1,90 @@
+import pytest
+
+from .. import errors
+from .. import tagmatch
+
+
+@pytest.mark.parametrize(
+    ('pattern', 'name', 'expected'),
+    (
+        ('v*', 'v1.0', True),
+        ('v*', 'release/v1.0', False),
+        ('*', 'release/v1.0', True),
+        ('release/*', 'release/sub/1.0', True),
+        ('v?.0', 'v1.0', True),
+        ('v?.0', 'v10.0', False),
+        ('v[0-9].*', 'v1.0', True),
+        ('v[!0-9].*', 'v1.0', False),
+        ('v[^0-9].*', 'vx.0', True),
+        ('v[[:digit:]].*', 'v1.0', True),
+        ('v[]x].*', 'v].0', True),
+        ('v[a\\-c].*', 'v-.0', True),
+        ('v[a\\-c].*', 'vb.0', False),
+        ('v\\*', 'v*', True),
+        ('v\\*', 'v1', False),
+        ('v1.0', 'v1.0', True),
+        ('v1.0', 'v1x0', False),
+        ('V*', 'v1.0', False),
+    ),
+)
+def test_match(pattern, name, expected):
+    assert tagmatch.TagMatcher(pattern)(name) is expected
+
+
+def test_exclude():
+    matcher = tagmatch.TagMatcher(('v*', 'release-*'), ('*-rc*', '*.dev*'))
+
+    assert matcher('v1.0')
+    assert matcher('release-1.0')
+    assert not matcher('v1.0-rc1')
+    assert not matcher('release-1.0.dev0')
+    assert not matcher('deploy-1')
+    assert tagmatch.TagMatcher(excludes='deploy-*')('v1.0')
+
+
+@pytest.mark.parametrize(
+    ('patterns', 'expected_prefix'),
+    (
+        ((), ''),
+        ('v*', 'v'),
+        ('release/1.[0-9]', 'release/1.'),
+        (('release/1.*', 'release/2.*'), 'release/'),
+        (('v*', 'release-*'), ''),
+        ('v\\*', 'v'),
+    ),
+)
+def test_get_prefix(patterns, expected_prefix):
+    assert tagmatch.TagMatcher(patterns).get_prefix() == expected_prefix
+
+
+def test_get_git_args():
+    matcher = tagmatch.TagMatcher(('v*', 'release-*'), 'v0.*')
+
+    assert matcher.get_git_args() == ('--match', 'v*', '--match', 'release-*', '--exclude', 'v0.*')
+    assert not tagmatch.TagMatcher()
+
+
+@pytest.mark.parametrize('pattern', ('v[0-9', 'v[[:unknown:]]', ('v*', 1)))
+def test_invalid_pattern(pattern):
+    with pytest.raises(errors.InvalidConfigurationError):
+        tagmatch.TagMatcher(pattern)
+
+
+def test_prefix():
+    matcher = tagmatch.TagMatcher('v*', '*-rc*', prefix='pkg[1]/')
+
+    assert matcher('pkg[1]/v1.0')
+    assert not matcher('pkg[1]/v1.0-rc1')
+    assert not matcher('v1.0')
+    assert not matcher('pkg1/v1.0')
+    assert tagmatch.TagMatcher(prefix='pkg/')('pkg/1.0')
+    assert matcher.get_prefix() == 'pkg[1]/v'
+    assert matcher.get_git_args() == ('--match', 'pkg\\[1]/v*', '--exclude', 'pkg\\[1]/*-rc*')
+    assert tagmatch.TagMatcher(prefix='pkg/').get_git_args() == ('--match', 'pkg/*')
+    assert matcher.strip_prefix('pkg[1]/v1.0') == 'v1.0'
+    assert matcher.get_signature() != tagmatch.TagMatcher('v*', '*-rc*').get_signature()
+
+
+def test_invalid_prefix():
+    with pytest.raises(errors.InvalidConfigurationError):
+        tagmatch.TagMatcher(prefix=['pkg/'])
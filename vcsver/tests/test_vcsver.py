@@ -1,3 +1,6 @@
+import asyncio
+import importlib
+
 import pytest
 
 from .. import vcsver
@@ -100,3 +103,38 @@ def test_get_version_from_pkg_info_file(
         assert not expecting_version
 
     parse_pkg_info_file_mock.assert_called_once_with('PKG-INFO')
+
+
+def test_get_version_async():
+    async def read_revision_info():
+        return types.RevisionInfo(latest_tag='v1.0', distance=2, commit='abc', dirty=False)
+
+    version = asyncio.run(vcsver.get_version_async(
+        read_revision_info=read_revision_info,
+        parse_tag=lambda tag: tag[1:],
+        create_version=lambda version_info: f'{version_info.latest_release}+{version_info.distance}',
+    ))
+
+    assert version == '1.0+2'
+
+
+def test_get_version_async_without_revision_info(mocker):
+    mocker.patch('vcsver.util.parse_pkg_info_file', side_effect=FileNotFoundError())
+
+    async def read_revision_info():
+        return None
+
+    with pytest.raises(errors.RevisionInfoNotFoundError):
+        asyncio.run(vcsver.get_version_async(read_revision_info=read_revision_info))
+
+
+def test_package_exports():
+    package = importlib.import_module('vcsver')
+
+    assert package.get_version is vcsver.get_version
+    assert package.RevisionInfo is types.RevisionInfo
+    assert package.pep440.post is importlib.import_module('vcsver.pep440').post
+    assert set(package.__all__) <= set(dir(package))
+
+    with pytest.raises(AttributeError):
+        package.unknown  # pylint: disable=pointless-statement
@@ -0,0 +1,263 @@
+import os
+import time
+
+import pytest
+
+from .. import errors
+from .. import git
+from .. import gitrepository
+from .. import worktree
+
+
+def _touch(path):
+    stat_result = os.stat(path)
+    os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 5000000000))
+
+
+def _modify(git_repository, scenario):  # pylint: disable=too-many-branches
+    path = git_repository.path
+
+    if scenario == 'modified':
+        git_repository.write('directory/file.txt', 'Modified content\n')
+
+    elif scenario == 'modified-same-size':
+        # Same size and modification time as in the index
+        stat_result = os.stat(path / 'directory/file.txt')
+        git_repository.write('directory/file.txt', 'Directory\n'.upper())
+        os.utime(path / 'directory/file.txt', ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+
+    elif scenario == 'touched':
+        _touch(path / 'directory/file.txt')
+
+    elif scenario == 'deleted':
+        os.unlink(path / 'directory/file.txt')
+
+    elif scenario == 'replaced-by-directory':
+        os.unlink(path / 'file.txt')
+        git_repository.write('file.txt/nested.txt', 'Nested\n')
+
+    elif scenario == 'staged':
+        git_repository.write('directory/file.txt', 'Staged\n')
+        git_repository.git('add', 'directory/file.txt')
+
+    elif scenario == 'staged-and-reverted':
+        git_repository.write('directory/file.txt', 'Staged\n')
+        git_repository.git('add', 'directory/file.txt')
+        git_repository.write('directory/file.txt', 'Directory\n')
+
+    elif scenario == 'added':
+        git_repository.write('new.txt', 'New\n')
+        git_repository.git('add', 'new.txt')
+
+    elif scenario == 'removed-from-index':
+        git_repository.git('rm', '--quiet', '--cached', 'file.txt')
+
+    elif scenario == 'untracked':
+        git_repository.write('untracked.txt', 'Untracked\n')
+
+    elif scenario == 'executable':
+        os.chmod(path / 'file.txt', 0o755)
+
+    elif scenario == 'symlink':
+        os.unlink(path / 'symlink')
+        os.symlink('file.txt', path / 'symlink')
+
+    elif scenario == 'unmerged':
+        git_repository.git('checkout', '--quiet', '-b', 'other', 'HEAD~1')
+        git_repository.write('file.txt', 'Other\n')
+        git_repository.git('commit', '--quiet', '--all', '--message', 'Other')
+        git_repository.git('checkout', '--quiet', 'main')
+        git_repository.git('merge', 'other', check=False)
+
+
+@pytest.mark.parametrize(
+    'scenario',
+    (
+        'clean',
+        'modified',
+        'modified-same-size',
+        'touched',
+        'deleted',
+        'replaced-by-directory',
+        'staged',
+        'staged-and-reverted',
+        'added',
+        'removed-from-index',
+        'untracked',
+        'executable',
+        'symlink',
+        'unmerged',
+    ),
+)
+@pytest.mark.parametrize('index_options', ((), ('--index-version=4',), ('--split-index',)))
+def test_is_dirty_matches_git(git_repository, scenario, index_options):
+    if index_options:
+        git_repository.git('update-index', *index_options)
+
+    _create_history(git_repository)
+    _modify(git_repository, scenario)
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+    dirty = worktree.is_dirty(repository, repository.head())
+
+    assert dirty == git_repository.git('describe', '--dirty', '--always').endswith('-dirty')
+
+
+@pytest.mark.parametrize(
+    'scenario',
+    (
+        'clean',
+        'modified',
+        'modified-same-size',
+        'touched',
+        'deleted',
+        'replaced-by-directory',
+        'staged',
+        'staged-and-reverted',
+        'added',
+        'removed-from-index',
+        'executable',
+        'symlink',
+        'unmerged',
+    ),
+)
+@pytest.mark.parametrize('workers', (1, 4))
+def test_changes_digest_matches_git(git_repository, monkeypatch, scenario, workers):
+    # Split the entries to tasks even in the small repository
+    monkeypatch.setattr(worktree, '_TASK_SIZE', 1)
+
+    _create_history(git_repository)
+    _modify(git_repository, scenario)
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+    digest = worktree.get_changes_digest(repository, repository.head(), workers=workers)
+
+    read_revision_info = git.GitRevisionInfoReader(str(git_repository.path), native=False)
+    assert digest == read_revision_info._get_changes_digest_with_git()  # pylint: disable=protected-access
+
+
+def test_changes_digest_identifies_changes(git_repository):
+    git_repository.commit('Initial')
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    def get_digest(content):
+        git_repository.write('file.txt', content)
+        return worktree.get_changes_digest(repository, repository.head())
+
+    assert get_digest('First\n') == get_digest('First\n')
+    assert get_digest('First\n') != get_digest('Second\n')
+
+
+def _create_history(git_repository):
+    git_repository.write('file.txt', 'File\n')
+    git_repository.write('directory/file.txt', 'Directory\n')
+    os.symlink('directory', git_repository.path / 'symlink')
+    git_repository.git('add', '--all')
+    git_repository.git('commit', '--quiet', '--message', 'Initial')
+    git_repository.write('file.txt', 'Second\n')
+    git_repository.git('commit', '--quiet', '--all', '--message', 'Second')
+
+    # Make the index entries older than the index so that they are not racily clean
+    time.sleep(0.01)
+    git_repository.git('update-index', '--refresh')
+
+
+def test_is_dirty_with_racily_clean_entry(git_repository):
+    git_repository.commit('Initial')
+    index_path = git_repository.path / '.git' / 'index'
+
+    # The file is modified after the index is written but the modification time is the same
+    stat_result = os.stat(index_path)
+    git_repository.write('file.txt', 'Changed\n')
+    os.utime(git_repository.path / 'file.txt', ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+    git_repository.git('update-index', '--refresh', check=False)
+    os.utime(index_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert worktree.is_dirty(repository, repository.head())
+
+
+def test_is_dirty_does_not_write_index(git_repository):
+    git_repository.commit('Initial')
+    _touch(git_repository.path / 'file.txt')
+    index_stat = os.stat(git_repository.path / '.git' / 'index')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert not worktree.is_dirty(repository, repository.head())
+    assert os.stat(git_repository.path / '.git' / 'index').st_mtime_ns == index_stat.st_mtime_ns
+
+
+@pytest.mark.parametrize('scenario', ('attributes', 'autocrlf', 'submodule', 'intent-to-add', 'index-file'))
+def test_unsupported_working_tree(git_repository, monkeypatch, scenario):
+    git_repository.commit('Initial')
+
+    if scenario == 'attributes':
+        git_repository.write('.gitattributes', '*.txt text\n')
+        git_repository.git('add', '.gitattributes')
+
+    elif scenario == 'autocrlf':
+        git_repository.git('config', 'core.autocrlf', 'input')
+
+    elif scenario == 'submodule':
+        head = git_repository.git('rev-parse', 'HEAD')
+        git_repository.git('update-index', '--add', '--cacheinfo', f'160000,{head},submodule')
+
+    elif scenario == 'intent-to-add':
+        git_repository.write('new.txt', 'New\n')
+        git_repository.git('add', '--intent-to-add', 'new.txt')
+
+    elif scenario == 'index-file':
+        monkeypatch.setenv('GIT_INDEX_FILE', str(git_repository.path / '.git' / 'other-index'))
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    with pytest.raises(errors.UnsupportedRepositoryError):
+        worktree.is_dirty(repository, repository.head())
+
+
+@pytest.mark.parametrize('committed', (False, True))
+def test_ignore_submodules(git_repository, committed):
+    git_repository.commit('Initial')
+    head = git_repository.git('rev-parse', 'HEAD')
+    git_repository.git('update-index', '--add', '--cacheinfo', f'160000,{head},submodule')
+    if committed:
+        git_repository.git('commit', '--quiet', '--message', 'Add submodule')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert worktree.is_dirty(repository, repository.head(), ignore_submodules=True) is False
+
+
+def _create_files(git_repository, count):
+    for index in range(0, count):
+        git_repository.write(f'directory-{index // 50:02}/file-{index}.txt', f'{index}\n')
+
+    git_repository.git('add', '--all')
+    git_repository.git('commit', '--quiet', '--message', 'Initial')
+    time.sleep(0.01)
+    git_repository.git('update-index', '--refresh')
+
+
+@pytest.mark.parametrize('workers', (1, 4))
+@pytest.mark.parametrize('modified_file', (None, 'directory-00/file-0.txt', 'directory-19/file-999.txt'))
+def test_is_dirty_with_workers(git_repository, workers, modified_file):
+    _create_files(git_repository, 1000)
+    if modified_file is not None:
+        git_repository.write(modified_file, 'Modified\n')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert worktree.is_dirty(repository, repository.head(), workers=workers) == (modified_file is not None)
+
+
+def test_is_dirty_stops_at_first_modification(git_repository, mocker):
+    _create_files(git_repository, 5000)
+    git_repository.write('directory-00/file-0.txt', 'Modified\n')
+    is_modified_spy = mocker.spy(worktree, '_is_modified')
+
+    repository = gitrepository.Repository.discover(str(git_repository.path))
+
+    assert worktree.is_dirty(repository, repository.head(), workers=2)
+    assert is_modified_spy.call_count < 5000
@@ -6,6 +6,8 @@ class RevisionInfo(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inhe
     distance: typing.Optional[int]
     commit: typing.Optional[str]
     dirty: bool
+    # Digest of the changes in the working tree if dirty (and the digest was requested)
+    dirty_digest: typing.Optional[str] = None
 
 
 class VersionInfo(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
@@ -13,11 +15,16 @@ class VersionInfo(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inher
     distance: typing.Optional[int]
     commit: typing.Optional[str]
     dirty: bool
+    # Digest of the changes in the working tree if dirty (and the digest was requested)
+    dirty_digest: typing.Optional[str] = None
 
 
 RevisionInfoReader = typing.Callable[[], typing.Optional[RevisionInfo]]
 
-RevisionInfoReaderFactory = typing.Callable[[], RevisionInfoReader]
+AsyncRevisionInfoReader = typing.Callable[[], typing.Awaitable[typing.Optional[RevisionInfo]]]
+
+# Called with keyword arguments (e.g. dirty) of the configuration
+RevisionInfoReaderFactory = typing.Callable[..., RevisionInfoReader]
 
 TagParser = typing.Callable[[str], str]
 
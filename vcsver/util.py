@@ -11,3 +11,28 @@ def parse_pkg_info_file(path: str) -> typing.Dict[str, str]:
                 if ':' in line
             )
         }
+
+
+def search_sorted_object_ids(
+    fanout: typing.Sequence[int],
+    oid: bytes,
+    get_oid: typing.Callable[[int], bytes],
+) -> int:
+    '''
+    Return position of the first object id not less than oid in a sorted object id table
+    with 256 entry fanout table (as used in Git pack indexes and commit-graphs).
+    '''
+
+    first_byte = oid[0]
+    low = fanout[first_byte - 1] if first_byte else 0
+    high = fanout[first_byte]
+
+    while low < high:
+        middle = (low + high) // 2
+        if get_oid(middle) < oid:
+            low = middle + 1
+
+        else:
+            high = middle
+
+    return low
@@ -13,8 +13,29 @@ def get_version(
     parse_tag: types.TagParser = lambda tag: tag,
     create_version: types.VersionStringFactory = pep440.post,
 ) -> str:
-    revision_info = read_revision_info()
+    return _create_version(read_revision_info(), root_version, parse_tag, create_version)
 
+
+async def get_version_async(
+    root_version: str = '0',
+    read_revision_info: types.AsyncRevisionInfoReader = git.GitRevisionInfoReader().read_async,
+    parse_tag: types.TagParser = lambda tag: tag,
+    create_version: types.VersionStringFactory = pep440.post,
+) -> str:
+    '''
+    Create version like get_version does, awaiting the revision info (for example, from
+    GitRevisionInfoReader.read_async) so that reading it does not block the event loop.
+    '''
+
+    return _create_version(await read_revision_info(), root_version, parse_tag, create_version)
+
+
+def _create_version(
+    revision_info: typing.Optional[types.RevisionInfo],
+    root_version: str,
+    parse_tag: types.TagParser,
+    create_version: types.VersionStringFactory,
+) -> str:
     if revision_info is None:
         version_from_pkg_info_file = get_version_from_pkg_info_file()
         if version_from_pkg_info_file is None:
@@ -22,25 +43,46 @@ def get_version(
 
         return version_from_pkg_info_file
 
+    return create_version_from_revision_info(
+        revision_info,
+        root_version=root_version,
+        parse_tag=parse_tag,
+        create_version=create_version,
+    )
+
+
+def create_version_from_revision_info(
+    revision_info: types.RevisionInfo,
+    root_version: str = '0',
+    parse_tag: types.TagParser = lambda tag: tag,
+    create_version: types.VersionStringFactory = pep440.post,
+) -> str:
+    return create_version(create_version_info(revision_info, root_version=root_version, parse_tag=parse_tag))
+
+
+def create_version_info(
+    revision_info: types.RevisionInfo,
+    root_version: str = '0',
+    parse_tag: types.TagParser = lambda tag: tag,
+) -> types.VersionInfo:
     if revision_info.latest_tag is None:
         latest_release_version = root_version
 
     else:
         latest_release_version = parse_tag(revision_info.latest_tag)
 
-    version_data = types.VersionInfo(
+    return types.VersionInfo(
         latest_release=latest_release_version,
         distance=revision_info.distance,
         commit=revision_info.commit,
         dirty=revision_info.dirty,
+        dirty_digest=revision_info.dirty_digest,
     )
 
-    return create_version(version_data)
-
 
-def get_version_from_pkg_info_file() -> typing.Optional[str]:
+def get_version_from_pkg_info_file(path: str = 'PKG-INFO') -> typing.Optional[str]:
     try:
-        return util.parse_pkg_info_file('PKG-INFO')['Version']
+        return util.parse_pkg_info_file(path)['Version']
 
     except (PermissionError, FileNotFoundError):
         return None
@@ -0,0 +1,497 @@
+# This module contains native (subprocess free) detection of modifications in the working tree.
+#
+# The result is the same as with git describe --dirty: the working tree is dirty if the
+# index differs from the HEAD commit or a tracked file differs from the index. Untracked
+# files are ignored. Unlike git, the index is never refreshed (written) so no lock is taken.
+
+import concurrent.futures
+import hashlib
+import os
+import stat
+import threading
+import typing
+
+from . import errors
+from . import gitconfig
+from . import gitindex
+from . import gitrepository
+
+
+_MODE_REGULAR = 0o100644
+_MODE_EXECUTABLE = 0o100755
+_MODE_SYMLINK = 0o120000
+_MODE_GITLINK = 0o160000
+_MODE_TREE = 0o040000
+
+# Environment variables changing the index or the configuration of the repository
+_UNSUPPORTED_ENVIRONMENT_VARIABLES = (
+    'GIT_INDEX_FILE',
+    'GIT_CONFIG',
+    'GIT_CONFIG_COUNT',
+    'GIT_CONFIG_PARAMETERS',
+)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_DIGEST_LENGTH = 12
+
+# Mode and object id of deleted files in the changes
+_DELETED = (0, '0' * 40)
+
+_DEFAULT_MAX_WORKERS = 8
+
+# Index entries checked by one task; the tasks contain whole directories unless a directory is
+# larger than the maximum
+_TASK_SIZE = 256
+_MAX_TASK_SIZE = 4 * _TASK_SIZE
+
+
+class _Options(typing.NamedTuple):  # Pylint issue 3876 pylint: disable=inherit-non-class
+    # Path of the working tree with trailing separator
+    work_tree: bytes
+    file_mode: bool
+    trust_ctime: bool
+    check_stat: bool
+    # Entries modified at the same time as the index or later may have been modified after
+    # the index was written without the stat data changing
+    racy_mtime_ns: int
+
+
+def is_dirty(
+    repository: gitrepository.Repository,
+    head: str,
+    workers: typing.Optional[int] = None,
+    ignore_submodules: bool = False,
+) -> bool:
+    '''
+    Return True if the working tree or the index contains changes compared to head.
+
+    The files are checked by a pool of workers threads (by default one per CPU, at most
+    8), each checking files of a few directories at a time. The check stops as soon as a
+    modified file is found. More workers help especially on network file systems.
+
+    If ignore_submodules is True, submodules are ignored like git does with
+    --ignore-submodules=all.
+
+    Raises UnsupportedRepositoryError if the repository uses features (such as submodules
+    or attributes that may convert file content) whose effect is not implemented.
+    '''
+
+    index, options = _read_state(repository, ignore_submodules)
+
+    if not _index_matches_tree(repository, index, repository.commit(head).tree, ignore_submodules):
+        return True
+
+    try:
+        return _is_any_modified(index.entries, options, _get_workers(workers))
+
+    except OSError as exception:
+        raise errors.UnsupportedRepositoryError(f'Could not check working tree: {exception}') from exception
+
+
+def get_changes_digest(
+    repository: gitrepository.Repository,
+    head: str,
+    workers: typing.Optional[int] = None,
+    ignore_submodules: bool = False,
+) -> str:
+    '''
+    Return digest of the changes of tracked files in the working tree compared to head.
+
+    The changes are the same as listed by git diff HEAD: mode and object id of each file
+    whose content or mode differs from head (see changes_digest). Only the files whose
+    stat data differs from the index are read, by a pool of workers threads.
+
+    Raises UnsupportedRepositoryError like is_dirty.
+    '''
+
+    index, options = _read_state(repository, ignore_submodules)
+
+    head_entries: typing.Dict[bytes, typing.Tuple[int, str]] = {}
+    _read_tree_entries(repository, repository.commit(head).tree, b'', {}, head_entries, set())
+    if ignore_submodules:
+        head_entries = {path: entry for path, entry in head_entries.items() if entry[0] != _MODE_GITLINK}
+
+    try:
+        worktree_entries = _read_worktree_entries(index.entries, options, _get_workers(workers))
+
+    except OSError as exception:
+        raise errors.UnsupportedRepositoryError(f'Could not check working tree: {exception}') from exception
+
+    changes: typing.List[typing.Tuple[bytes, int, str]] = []
+    previous_path = None
+    for entry, worktree_entry in zip(index.entries, worktree_entries):
+        # Unmerged paths have an entry for each stage
+        if entry.path == previous_path:
+            continue
+
+        previous_path = entry.path
+        if head_entries.pop(entry.path, None) != worktree_entry:
+            changes.append((entry.path, *(worktree_entry or _DELETED)))
+
+    # Files removed from the index are deleted even if they still exist in the working tree
+    changes.extend((path, *_DELETED) for path in head_entries)
+
+    return changes_digest(changes)
+
+
+def changes_digest(changes: typing.Iterable[typing.Tuple[bytes, int, str]]) -> str:
+    '''
+    Return digest of changes given as (path, mode, object id) tuples.
+
+    Deleted files have mode 0 and object id of zeros.
+    '''
+
+    digest = hashlib.sha1()
+    for path, mode, oid in sorted(changes):
+        digest.update(b'%o %s %s\0' % (mode, oid.encode(), path))
+
+    return digest.hexdigest()[:_DIGEST_LENGTH]
+
+
+def _read_state(
+    repository: gitrepository.Repository,
+    ignore_submodules: bool,
+) -> typing.Tuple[gitindex.Index, _Options]:
+    config = _read_config(repository)
+    _check_supported(repository, config)
+
+    index = gitindex.read_index(os.path.join(repository.git_dir, 'index'))
+    if index is None:
+        index = gitindex.Index([], {}, 0)
+
+    if ignore_submodules:
+        index.entries = [entry for entry in index.entries if entry.mode != _MODE_GITLINK]
+
+    for entry in index.entries:
+        if entry.mode == _MODE_GITLINK:
+            raise errors.UnsupportedRepositoryError('Submodules are not supported')
+
+        if entry.intent_to_add:
+            raise errors.UnsupportedRepositoryError('Intent-to-add entries are not supported')
+
+        if entry.path == b'.gitattributes' or entry.path.endswith(b'/.gitattributes'):
+            raise errors.UnsupportedRepositoryError('Attributes are not supported')
+
+    assert repository.work_tree is not None
+    options = _Options(
+        work_tree=os.path.join(os.fsencode(repository.work_tree), b''),
+        file_mode=gitconfig.is_true(config.get('core.filemode', 'true')),
+        trust_ctime=gitconfig.is_true(config.get('core.trustctime', 'true')),
+        check_stat=config.get('core.checkstat', 'default').lower() != 'minimal',
+        racy_mtime_ns=index.mtime_ns,
+    )
+
+    return index, options
+
+
+def _get_workers(workers: typing.Optional[int]) -> int:
+    if workers is None:
+        return min(_DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+
+    return workers
+
+
+def _read_config(repository: gitrepository.Repository) -> typing.Dict[str, str]:
+    # Attributes and line ending conversion may be configured in system and global configuration
+    config_paths = []
+
+    if 'GIT_CONFIG_NOSYSTEM' not in os.environ:
+        config_paths.append(os.environ.get('GIT_CONFIG_SYSTEM', '/etc/gitconfig'))
+
+    if 'GIT_CONFIG_GLOBAL' in os.environ:
+        config_paths.append(os.environ['GIT_CONFIG_GLOBAL'])
+
+    else:
+        config_paths.append(os.path.join(_get_xdg_config_home(), 'git', 'config'))
+        config_paths.append(os.path.expanduser('~/.gitconfig'))
+
+    config: typing.Dict[str, str] = {}
+    for config_path in config_paths:
+        config.update(gitconfig.read_config(config_path))
+
+    config.update(repository.config)
+
+    return config
+
+
+def _check_supported(repository: gitrepository.Repository, config: typing.Dict[str, str]) -> None:
+    if os.name != 'posix':
+        raise errors.UnsupportedRepositoryError('Working tree status is only supported on POSIX systems')
+
+    for variable in _UNSUPPORTED_ENVIRONMENT_VARIABLES:
+        if variable in os.environ:
+            raise errors.UnsupportedRepositoryError(f'{variable} is set')
+
+    if repository.work_tree is None or 'core.worktree' in config:
+        raise errors.UnsupportedRepositoryError('Working tree location is not supported')
+
+    if config.get('core.autocrlf', 'false').lower() not in ('false', 'no', 'off', '0'):
+        raise errors.UnsupportedRepositoryError('core.autocrlf is not supported')
+
+    if not gitconfig.is_true(config.get('core.symlinks', 'true')):
+        raise errors.UnsupportedRepositoryError('core.symlinks=false is not supported')
+
+    attributes_paths = [
+        os.path.join(repository.common_dir, 'info', 'attributes'),
+        os.path.join(_get_xdg_config_home(), 'git', 'attributes'),
+    ]
+    if 'core.attributesfile' in config or any(os.path.exists(path) for path in attributes_paths):
+        raise errors.UnsupportedRepositoryError('Attributes are not supported')
+
+
+def _get_xdg_config_home() -> str:
+    return os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+
+
+def _index_matches_tree(
+    repository: gitrepository.Repository,
+    index: gitindex.Index,
+    tree: str,
+    ignore_submodules: bool,
+) -> bool:
+    if index.cache_tree.get(b'') == tree:
+        return True
+
+    # Directories whose cache tree matches the tree in the commit need not be compared entry by entry
+    tree_entries: typing.Dict[bytes, typing.Tuple[int, str]] = {}
+    matching_directories: typing.Set[bytes] = set()
+    _read_tree_entries(repository, tree, b'', index.cache_tree, tree_entries, matching_directories)
+
+    if ignore_submodules:
+        tree_entries = {path: entry for path, entry in tree_entries.items() if entry[0] != _MODE_GITLINK}
+
+    for entry in index.entries:
+        if entry.stage != 0:
+            return False
+
+        if matching_directories and _is_in_directories(entry.path, matching_directories):
+            continue
+
+        if tree_entries.pop(entry.path, None) != (entry.mode, entry.oid):
+            return False
+
+    return not tree_entries
+
+
+def _read_tree_entries(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    repository: gitrepository.Repository,
+    tree: str,
+    prefix: bytes,
+    cache_tree: typing.Dict[bytes, str],
+    tree_entries: typing.Dict[bytes, typing.Tuple[int, str]],
+    matching_directories: typing.Set[bytes],
+) -> None:
+    for tree_entry in repository.tree(tree):
+        path = prefix + tree_entry.name
+        if tree_entry.mode == _MODE_TREE:
+            if cache_tree.get(path) == tree_entry.oid:
+                matching_directories.add(path)
+
+            else:
+                _read_tree_entries(
+                    repository,
+                    tree_entry.oid,
+                    path + b'/',
+                    cache_tree,
+                    tree_entries,
+                    matching_directories,
+                )
+
+        else:
+            tree_entries[path] = (_normalize_mode(tree_entry.mode), tree_entry.oid)
+
+
+def _normalize_mode(mode: int) -> int:
+    # Old Git versions wrote also other permissions of regular files to trees
+    if stat.S_ISREG(mode):
+        return _MODE_EXECUTABLE if mode & 0o111 else _MODE_REGULAR
+
+    return mode
+
+
+def _is_in_directories(path: bytes, directories: typing.Set[bytes]) -> bool:
+    separator = path.rfind(b'/')
+    while separator > 0:
+        path = path[:separator]
+        if path in directories:
+            return True
+
+        separator = path.rfind(b'/')
+
+    return False
+
+
+def _is_any_modified(
+    entries: typing.List[gitindex.IndexEntry],
+    options: _Options,
+    workers: int,
+) -> bool:
+    if workers <= 1 or len(entries) <= _TASK_SIZE:
+        return any(_is_modified(entry, options) for entry in entries)
+
+    stop = threading.Event()
+
+    def is_any_modified_in_task(task_entries: typing.List[gitindex.IndexEntry]) -> bool:
+        for entry in task_entries:
+            if stop.is_set():
+                return False
+
+            if _is_modified(entry, options):
+                return True
+
+        return False
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks = [executor.submit(is_any_modified_in_task, task_entries) for task_entries in _split_tasks(entries)]
+        try:
+            return any(task.result() for task in concurrent.futures.as_completed(tasks))
+
+        finally:
+            # Tasks not yet started are cancelled and the running ones stop at the next entry
+            stop.set()
+            for task in tasks:
+                task.cancel()
+
+
+def _split_tasks(entries: typing.List[gitindex.IndexEntry]) -> typing.Iterator[typing.List[gitindex.IndexEntry]]:
+    start = 0
+    for position in range(_TASK_SIZE, len(entries)):
+        task_size = position - start
+        if task_size < _TASK_SIZE:
+            continue
+
+        directory = entries[position].path.rpartition(b'/')[0]
+        if task_size < _MAX_TASK_SIZE and entries[position - 1].path.rpartition(b'/')[0] == directory:
+            continue
+
+        yield entries[start:position]
+        start = position
+
+    yield entries[start:]
+
+
+def _is_modified(  # pylint: disable=too-many-return-statements
+    entry: gitindex.IndexEntry,
+    options: _Options,
+) -> bool:
+    if entry.stage != 0:
+        return True
+
+    # Like git, trust the index for entries marked as not to be checked out or checked
+    if entry.skip_worktree or entry.assume_valid:
+        return False
+
+    path = options.work_tree + entry.path
+    try:
+        stat_result = os.lstat(path)
+
+    except (FileNotFoundError, NotADirectoryError):
+        return True
+
+    if _mode_differs(entry.mode, stat_result.st_mode, options.file_mode):
+        return True
+
+    # The index stores the size truncated to 32 bits; racily clean entries have size 0
+    if entry.size not in (0, stat_result.st_size & 0xffffffff):
+        return True
+
+    if _stat_matches(entry, stat_result, options) and entry.mtime_ns < options.racy_mtime_ns:
+        return False
+
+    return _hash_file(path, stat_result) != entry.oid
+
+
+def _read_worktree_entries(
+    entries: typing.List[gitindex.IndexEntry],
+    options: _Options,
+    workers: int,
+) -> typing.List[typing.Optional[typing.Tuple[int, str]]]:
+    def read_task(
+        task_entries: typing.List[gitindex.IndexEntry],
+    ) -> typing.List[typing.Optional[typing.Tuple[int, str]]]:
+        return [_read_worktree_entry(entry, options) for entry in task_entries]
+
+    if workers <= 1 or len(entries) <= _TASK_SIZE:
+        return read_task(entries)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return [
+            worktree_entry
+            for task_entries in executor.map(read_task, _split_tasks(entries))
+            for worktree_entry in task_entries
+        ]
+
+
+def _read_worktree_entry(
+    entry: gitindex.IndexEntry,
+    options: _Options,
+) -> typing.Optional[typing.Tuple[int, str]]:
+    # Return mode and object id of the file in the working tree or None if it does not exist
+    if entry.stage == 0 and (entry.skip_worktree or entry.assume_valid):
+        return entry.mode, entry.oid
+
+    path = options.work_tree + entry.path
+    try:
+        stat_result = os.lstat(path)
+
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    if stat.S_ISLNK(stat_result.st_mode):
+        mode = _MODE_SYMLINK
+
+    elif not stat.S_ISREG(stat_result.st_mode):
+        return None
+
+    elif not options.file_mode and entry.mode in (_MODE_REGULAR, _MODE_EXECUTABLE):
+        mode = entry.mode
+
+    else:
+        mode = _MODE_EXECUTABLE if stat_result.st_mode & stat.S_IXUSR else _MODE_REGULAR
+
+    if entry.stage == 0 and _stat_matches(entry, stat_result, options) and entry.mtime_ns < options.racy_mtime_ns:
+        return mode, entry.oid
+
+    return mode, _hash_file(path, stat_result)
+
+
+def _mode_differs(index_mode: int, file_mode: int, check_executable: bool) -> bool:
+    if stat.S_ISLNK(file_mode):
+        return index_mode != _MODE_SYMLINK
+
+    if not stat.S_ISREG(file_mode) or index_mode == _MODE_SYMLINK:
+        return True
+
+    return check_executable and (index_mode == _MODE_EXECUTABLE) != bool(file_mode & stat.S_IXUSR)
+
+
+def _stat_matches(entry: gitindex.IndexEntry, stat_result: os.stat_result, options: _Options) -> bool:
+    # The seconds are stored as 32-bit values, which suffices until the year 2106
+    if entry.mtime_ns != stat_result.st_mtime_ns:
+        return False
+
+    if options.trust_ctime and entry.ctime_ns != stat_result.st_ctime_ns:
+        return False
+
+    if options.check_stat:
+        if entry.ino != stat_result.st_ino & 0xffffffff:
+            return False
+
+        if (entry.uid, entry.gid) != (stat_result.st_uid & 0xffffffff, stat_result.st_gid & 0xffffffff):
+            return False
+
+    return entry.size == stat_result.st_size & 0xffffffff
+
+
+def _hash_file(path: bytes, stat_result: os.stat_result) -> str:
+    if stat.S_ISLNK(stat_result.st_mode):
+        content = os.readlink(path)
+        return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+    object_hash = hashlib.sha1(b'blob %d\0' % stat_result.st_size)
+    with open(path, 'rb') as blob_file:
+        for chunk in iter(lambda: blob_file.read(_HASH_CHUNK_SIZE), b''):
+            object_hash.update(chunk)
+
+    return object_hash.hexdigest()